@@ -0,0 +1 @@
+"""Benchmarks e gerador de árvores sintéticas (ver benchmarks/run.py para a suíte completa)."""
@@ -0,0 +1,114 @@
+"""
+Carga assíncrona (src/step_loader.py): tempo de frame enquanto um step grande é carregado, com o
+caminho antigo (StepCache.get + render na mesma iteração: o frame espera a leitura, a árvore e o
+envio inteiro) e com o StepLoader (leitura/árvore/batch fora da thread GL, envio em fatias de
+--budget ms por frame, modelo anterior na tela). O maior frame durante a carga é o pior atraso de
+entrada: poll_events só roda entre frames. No caminho síncrono o único frame inclui o primeiro
+desenho do modelo novo, que não é custo de carga (e é igual nos dois caminhos); no StepLoader ele
+fica de fora. Confere que o frame final é igual nos dois caminhos.
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_async_load.py [--terminals 100000 500000] [--budget 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[100_000, 500_000])
+    parser.add_argument('--budget', type=float, default=4.0, help="ms de envio à GPU por frame")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.renderer3d import Renderer3D
+    from src.vtk_loader_3d import load_vtk_3d
+    from src.step_cache import StepCache
+    from src.step_loader import StepLoader
+    from src.app3d import default_view_params, fit_view
+    from benchmarks.synthetic import cco_tree, write_vtk
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    print(f"{'ramos':>8s} {'caminho':>10s} {'carga (ms)':>11s} {'frames':>7s} {'frame p50':>10s} "
+          f"{'frame máx':>10s} {'igual':>6s}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, "first.vtk")
+            write_vtk(first, *cco_tree(2000, dim=3, seed=1), binary=True)
+            for n in args.terminals:
+                path = os.path.join(tmp, f"tree_{n}.vtk")
+                write_vtk(path, *cco_tree(n, dim=3, seed=2), binary=True)
+                images = {}
+                for mode in ('síncrono', 'StepLoader'):
+                    renderer = Renderer3D()
+                    renderer.resize(width, height)
+                    cache = StepCache(lambda p: load_vtk_3d(p, use_cache=False))
+                    loader = StepLoader(cache, renderer, args.budget / 1e3)
+                    view_params = default_view_params()
+                    model = cache.get(first)
+                    fit_view(view_params, model)
+
+                    def frame():
+                        glClearColor(0.08, 0.08, 0.12, 1.0)
+                        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                        renderer.render(model, view_params, {})
+                        loader.draw(width, height)
+                        glFinish()
+
+                    frame()
+                    times = []
+                    t0 = time.perf_counter()
+                    if mode == 'síncrono':
+                        f0 = time.perf_counter()
+                        model = cache.get(path)
+                        frame()
+                        times.append((time.perf_counter() - f0) * 1e3)
+                    else:
+                        loader.request(path)
+                        # Frames com o modelo anterior na tela, até o novo estar pronto para desenhar
+                        while True:
+                            f0 = time.perf_counter()
+                            done = loader.poll()
+                            if done is not None:
+                                model = done[1]
+                                break
+                            frame()
+                            times.append((time.perf_counter() - f0) * 1e3)
+                    elapsed = (time.perf_counter() - t0) * 1e3
+                    fit_view(view_params, model)
+                    frame()
+                    images[mode] = target.read_rgba().copy()
+                    same = '' if mode == 'síncrono' else ('sim' if np.array_equal(images[mode], images['síncrono'])
+                                                          else 'não')
+                    print(f"{len(model.segment_table):>8d} {mode:>10s} {elapsed:>11.0f} {len(times):>7d} "
+                          f"{float(np.median(times)):>10.1f} {max(times):>10.1f} {same:>6s}")
+                    loader.shutdown()
+                    cache.shutdown()
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
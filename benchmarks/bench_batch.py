@@ -0,0 +1,73 @@
+"""
+Análise em lote (src/batch_stats.py): arquivos/s e ganho em relação a 1 processo conforme o
+número de processos cresce, num diretório com milhares de VTKs sintéticos (árvores CCO).
+Também mede o lote sequencial com load_vtk_3d, como referência do custo por arquivo.
+
+Uso:
+    python benchmarks/bench_batch.py [--files 2000] [--terminals 500] [--workers 1 2 4 8]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.batch_stats import collect_stats, find_vtk_files, STATS_DTYPE
+from src.vtk_loader_3d import load_vtk_3d
+from benchmarks.synthetic import cco_tree, write_vtk
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--terminals', type=int, default=500, help="terminais de cada árvore sintética")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1))) or [1])
+    parser.add_argument('--binary', action='store_true', help="VTK BINARY em vez de ASCII")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Poucas árvores distintas copiadas com nomes de step diferentes: gerar é bem mais caro que ler
+        variants = []
+        for seed in range(8):
+            path = os.path.join(tmp, f"variant_{seed}.vtk")
+            write_vtk(path, *cco_tree(args.terminals, dim=3, seed=seed), binary=args.binary)
+            with open(path, 'rb') as f:
+                variants.append(f.read())
+            os.remove(path)
+        for k in range(args.files):
+            d = os.path.join(tmp, f"Nterm_{args.terminals:04d}_{k // 1000}")
+            os.makedirs(d, exist_ok=True)
+            with open(os.path.join(d, f"tree3D_Nterm{args.terminals:04d}_step{k:05d}.vtk"), 'wb') as f:
+                f.write(variants[k % len(variants)])
+        files = find_vtk_files([tmp])
+        size_mb = sum(len(variants[k % len(variants)]) for k in range(args.files)) / 2 ** 20
+        print(f"{len(files)} arquivos, {size_mb:.0f} MB, {cpus} CPUs; {STATS_DTYPE.itemsize} bytes por arquivo de volta")
+
+        t0 = time.perf_counter()
+        for path in files[:200]:
+            load_vtk_3d(path, use_cache=False)
+        per_file = (time.perf_counter() - t0) / min(200, len(files)) * 1e3
+        print(f"load_vtk_3d sequencial: {per_file:.2f} ms/arquivo")
+
+        print(f"{'processos':>10s} {'tempo (s)':>10s} {'arquivos/s':>11s} {'ganho':>7s} {'eficiência':>11s}")
+        base = None
+        for workers in args.workers:
+            t0 = time.perf_counter()
+            table = collect_stats(files, workers=workers)
+            elapsed = time.perf_counter() - t0
+            assert int(table['status'].max()) == 0
+            base = base or elapsed
+            speedup = base / elapsed
+            print(f"{workers:>10d} {elapsed:>10.2f} {len(files) / elapsed:>11.0f} {speedup:>6.2f}x "
+                  f"{speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Culling por frustum/tamanho na tela (Renderer3D.culling e Renderer.culling): tempo de frame com e
+sem culling, da árvore inteira até um zoom profundo numa subárvore, ramos desenhados / fora do
+frustum / fundidos (nós sub-pixel), custo da consulta na octree/quadtree quando a câmera anda
+(órbita de 1° por frame no 3D, pan no 2D) e da construção da árvore espacial.
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_culling.py [--terminals 10000 100000 500000] [--zooms 1 8 64] [--frames 5]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--zooms', type=float, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--frames', type=int, default=5, help="frames medidos por configuração (mediana)")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.renderer import Renderer
+    from src.renderer3d import Renderer3D
+    from src.vtk_parser import PolyData
+    from src import vtk_loader, vtk_loader_3d
+    from src.app3d import default_view_params, fit_view
+    from src.profiler import PROFILER
+    from benchmarks.synthetic import cco_tree
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    PROFILER.set_enabled(True)
+    print(f"{'dim':>3s} {'ramos':>8s} {'zoom':>6s} {'sem (ms)':>9s} {'com (ms)':>9s} {'câmera andando (ms)':>20s} "
+          f"{'consulta (ms)':>14s} {'desenhados':>11s} {'fora':>9s} {'fundidos':>9s} {'árvore (ms)':>12s}")
+    try:
+        for dim in (3, 2):
+            for n in args.terminals:
+                points, lines, radii = cco_tree(n, dim=dim)
+                data = PolyData(points.astype(np.float32), lines.astype(np.int32), radii.astype(np.float32))
+                if dim == 3:
+                    model = vtk_loader_3d.model_from_polydata(data)
+                    view_params = default_view_params()
+                    fit_view(view_params, model)
+                    fitted = view_params['distance']
+                    # Zoom numa subárvore: o alvo vai para a ponta de um ramo terminal no meio da tabela
+                    table = model.segment_table
+                    leaves = np.flatnonzero(table.is_leaf_segment)
+                    leaf = leaves[len(leaves) // 4]
+                    focus = table.p1[leaf].astype(np.float64)
+                else:
+                    model = vtk_loader.model_from_polydata(data)
+                    extent = max(model.bounds[1] - model.bounds[0], model.bounds[3] - model.bounds[2])
+                    fitted = 2.0 / (1.1 * float(extent))
+                    cx, cy = model.get_center()
+                    leaf = len(model.segments) // 4
+                    focus = model.vertices[model.segments[leaf, 1]].astype(np.float64)
+                    view_params = {'zoom': fitted, 'pan_x': -cx, 'pan_y': -cy, 'rotation': 0.0}
+
+                def make(culling):
+                    renderer = Renderer3D() if dim == 3 else Renderer()
+                    renderer.resize(width, height)
+                    renderer.culling = culling
+                    return renderer
+
+                def frame(renderer, move=None):
+                    if move:
+                        move()
+                    t0 = time.perf_counter()
+                    glClearColor(0.08, 0.08, 0.12, 1.0)
+                    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                    if dim == 3:
+                        renderer.render(model, view_params, {})
+                    else:
+                        renderer.render(model, view_params)
+                    glFinish()
+                    return (time.perf_counter() - t0) * 1e3
+
+                renderers = {culling: make(culling) for culling in (False, True)}
+                PROFILER.reset()
+                frame(renderers[True])
+                PROFILER.end_frame()
+                build = float(PROFILER.recent('octree_build')[-1])
+                for zoom in args.zooms:
+                    if dim == 3:
+                        # Interpola o alvo do centro da árvore até a subárvore conforme o zoom aumenta
+                        k = 1.0 - 1.0 / zoom
+                        view_params['target'] = ((1.0 - k) * model.target + k * focus).tolist()
+                        view_params['distance'] = fitted / zoom
+                    else:
+                        k = 1.0 - 1.0 / zoom
+                        view_params['zoom'] = fitted * zoom
+                        view_params['pan_x'] = -((1.0 - k) * cx + k * focus[0])
+                        view_params['pan_y'] = -((1.0 - k) * cy + k * focus[1])
+                    times = {}
+                    for culling, renderer in renderers.items():
+                        frame(renderer)
+                        times[culling] = float(np.median([frame(renderer) for _ in range(args.frames)]))
+                    stats = dict(renderers[True].culler.stats)
+
+                    # Câmera andando: toda a consulta é refeita a cada frame
+                    def move():
+                        if dim == 3:
+                            view_params['yaw'] += 1.0
+                        else:
+                            view_params['pan_x'] += 0.5 / (view_params['zoom'] * width)
+                    PROFILER.reset()
+                    moving = []
+                    for _ in range(args.frames):
+                        moving.append(frame(renderers[True], move))
+                        PROFILER.end_frame()
+                    query = float(np.median(PROFILER.recent('cull')))
+                    print(f"{dim:>3d} {len(lines):>8d} {zoom:>5g}× {times[False]:>9.1f} {times[True]:>9.1f} "
+                          f"{float(np.median(moving)):>20.1f} {query:>14.1f} {stats['drawn']:>11d} "
+                          f"{stats['culled']:>9d} {stats['merged']:>9d} {build:>12.0f}")
+    finally:
+        PROFILER.set_enabled(False)
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Ritmo de frames (src/frame_pacer.py): uso de CPU do processo e frames desenhados por segundo no laço
+do App3D, parado e durante a animação, com o laço antigo (redesenha a cada iteração com
+poll_events) e com o FramePacer (desenha só com algo novo e espera eventos entre frames).
+Sem janela não há eventos nem vsync: wait_events_timeout vira time.sleep (nenhum evento chega) e
+o vsync é aproximado por --fps (padrão 60). Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_frame_pacing.py [--terminals 10000] [--seconds 3] [--fps 60]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, default=10_000)
+    parser.add_argument('--seconds', type=float, default=3.0, help="duração de cada cenário")
+    parser.add_argument('--fps', type=float, default=60.0, help="fps_cap (no lugar do vsync)")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.app3d import App3D
+    from src.frame_pacer import FramePacer
+    from benchmarks.synthetic import cco_tree, write_vtk
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_vtk(os.path.join(tmp, "tree3D_Nterm0128_step0128.vtk"), *cco_tree(args.terminals, dim=3),
+                      binary=True)
+            app = App3D(tmp, "128", initial_step=128, step_inc=16, use_timeline=False)
+            app.renderer.resize(width, height)
+            app.load_current_step()
+            while app.step_loader.loading:
+                app.poll_loading()
+            print(f"{len(app.model.segment_table)} ramos, {args.seconds:g} s por cenário")
+            print(f"{'laço':>10s} {'cenário':>22s} {'CPU':>6s} {'frames/s':>9s}")
+
+            def frame():
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                app.renderer.render(app.model, app.view_params, app.render_options())
+                glFinish()
+
+            def play(speed):
+                if speed > 0:
+                    app.animation.speed = speed
+                app.animation_playing = speed > 0
+                app.model.visible_count = 1 if speed > 0 else None
+
+            scenarios = (('parado', 0.0), ('animação 2 ramos/s', 2.0), ('animação 500 ramos/s', 500.0))
+            for loop in ('antigo', 'FramePacer'):
+                for name, speed in scenarios:
+                    play(speed)
+                    app.pacer = FramePacer(args.fps if loop == 'FramePacer' else None,
+                                           wait_events=time.sleep, poll_events=lambda: None)
+                    frames = 0
+                    cpu0, t0 = time.process_time(), time.perf_counter()
+                    while time.perf_counter() - t0 < args.seconds:
+                        app.advance_animation(app.pacer.tick())
+                        if loop == 'antigo' or app.pacer.should_render():
+                            frame()
+                            app.pacer.frame_done()
+                            frames += 1
+                        if loop == 'FramePacer':
+                            app.pacer.wait(app._next_tick())
+                    elapsed = time.perf_counter() - t0
+                    cpu = (time.process_time() - cpu0) / elapsed
+                    print(f"{loop:>10s} {name:>22s} {cpu:>6.0%} {frames / elapsed:>9.1f}")
+            app.step_loader.shutdown()
+            app.step_cache.shutdown()
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Animação por tempo (src/growth_animation.py): a árvore inteira crescendo em --duration s no laço
+do App3D com o FramePacer (--fps no lugar do vsync). Mede, para cada easing, frames desenhados,
+ramos acrescentados por frame, tempo de frame animando vs a árvore parada no mesmo tamanho e o
+tempo real até a árvore completar (tem que ficar perto de --duration, qualquer que seja o FPS).
+Mede também o custo de um seek (tempo -> visible_count e volta), que é O(1).
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_growth_animation.py [--terminals 100000] [--duration 5] [--fps 60]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, default=100_000)
+    parser.add_argument('--duration', type=float, default=5.0, help="s para a árvore inteira")
+    parser.add_argument('--fps', type=float, default=60.0, help="fps_cap (no lugar do vsync)")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.app3d import App3D
+    from src.frame_pacer import FramePacer
+    from src.growth_animation import GrowthAnimation, EASINGS
+    from benchmarks.synthetic import cco_tree, write_vtk
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_vtk(os.path.join(tmp, "tree3D_Nterm0128_step0128.vtk"), *cco_tree(args.terminals, dim=3),
+                      binary=True)
+            app = App3D(tmp, "128", initial_step=128, step_inc=16, use_timeline=False)
+            app.renderer.resize(width, height)
+            app.load_current_step()
+            while app.step_loader.loading:
+                app.poll_loading()
+            total = len(app.model.segment_table)
+
+            seek = GrowthAnimation(duration=args.duration, easing='in_out')
+            seek.sync(total, 1)
+            ts = np.random.default_rng(0).uniform(0, args.duration, 10_000)
+            t0 = time.perf_counter()
+            for t in ts:
+                seek.seek_count(seek.seek(t))
+            seek_us = (time.perf_counter() - t0) / (2 * len(ts)) * 1e6
+            print(f"{total} ramos, árvore inteira em {args.duration:g} s, fps_cap {args.fps:g}; "
+                  f"seek {seek_us:.1f} µs")
+            print(f"{'easing':>8s} {'frames':>7s} {'ramos/frame':>12s} {'máx/frame':>10s} "
+                  f"{'frame p50':>10s} {'parado p50':>11s} {'completa (s)':>13s}")
+
+            def frame():
+                f0 = time.perf_counter()
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                app.renderer.render(app.model, app.view_params, app.render_options())
+                glFinish()
+                return (time.perf_counter() - f0) * 1e3
+
+            for easing in EASINGS:
+                app.animation = GrowthAnimation(duration=args.duration, easing=easing)
+                app.pacer = FramePacer(args.fps, wait_events=time.sleep, poll_events=lambda: None)
+                app.model.visible_count = 1
+                app.animation_playing = True
+                app.max_step = app.current_step   # parar no fim em vez de pedir o step seguinte
+                counts, times = [], []
+                t0 = time.perf_counter()
+                while True:
+                    app.advance_animation(app.pacer.tick())
+                    if not app.animation_playing:
+                        break
+                    if app.pacer.should_render():
+                        times.append(frame())
+                        counts.append(app.model.visible_count)
+                        app.pacer.frame_done()
+                    app.pacer.wait(app._next_tick())
+                elapsed = time.perf_counter() - t0
+                steps = np.diff(counts, prepend=1)
+                # Mesma sequência de tamanhos com a árvore parada (visible_count igual, sem animação)
+                static = []
+                for count in counts[::max(1, len(counts) // 30)]:
+                    app.model.visible_count = count
+                    frame()
+                    static.append(frame())
+                print(f"{easing:>8s} {len(counts):>7d} {float(steps.mean()):>12.0f} {int(steps.max()):>10d} "
+                      f"{float(np.median(times)):>10.1f} {float(np.median(static)):>11.1f} {elapsed:>13.2f}")
+            app.step_loader.shutdown()
+            app.step_cache.shutdown()
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
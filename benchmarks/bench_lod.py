@@ -0,0 +1,104 @@
+"""
+LOD por subárvore (Renderer3D.lod): tempo de frame com e sem LOD com a árvore enquadrada e com a
+câmera 2× e 4× mais longe, quantas subárvores colapsam (e quantos ramos elas substituem), pixels
+que mudam mais de 32/255 em relação ao desenho completo, custo da seleção e do passe pós-ordem.
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_lod.py [--terminals 10000 100000 500000] [--pixels 3] [--frames 5]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--pixels', type=float, default=3.0, help="orçamento de erro (Renderer3D.lod_pixels)")
+    parser.add_argument('--distances', type=float, nargs='+', default=[1, 2, 4],
+                        help="distância da câmera em múltiplos do enquadramento")
+    parser.add_argument('--frames', type=int, default=5, help="frames medidos por configuração (mediana)")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.renderer3d import Renderer3D
+    from src.vtk_parser import PolyData
+    from src.vtk_loader_3d import model_from_polydata
+    from src.app3d import default_view_params, fit_view
+    from benchmarks.synthetic import cco_tree
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    print(f"{'ramos':>8s} {'distância':>10s} {'sem (ms)':>9s} {'com (ms)':>9s} {'colapsadas':>11s} "
+          f"{'ramos substituídos':>19s} {'pixels > 32':>12s} {'seleção (ms)':>13s} {'pós-ordem (ms)':>15s}")
+    try:
+        for n in args.terminals:
+            points, lines, radii = cco_tree(n, dim=3)
+            model = model_from_polydata(PolyData(points.astype(np.float32), lines.astype(np.int32),
+                                                 radii.astype(np.float32)))
+            view_params = default_view_params()
+            fit_view(view_params, model)
+            fitted = view_params['distance']
+            t0 = time.perf_counter()
+            summary = model.subtree_summary()
+            build = (time.perf_counter() - t0) * 1e3
+
+            def frame(renderer):
+                t0 = time.perf_counter()
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                renderer.render(model, view_params, {})
+                glFinish()
+                return (time.perf_counter() - t0) * 1e3
+
+            renderers = {}
+            for lod in (False, True):
+                renderer = renderers[lod] = Renderer3D()
+                renderer.resize(width, height)
+                renderer.lod = lod
+                renderer.lod_pixels = args.pixels
+            for distance in args.distances:
+                view_params['distance'] = fitted * distance
+                times = {}
+                images = {}
+                for lod, renderer in renderers.items():
+                    frame(renderer)
+                    times[lod] = float(np.median([frame(renderer) for _ in range(args.frames)]))
+                    images[lod] = target.read_rgba()[:, :, :3].astype(np.int16)
+                lod_renderer = renderers[True]
+                eye = np.asarray(lod_renderer._lod_cache[1])
+                samples = []
+                for _ in range(args.frames):
+                    t0 = time.perf_counter()
+                    _, collapsed = summary.select(eye, lod_renderer._focal_pixels(), args.pixels)
+                    samples.append((time.perf_counter() - t0) * 1e3)
+                n_collapsed = 0 if collapsed is None else len(collapsed)
+                replaced = 0 if collapsed is None else int(summary.size[collapsed].sum())
+                changed = int((np.abs(images[True] - images[False]).max(axis=2) > 32).sum())
+                print(f"{len(lines):>8d} {distance:>9g}× {times[False]:>9.1f} {times[True]:>9.1f} {n_collapsed:>11d} "
+                      f"{replaced:>19d} {changed:>12d} {float(np.median(samples)):>13.1f} {build:>15.0f}")
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
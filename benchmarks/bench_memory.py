@@ -0,0 +1,81 @@
+"""
+Memória dos ramos: lista de Segment (layout antigo: um dataclass + 3 arrays float64 por ramo)
+vs SegmentTable em colunas. Mede com tracemalloc no Nterm_512 e numa árvore sintética de 1M.
+
+Uso:
+    python benchmarks/bench_memory.py [--sizes 1000000]
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model3d import Model3D, Segment
+from src.vtk_loader_3d import load_vtk_3d
+from benchmarks.synthetic import synthetic_tree
+
+FILE_512 = os.path.join(project_root, "TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados", "TP2_3D", "Nterm_512",
+                        "tree3D_Nterm0512_step0512.vtk")
+
+
+def legacy_segment_list(table):
+    """Lista de Segment como o build_segment_list antigo criava (arrays float64 próprios por ramo)."""
+    return [
+        Segment(id=int(table.ids[k]), i0=int(table.i0[k]), i1=int(table.i1[k]),
+                p0=np.array(table.p0[k], dtype=np.float64), p1=np.array(table.p1[k], dtype=np.float64),
+                r0=float(table.r0[k]), r1=float(table.r1[k]), length=float(table.length[k]),
+                dir=np.array(table.dir[k], dtype=np.float64), depth=int(table.depth[k]),
+                is_root_segment=bool(table.is_root_segment[k]), is_leaf_segment=bool(table.is_leaf_segment[k]))
+        for k in range(len(table))
+    ]
+
+
+def _traced(fn):
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def report(name, model):
+    table = model.segment_table
+    n = len(table)
+    before, segs = _traced(lambda: legacy_segment_list(table))
+    del segs
+    after = table.nbytes()
+    print(f"{name:32s} {n:>10d} {before / 2**20:>12.1f} {after / 2**20:>12.1f} "
+          f"{before / n:>9.0f} {after / n:>9.0f}")
+
+
+def synthetic_model(n_segments):
+    points, lines, radii = synthetic_tree(n_segments)
+    model = Model3D()
+    model.points = points.astype(np.float32)
+    model.segments = lines.astype(np.int32)
+    model.radius_point = np.full(len(points), 0.01, dtype=np.float32)
+    model.build_segment_list()
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'modelo':32s} {'ramos':>10s} {'antes (MB)':>12s} {'depois (MB)':>12s} "
+          f"{'B/ramo':>9s} {'B/ramo':>9s}")
+    if os.path.exists(FILE_512):
+        report("Nterm_512 step0512", load_vtk_3d(FILE_512, use_cache=False))
+    for n in args.sizes:
+        report(f"sintética {n}", synthetic_model(n))
+
+
+if __name__ == "__main__":
+    main()
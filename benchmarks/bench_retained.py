@@ -0,0 +1,121 @@
+"""
+Modo retido (VBO) vs modo imediato nos datasets do pacote: último step de cada diretório do TP1_2D
+(Renderer) e do TP2_3D (Renderer3D), câmera inicial do App. Para cada um: draw calls do modo
+retido, tempo de frame dos dois modos e pixels diferentes (mais de 2/255 em algum canal; o
+arredondamento da cobertura do anti-aliasing fica abaixo disso), com a árvore inteira e no meio
+da animação (visible_count = metade).
+- 2D: linhas com anti-aliasing e blend, então a ordem de desenho conta: o batch fica na ordem do
+  arquivo, com um draw call por trecho de mesma espessura; tem que dar 0 pixels diferentes.
+- 3D: linhas opacas agrupadas pela largura inteira (a que o GL rasteriza); sobram poucos pixels
+  nas junções, onde dois ramos empatam na profundidade e a ordem dentro do grupo decide.
+  Renderer3D.verify_batch confere cor, posição e largura de cada ramo.
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_retained.py [--size 800x600] [--frames 5]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+DATA_ROOT = os.path.join(project_root, "TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='800x600')
+    parser.add_argument('--frames', type=int, default=5)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.renderer import Renderer
+    from src.renderer3d import Renderer3D
+    from src.vtk_loader import load_vtk
+    from src.vtk_loader_3d import load_vtk_3d
+    from src.app import default_view_params as default_view_2d
+    from src.app3d import default_view_params as default_view_3d, fit_view
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    print(f"{'arquivo':>32s} {'ramos':>6s} {'draw calls':>11s} {'imediato (ms)':>14s} {'retido (ms)':>12s} "
+          f"{'px dif.':>8s} {'px dif. (metade)':>17s} {'verify':>7s}")
+    try:
+        cases = []
+        for directory in sorted(glob.glob(os.path.join(DATA_ROOT, "TP1_2D", "Nterm_*"))):
+            cases.append(('2D', sorted(glob.glob(os.path.join(directory, "*.vtk")))[-1]))
+        for directory in sorted(glob.glob(os.path.join(DATA_ROOT, "TP2_3D", "Nterm_*"))):
+            cases.append(('3D', sorted(glob.glob(os.path.join(directory, "*.vtk")))[-1]))
+        if not cases:
+            print(f"Datasets não encontrados em {DATA_ROOT}")
+            return
+        for kind, path in cases:
+            if kind == '2D':
+                model = load_vtk(path)
+                view_params = default_view_2d()
+                n = len(model.segments)
+                make = Renderer
+
+                def render(renderer):
+                    renderer.render(model, view_params)
+            else:
+                model = load_vtk_3d(path)
+                view_params = default_view_3d()
+                fit_view(view_params, model)
+                n = len(model.segment_table)
+                make = Renderer3D
+
+                def render(renderer):
+                    renderer.render(model, view_params, {})
+
+            def frame(renderer):
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                render(renderer)
+                glFinish()
+                return target.read_rgba().astype(np.int16)
+
+            def timed(renderer):
+                frame(renderer)
+                t0 = time.perf_counter()
+                for _ in range(args.frames):
+                    frame(renderer)
+                return (time.perf_counter() - t0) * 1e3 / args.frames
+
+            immediate, retained = make(), make()
+            immediate.retained = False
+            for renderer in (immediate, retained):
+                renderer.resize(width, height)
+            diffs = []
+            for visible_count in (None, max(1, n // 2)):
+                model.visible_count = visible_count
+                diff = np.abs(frame(retained) - frame(immediate)).max(axis=2)
+                diffs.append(int((diff > 2).sum()))
+            model.visible_count = None
+            t_immediate, t_retained = timed(immediate), timed(retained)
+            verify = ('sim' if retained.verify_batch(model) else 'não') if kind == '3D' else '-'
+            print(f"{os.path.basename(path):>32s} {n:>6d} {len(retained._buffers.batch.bucket_widths):>11d} "
+                  f"{t_immediate:>14.1f} {t_retained:>12.2f} {diffs[0]:>8d} {diffs[1]:>17d} {verify:>7s}")
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
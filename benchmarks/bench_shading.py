@@ -0,0 +1,111 @@
+"""
+Cor/iluminação no shader vs cores na CPU (Renderer3D.shading): custo de trocar uma opção
+(teclas 1/2/C/R e seleção por clique) e diferença de pixels entre os dois caminhos.
+- CPU: cada troca remonta o batch (build_batch) e reenvia os VBOs antes de desenhar
+- shader: cada troca só muda uniforms; o batch de atributos é montado uma vez por modelo
+O custo da troca é o frame logo após a tecla menos um frame repetido com as mesmas opções
+(a rasterização, que depende da espessura das linhas, sai da conta).
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_shading.py [--terminals 512 10000 100000] [--rounds 3]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[512, 10_000, 100_000])
+    parser.add_argument('--rounds', type=int, default=3, help="voltas pela sequência de opções")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import (glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT,
+                           GL_FLAT, GL_SMOOTH)
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.renderer3d import Renderer3D
+    from src.vtk_parser import PolyData
+    from src.vtk_loader_3d import model_from_polydata
+    from src.app3d import default_view_params, fit_view
+    from benchmarks.synthetic import cco_tree
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    print(f"{'terminais':>10s} {'ramos':>8s} {'troca CPU (ms)':>15s} {'troca shader (ms)':>18s} "
+          f"{'frame CPU (ms)':>15s} {'frame shader (ms)':>18s} {'dif. máx (0-255)':>17s} {'pixels > 2':>11s}")
+    try:
+        for n in args.terminals:
+            points, lines, radii = cco_tree(n, dim=3)
+            model = model_from_polydata(PolyData(points.astype(np.float32), lines.astype(np.int32),
+                                                 radii.astype(np.float32)))
+            view_params = default_view_params()
+            fit_view(view_params, model)
+            selected = int(model.segment_table.ids[len(lines) // 2])
+            # Uma tecla por frame: 1, C, R, clique, 2, C, R, desfaz seleção
+            sequence = [{'shade_model': GL_FLAT}, {'shade_model': GL_FLAT, 'color_by': 'radius'},
+                        {'shade_model': GL_FLAT, 'color_by': 'radius', 'fixed_radius': True},
+                        {'shade_model': GL_FLAT, 'color_by': 'radius', 'fixed_radius': True,
+                         'selected_segment_id': selected},
+                        {'shade_model': GL_SMOOTH, 'color_by': 'radius', 'fixed_radius': True,
+                         'selected_segment_id': selected},
+                        {'color_by': 'depth', 'fixed_radius': True, 'selected_segment_id': selected},
+                        {'selected_segment_id': selected}, {}]
+
+            def frame(renderer, opts):
+                t0 = time.perf_counter()
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                renderer.render(model, view_params, opts)
+                glFinish()
+                return (time.perf_counter() - t0) * 1e3
+
+            toggle = {}
+            steady = {}
+            images = {}
+            for shading in (False, True):
+                renderer = Renderer3D()
+                renderer.resize(width, height)
+                renderer.shading = shading
+                frame(renderer, sequence[-1])
+                after_key, repeated = [], []
+                images[shading] = [None] * len(sequence)
+                for _ in range(args.rounds):
+                    for k, opts in enumerate(sequence):
+                        after_key.append(frame(renderer, opts))
+                        repeated.append(frame(renderer, opts))
+                        images[shading][k] = target.read_rgba()[:, :, :3].astype(np.int16)
+                toggle[shading] = float(np.median(np.subtract(after_key, repeated)))
+                steady[shading] = float(np.median(repeated))
+                if renderer.shading != shading:
+                    print(f"  shaders indisponíveis: {n} terminais medidos só com cores na CPU")
+            # Com raio fixo o batch do shader mantém as faixas de espessura: a ordem de desenho muda e
+            # ramos sobrepostos na mesma profundidade podem trocar de cor em alguns pixels
+            diffs = [np.abs(a - b).max(axis=2) for a, b in zip(images[False], images[True])]
+            max_diff = max(int(d.max()) for d in diffs)
+            changed = max(int((d > 2).sum()) for d in diffs)
+            print(f"{n:>10d} {len(lines):>8d} {toggle[False]:>15.2f} {toggle[True]:>18.2f} "
+                  f"{steady[False]:>15.2f} {steady[True]:>18.2f} {max_diff:>17d} {changed:>11d}")
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Carregamento incremental (src/step_delta.py) vs carregamento completo (load_vtk_3d) do step seguinte.
+1) Todos os pares consecutivos dos datasets TP2_3D: confere o delta contra a recarga completa.
+2) Crescimento sintético: árvore com N ramos -> N·(1 + --growth) ramos, com as lines embaralhadas
+   (como o gerador CCO faz entre steps); mede os dois caminhos e confere o resultado.
+
+Uso:
+    python benchmarks/bench_step_delta.py [--sizes 100000 1000000] [--growth 0.01]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.dataset_utils import list_step_files
+from src.vtk_loader_3d import load_vtk_3d
+from src.step_delta import load_vtk_3d_delta, verify_step_delta
+from benchmarks.synthetic import synthetic_tree, write_vtk
+
+DATA_3D = os.path.join(project_root, "TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados", "TP2_3D")
+
+
+def check_datasets():
+    for data_dir in sorted(glob.glob(os.path.join(DATA_3D, "Nterm_*"))):
+        files = [path for _, path in list_step_files(data_dir)]
+        previous = load_vtk_3d(files[0], use_cache=False)
+        ok = 0
+        for filepath in files[1:]:
+            model, delta = load_vtk_3d_delta(filepath, previous, use_cache=False)
+            mismatches = verify_step_delta(model, filepath) if delta is not None else ["<sem delta>"]
+            if mismatches:
+                print(f"  {os.path.basename(filepath)}: DIFERENTE {mismatches}")
+            else:
+                ok += 1
+            previous = model
+        print(f"{os.path.basename(data_dir)}: {ok}/{len(files) - 1} steps idênticos à recarga completa")
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def bench_growth(n_segments, growth, tmp):
+    points, lines, radii = synthetic_tree(int(n_segments * (1 + growth)))
+    rng = np.random.default_rng(1)
+    # Step anterior: os primeiros n_segments nós (pai < filho, então o prefixo é uma árvore)
+    old_path = os.path.join(tmp, "old.vtk")
+    new_path = os.path.join(tmp, "new.vtk")
+    write_vtk(old_path, points[:n_segments + 1], lines[:n_segments], radii[:n_segments], binary=True)
+    perm = rng.permutation(len(lines))
+    write_vtk(new_path, points, lines[perm], radii[perm], binary=True)
+
+    previous = load_vtk_3d(old_path, use_cache=False)
+    t_full, _ = _timed(load_vtk_3d, new_path, False)
+    t_delta, (model, delta) = _timed(load_vtk_3d_delta, new_path, previous, False)
+    mismatches = verify_step_delta(model, new_path)
+    print(f"{n_segments:>10d} {delta.added:>9d} {t_full * 1e3:>12.1f} {t_delta * 1e3:>12.1f} "
+          f"{t_full / max(t_delta, 1e-9):>7.1f}x  {'ok' if not mismatches else mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[100_000, 1_000_000])
+    parser.add_argument('--growth', type=float, default=0.01, help="fração de ramos acrescentados")
+    args = parser.parse_args()
+
+    if os.path.isdir(DATA_3D):
+        check_datasets()
+    print(f"{'ramos':>10s} {'novos':>9s} {'completo (ms)':>12s} {'delta (ms)':>12s} {'ganho':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            bench_growth(n, args.growth, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Índice da timeline (src/timeline.py) vs leitura de um arquivo por step.
+1) Datasets TP1_2D/TP2_3D: monta o índice e confere cada step contra o loader do arquivo.
+2) Sequência sintética: --steps arquivos ASCII (como os datasets) de uma árvore crescendo até N
+   ramos, com as lines embaralhadas a cada step (como o gerador CCO). Mede: ler todos os steps
+   dos .vtk, montar o índice (processos em paralelo), reabrir o índice salvo e remontar todos os
+   steps da memória.
+
+Uso:
+    python benchmarks/bench_timeline.py [--sizes 100000 1000000] [--steps 8] [--workers N]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.dataset_utils import list_step_files
+from src.vtk_cache import load_polydata
+from src.timeline import build_timeline, load_timeline, TIMELINE_FILENAME
+from benchmarks.synthetic import synthetic_tree, write_vtk
+
+DATA_ROOT = os.path.join(project_root, "TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados")
+
+
+def _same(a, b) -> bool:
+    return (np.array_equal(np.asarray(a.points), np.asarray(b.points)) and
+            np.array_equal(np.asarray(a.lines), np.asarray(b.lines)) and
+            np.array_equal(np.asarray(a.cell_scalars), np.asarray(b.cell_scalars)))
+
+
+def check_datasets(workers):
+    for data_dir in sorted(glob.glob(os.path.join(DATA_ROOT, "TP*", "Nterm_*"))):
+        timeline = build_timeline(data_dir, workers)
+        files = [path for _, path in list_step_files(data_dir)]
+        ok = sum(_same(timeline.polydata(k), load_polydata(path, use_cache=False)) for k, path in enumerate(files))
+        name = os.path.join(os.path.basename(os.path.dirname(data_dir)), os.path.basename(data_dir))
+        print(f"{name}: {ok}/{len(files)} steps idênticos ao arquivo, {len(timeline.edges)} ramos distintos, "
+              f"{timeline.nbytes() / 1024:.0f} KiB")
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def bench_sequence(n_segments, n_steps, workers, tmp):
+    points, lines, radii = synthetic_tree(n_segments)
+    rng = np.random.default_rng(1)
+    data_dir = os.path.join(tmp, f"Nterm_{n_segments}")
+    os.makedirs(data_dir)
+    for s in range(1, n_steps + 1):
+        n = n_segments * s // n_steps
+        perm = rng.permutation(n)
+        scale = 1.0 + 0.01 * s  # raios a montante mudam a cada step
+        write_vtk(os.path.join(data_dir, f"tree3D_Nterm{n_segments}_step{s:04d}.vtk"),
+                  points[:n + 1], lines[:n][perm], radii[:n][perm] * scale)
+    files = [path for _, path in list_step_files(data_dir)]
+
+    t_files, _ = _timed(lambda: [load_polydata(path, use_cache=False) for path in files])
+    t_build, timeline = _timed(load_timeline, data_dir, True, workers)
+    t_open, timeline = _timed(load_timeline, data_dir)
+    t_steps, steps = _timed(lambda: [timeline.polydata(k) for k in range(len(timeline))])
+    ok = all(_same(steps[k], load_polydata(path, use_cache=False)) for k, path in enumerate(files))
+    size = os.path.getsize(os.path.join(data_dir, TIMELINE_FILENAME)) / 2**20
+    print(f"{n_segments:>10d} {t_files * 1e3:>12.1f} {t_build * 1e3:>11.1f} {t_open * 1e3:>10.1f} "
+          f"{t_steps * 1e3:>10.2f} {size:>9.1f}  {'ok' if ok else 'DIFERENTE'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[100_000, 1_000_000])
+    parser.add_argument('--steps', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None, help="processos na montagem (padrão: nº de CPUs)")
+    args = parser.parse_args()
+
+    if os.path.isdir(DATA_ROOT):
+        check_datasets(args.workers)
+    print(f"{'ramos':>10s} {'arquivos (ms)':>12s} {'índice (ms)':>11s} {'abrir (ms)':>10s} "
+          f"{'steps (ms)':>10s} {'npz (MiB)':>9s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            bench_sequence(n, args.steps, args.workers, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Transparência do Renderer3D (tecla T): tempo de frame de cada caminho.
+- legado: modo imediato com distância (np.linalg.norm) e sort em Python por ramo, a cada frame
+- imediato + ordem em cache: mesmo desenho glBegin/glEnd, ordem vetorizada refeita só se o olho anda
+- sorted: VBOs desenhados de trás para frente (glDrawElements por trecho de mesma espessura)
+- oit: Weighted Blended OIT, sem ordenação (src/oit.py)
+A câmera gira um pouco a cada frame (órbita lenta, como arrastando o mouse), então a ordem em
+cache é refeita de tempos em tempos. Confere também que um frame opaco depois dos frames OIT é
+igual ao de antes (o OIT não pode deixar estado GL ligado). Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_transparency.py [--terminals 512 10000 100000] [--frames 20] [--png saida/]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def legacy_transparent(renderer, model, view_params, opts):
+    """Caminho transparente antigo do Renderer3D.render (referência de tempo)."""
+    from OpenGL.GL import (glEnable, glDisable, glDepthFunc, glShadeModel, glBlendFunc, glHint, glLineWidth,
+                           glBegin, glEnd, glColor4f, glVertex3f, GL_DEPTH_TEST, GL_LEQUAL, GL_BLEND,
+                           GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_LINE_SMOOTH, GL_LINE_SMOOTH_HINT,
+                           GL_NICEST, GL_LINES, GL_SMOOTH)
+    shade_model = opts.get('shade_model', GL_SMOOTH)
+    eye_x, eye_y, eye_z = renderer.setup_camera(view_params)
+    glEnable(GL_DEPTH_TEST)
+    glDepthFunc(GL_LEQUAL)
+    glShadeModel(shade_model)
+    segments = model.segment_list
+    radii = [(s.r0 + s.r1) / 2.0 for s in segments]
+    radius_min, radius_max = min(radii), max(radii)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glEnable(GL_LINE_SMOOTH)
+    glHint(GL_LINE_SMOOTH_HINT, GL_NICEST)
+    cam_pos = np.array([eye_x, eye_y, eye_z])
+    segs_with_dist = []
+    for seg in segments:
+        mid = (seg.p0 + seg.p1) / 2.0
+        dist = np.linalg.norm(mid - cam_pos)
+        segs_with_dist.append((seg, dist))
+    segs_with_dist.sort(key=lambda x: -x[1])
+    for seg, _ in segs_with_dist:
+        glLineWidth(max(1.0, max(seg.r0, seg.r1, 0.002) * 80.0))
+        c0, c1 = renderer._segment_colors(seg, shade_model, 'depth', model.max_depth, radius_min, radius_max, -1)
+        glBegin(GL_LINES)
+        glColor4f(c0[0], c0[1], c0[2], 0.7)
+        glVertex3f(*seg.p0)
+        glColor4f(c1[0], c1[1], c1[2], 0.7)
+        glVertex3f(*seg.p1)
+        glEnd()
+    glDisable(GL_BLEND)
+    glDisable(GL_LINE_SMOOTH)
+    glLineWidth(1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[512, 10_000, 100_000])
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--size', default='800x600')
+    parser.add_argument('--png', default=None, help="grava o último frame de cada caminho neste diretório")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.frame_writer import encode_png
+    from src.renderer3d import Renderer3D
+    from src.app3d import default_view_params, fit_view
+    from benchmarks.synthetic import cco_tree
+    from src.vtk_parser import PolyData
+    from src.vtk_loader_3d import model_from_polydata
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    print(f"{'terminais':>10s} {'ramos':>8s} {'legado (ms)':>12s} {'imediato+cache':>15s} "
+          f"{'sorted (ms)':>12s} {'oit (ms)':>10s} {'reordenações':>13s} {'opaco igual':>12s}")
+    try:
+        for n in args.terminals:
+            points, lines, radii = cco_tree(n, dim=3)
+            model = model_from_polydata(PolyData(points.astype(np.float32), lines.astype(np.int32),
+                                                 radii.astype(np.float32)))
+            view_params = default_view_params()
+            fit_view(view_params, model)
+            opts = {'transparency': True}
+            renderer = Renderer3D()
+            renderer.resize(width, height)
+
+            def run(draw, frames):
+                view_params['yaw'] = 45.0
+                sorts = 0
+                t0 = time.perf_counter()
+                for _ in range(frames):
+                    view_params['yaw'] += 0.5
+                    cache = renderer._sort_cache
+                    glClearColor(0.08, 0.08, 0.12, 1.0)
+                    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                    draw()
+                    glFinish()
+                    sorts += renderer._sort_cache is not cache
+                return (time.perf_counter() - t0) * 1e3 / frames, sorts
+
+            def snapshot(name):
+                if args.png:
+                    os.makedirs(args.png, exist_ok=True)
+                    rgb = np.ascontiguousarray(target.read_rgba()[::-1, :, :3])
+                    with open(os.path.join(args.png, f"{name}_{n}.png"), 'wb') as f:
+                        f.write(encode_png(rgb))
+
+            def opaque():
+                view_params['yaw'] = 45.0
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                renderer.render(model, view_params, {})
+                glFinish()
+                return target.read_rgba().copy()
+
+            # Poucos frames no modo imediato com muitos ramos (segundos por frame)
+            slow_frames = max(2, min(args.frames, 2_000_000 // max(len(lines), 1)))
+            t_legacy, _ = run(lambda: legacy_transparent(renderer, model, view_params, opts), slow_frames)
+            snapshot('legado')
+            renderer.retained = False
+            t_immediate, _ = run(lambda: renderer.render(model, view_params, opts), slow_frames)
+            renderer.retained = True
+            renderer.transparency_mode = 'sorted'
+            renderer.render(model, view_params, opts)   # VBOs enviados fora da medição
+            t_sorted, sorts = run(lambda: renderer.render(model, view_params, opts), args.frames)
+            snapshot('sorted')
+            opaque_before = opaque()
+            renderer.transparency_mode = 'oit'
+            renderer.render(model, view_params, opts)
+            t_oit, _ = run(lambda: renderer.render(model, view_params, opts), args.frames)
+            snapshot('oit')
+            same = 'sim' if np.array_equal(opaque(), opaque_before) else 'não'
+            print(f"{n:>10d} {len(lines):>8d} {t_legacy:>12.1f} {t_immediate:>15.1f} {t_sorted:>12.2f} "
+                  f"{t_oit:>10.2f} {sorts:>6d}/{args.frames:<6d} {same:>12s}  (modo final: {renderer.transparency_mode})")
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark de escala: construção da árvore (Model3D.build_segment_list) de 1k a 1M segmentos.
+Compara com a construção antiga (dicts + busca aninhada, O(N²)) até --legacy-max segmentos.
+
+Uso:
+    python benchmarks/bench_tree_build.py [--sizes 1000 10000 100000 1000000] [--legacy-max 10000]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model3d import Model3D
+from benchmarks.synthetic import synthetic_tree
+
+
+def legacy_build(segments):
+    """Construção antiga (parent_of/children_of em dicts, filas com pop(0), depth com next(...)), como referência."""
+    children_of = {}
+    all_children = set()
+    for i0, i1 in segments:
+        all_children.add(i1)
+        children_of.setdefault(i0, []).append(i1)
+    root = next(i0 for i0, _ in segments if i0 not in all_children)
+
+    seg_by_endpoints = {(i0, i1): sid for sid, (i0, i1) in enumerate(segments)}
+    order = []
+    queue = [root]
+    while queue:
+        node = queue.pop(0)
+        for child in children_of.get(node, []):
+            order.append((seg_by_endpoints[(node, child)], node, child))
+            queue.append(child)
+
+    depth_map = {}
+    queue = [(root, 0)]
+    while queue:
+        node, d = queue.pop(0)
+        for child in children_of.get(node, []):
+            seg_id = next((sid for sid, i0, i1 in order if i0 == node and i1 == child), -1)
+            depth_map[seg_id] = d
+            queue.append((child, d + 1))
+    return order, depth_map
+
+
+def make_model(n_segments):
+    points, lines, radii = synthetic_tree(n_segments)
+    model = Model3D()
+    model.points = points.astype(np.float32)
+    model.segments = lines.astype(np.int32)
+    model.radius_point = np.full(len(points), 0.01)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=10_000,
+                        help="maior tamanho medido com a construção antiga (quadrática)")
+    args = parser.parse_args()
+
+    print(f"{'segmentos':>10s} {'topologia (ms)':>15s} {'segment_list (ms)':>18s} "
+          f"{'us/seg':>8s} {'antigo (ms)':>12s}")
+    for n in args.sizes:
+        model = make_model(n)
+        t0 = time.perf_counter()
+        assert model._build_tree_structure()
+        t_topo = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        model.build_segment_list()
+        t_full = time.perf_counter() - t0
+
+        legacy = "-"
+        if n <= args.legacy_max:
+            segments = [tuple(s) for s in model.segments.tolist()]
+            t0 = time.perf_counter()
+            order, depth_map = legacy_build(segments)
+            legacy = f"{(time.perf_counter() - t0) * 1e3:.1f}"
+            assert [sid for sid, _, _ in order] == model.bfs_order.tolist()
+            assert all(depth_map[s.id] == s.depth for s in model.segment_list)
+
+        print(f"{n:>10d} {t_topo * 1e3:>15.1f} {t_full * 1e3:>18.1f} {t_full / n * 1e6:>8.2f} {legacy:>12s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Ramos como linhas vs tubos instanciados (Renderer3D.tubes): tempo de frame com a árvore
+enquadrada (fit_view) e com zoom de 4×, quantos ramos caem em cada nível de detalhe
+(16/8/4 lados, ou linha de 1 px) e quanto custa reclassificar os níveis quando a câmera anda.
+Precisa de OpenGL: usa EGL sem display.
+
+Uso:
+    python benchmarks/bench_tubes.py [--terminals 512 10000 100000] [--frames 5]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.main_headless import configure_platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[512, 10_000, 100_000])
+    parser.add_argument('--frames', type=int, default=5, help="frames medidos por configuração (mediana)")
+    parser.add_argument('--size', default='800x600')
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+
+    backend = configure_platform('auto')
+    from OpenGL.GL import glClear, glClearColor, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+    from src.headless import create_context
+    from src.framebuffer import Framebuffer
+    from src.renderer3d import Renderer3D
+    from src.vtk_parser import PolyData
+    from src.vtk_loader_3d import model_from_polydata
+    from src.app3d import default_view_params, fit_view
+    from benchmarks.synthetic import cco_tree
+
+    context = create_context(backend)
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    print(f"{'terminais':>10s} {'ramos':>8s} {'zoom':>5s} {'linhas (ms)':>12s} {'tubos (ms)':>11s} "
+          f"{'16 lados':>9s} {'8 lados':>8s} {'4 lados':>8s} {'linha':>8s} {'níveis (ms)':>12s}")
+    try:
+        for n in args.terminals:
+            points, lines, radii = cco_tree(n, dim=3)
+            model = model_from_polydata(PolyData(points.astype(np.float32), lines.astype(np.int32),
+                                                 radii.astype(np.float32)))
+            view_params = default_view_params()
+            fit_view(view_params, model)
+            fitted = view_params['distance']
+
+            def frame(renderer):
+                t0 = time.perf_counter()
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                renderer.render(model, view_params, {})
+                glFinish()
+                return (time.perf_counter() - t0) * 1e3
+
+            renderers = {}
+            for tubes in (False, True):
+                renderer = renderers[tubes] = Renderer3D()
+                renderer.resize(width, height)
+                renderer.tubes = tubes
+            for zoom in (1, 4):
+                view_params['distance'] = fitted / zoom
+                times = {}
+                for tubes, renderer in renderers.items():
+                    frame(renderer)
+                    times[tubes] = float(np.median([frame(renderer) for _ in range(args.frames)]))
+                if not renderers[True].tubes:
+                    print(f"  tubos indisponíveis: {n} terminais medidos só com linhas")
+                    break
+                lod = renderers[True]._tubes
+                levels = [len(rows) for rows in lod.level_rows] + [len(lod.line_rows)]
+                # Reclassificação forçada (como depois de a câmera andar além de lod_threshold)
+                eye = lod._lod_key[1]
+                samples = []
+                for _ in range(args.frames):
+                    lod._lod_key = None
+                    t0 = time.perf_counter()
+                    lod.update(model, eye, renderers[True]._focal_pixels(), False)
+                    samples.append((time.perf_counter() - t0) * 1e3)
+                print(f"{n:>10d} {len(lines):>8d} {zoom:>4d}× {times[False]:>12.2f} {times[True]:>11.2f} "
+                      f"{levels[0]:>9d} {levels[1]:>8d} {levels[2]:>8d} {levels[3]:>8d} "
+                      f"{float(np.median(samples)):>12.2f}")
+    finally:
+        target.unbind()
+        target.release()
+        context.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: parser vetorizado (src/vtk_parser.py) e em streaming (src/vtk_stream.py) vs parser
+antigo linha a linha. Mede os arquivos do Nterm_512 e arquivos sintéticos com milhões de
+segmentos; pico de memória (tracemalloc) do parser em memória e do streaming.
+
+Uso:
+    python benchmarks/bench_vtk_parser.py [--sizes 1000000 2000000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.vtk_parser import parse_vtk_polydata
+from src.vtk_stream import parse_vtk_stream
+from benchmarks.synthetic import write_synthetic_vtk
+
+DATA_512 = os.path.join(project_root, "TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados", "TP2_3D", "Nterm_512")
+
+
+def legacy_parse(filepath):
+    """Parser antigo de load_vtk/load_vtk_3d (readlines + split/float por linha), como referência."""
+    with open(filepath, 'r') as f:
+        lines = [l.strip() for l in f.readlines()]
+    iterator = iter(lines)
+    pts, segments, radii = [], [], []
+    try:
+        while True:
+            line = next(iterator)
+            if line.upper().startswith("POINTS"):
+                num_points = int(line.split()[1])
+                for _ in range(num_points):
+                    p_line = next(iterator).split()
+                    pts.append([float(p_line[0]), float(p_line[1]), float(p_line[2])])
+            elif line.upper().startswith("LINES"):
+                num_lines = int(line.split()[1])
+                for _ in range(num_lines):
+                    l_line = next(iterator).split()
+                    if l_line[0] == '2':
+                        segments.append((int(l_line[1]), int(l_line[2])))
+            elif line.upper().startswith("SCALARS"):
+                next(iterator)
+                for _ in range(len(segments)):
+                    radii.append(float(next(iterator)))
+    except StopIteration:
+        pass
+    return np.array(pts), np.array(segments), np.array(radii)
+
+
+def _best_of(fn, filepath, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(filepath)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _peak_mb(fn, filepath):
+    tracemalloc.start()
+    try:
+        fn(filepath)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_file(filepath, repeat):
+    t_old, (pts, segs, radii) = _best_of(legacy_parse, filepath, repeat)
+    t_new, data = _best_of(parse_vtk_polydata, filepath, repeat)
+    t_stream, streamed = _best_of(parse_vtk_stream, filepath, repeat)
+    same = (np.allclose(pts, data.points, atol=1e-6)
+            and np.array_equal(segs, data.lines)
+            and np.allclose(radii, data.cell_scalars, rtol=1e-6)
+            and all(np.array_equal(getattr(data, k), getattr(streamed, k)) for k in ('points', 'lines', 'cell_scalars')))
+    arrays = (data.points.nbytes + data.lines.nbytes + data.cell_scalars.nbytes) / 2 ** 20
+    name = os.path.basename(filepath)
+    print(f"{name:40s} {len(segs):>10d} {t_old * 1e3:>12.1f} {t_new * 1e3:>12.1f} "
+          f"{t_old / max(t_new, 1e-9):>8.1f}x {t_stream * 1e3:>12.1f} {arrays:>11.1f} "
+          f"{_peak_mb(parse_vtk_polydata, filepath):>13.1f} {_peak_mb(parse_vtk_stream, filepath):>13.1f}  "
+          f"{'ok' if same else 'DIFERENTE'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1_000_000, 2_000_000],
+                        help="tamanhos (segmentos) dos arquivos sintéticos")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'arquivo':40s} {'segmentos':>10s} {'antigo (ms)':>12s} {'novo (ms)':>12s} {'ganho':>9s} "
+          f"{'stream (ms)':>12s} {'arrays (MB)':>11s} {'pico mem (MB)':>13s} {'pico str (MB)':>13s}")
+    if os.path.isdir(DATA_512):
+        for filename in sorted(os.listdir(DATA_512)):
+            if filename.endswith(".vtk"):
+                bench_file(os.path.join(DATA_512, filename), args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"synthetic_{n}.vtk")
+            write_synthetic_vtk(path, n)
+            bench_file(path, 1 if n >= 1_000_000 else args.repeat)
+
+
+if __name__ == "__main__":
+    main()
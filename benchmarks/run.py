@@ -0,0 +1,274 @@
+"""
+Suíte de benchmarks reprodutível - TP1/TP2
+Gera árvores CCO sintéticas (benchmarks/synthetic.py, 2D e 3D, semente fixa) nos tamanhos pedidos
+e mede, para cada tamanho:
+- load_vtk / load_vtk_3d: parsing + modelo a partir do .vtk ASCII, sem o cache .vtk.cache
+- build_segment_list: topologia CSR + BFS + SegmentTable de um modelo 3D já carregado
+- bvh_build / pick_ray: BVH de cápsulas e um ray cast por raio (raios de fora da árvore
+  apontando para ramos aleatórios; não depende de OpenGL)
+- pick_segment, render_first / render_frame: só com contexto OpenGL (EGL sem display, ou GLFW
+  invisível); picking pelo mouse com a câmera do App3D e frames desenhados num FBO (o primeiro
+  inclui montar e enviar os VBOs). Sem contexto, essas etapas entram em "skipped" com o motivo.
+
+O resultado vai para JSON (metadados: commit, Python/NumPy, plataforma, renderer GL) para
+comparar execuções entre commits com --compare.
+
+Uso:
+    python -m benchmarks.run [--terminals 1000 10000 100000] [--repeat 3] [--out bench.json]
+    python -m benchmarks.run --terminals 1000000 --backend none      # sem etapas GL
+    python -m benchmarks.run --compare antes.json depois.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.synthetic import write_cco_vtk
+
+# Etapas que precisam de contexto OpenGL
+GL_STAGES = ('pick_segment', 'render_first', 'render_frame')
+
+
+def _timed(fn, repeat: int):
+    """Executa fn repeat vezes; retorna (tempos em ms, último resultado)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1e3)
+    return times, result
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=project_root,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return commit + ('-dirty' if dirty else '') if commit else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Suite:
+    def __init__(self, repeat: int, picks: int, frames: int, width: int, height: int):
+        self.repeat = repeat
+        self.picks = picks
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.results = []
+        self.skipped = []
+        self.gl = None          # (contexto, Framebuffer) quando há OpenGL
+
+    def record(self, stage, dim, terminals, times, per=1, **extra):
+        """Guarda uma etapa; per = nº de operações por medição (tempos viram ms por operação)."""
+        times = [t / per for t in times]
+        entry = {'stage': stage, 'dim': dim, 'terminals': terminals, 'segments': 2 * terminals - 1,
+                 'times_ms': [round(t, 4) for t in times], 'median_ms': round(float(np.median(times)), 4),
+                 'min_ms': round(min(times), 4)}
+        entry.update(extra)
+        self.results.append(entry)
+        print(f"  {stage:<20s} {dim}D {terminals:>9d}  mediana {entry['median_ms']:>10.3f} ms  "
+              f"mín {entry['min_ms']:>10.3f} ms")
+
+    def skip(self, stage, reason):
+        if not any(s['stage'] == stage for s in self.skipped):
+            self.skipped.append({'stage': stage, 'reason': reason})
+            print(f"  {stage}: ignorado ({reason})")
+
+    def open_gl(self, backend: str):
+        if backend == 'none':
+            for stage in GL_STAGES:
+                self.skip(stage, "--backend none")
+            return None
+        try:
+            from src.headless import create_context
+            from src.framebuffer import Framebuffer
+            from OpenGL.GL import glGetString, GL_RENDERER
+            context = create_context(backend)
+            target = Framebuffer()
+            target.ensure(self.width, self.height)
+            target.bind()
+            self.gl = (context, target)
+            return glGetString(GL_RENDERER).decode()
+        except Exception as e:
+            for stage in GL_STAGES:
+                self.skip(stage, f"sem contexto OpenGL: {e}")
+            return None
+
+    def close_gl(self):
+        if self.gl is not None:
+            context, target = self.gl
+            target.unbind()
+            target.release()
+            context.release()
+            self.gl = None
+
+    def bench_2d(self, filepath, n):
+        from src.vtk_loader import load_vtk
+        times, model = _timed(lambda: load_vtk(filepath, use_cache=False), self.repeat)
+        self.record('load_vtk', 2, n, times)
+        if self.gl is not None:
+            from src.renderer import Renderer
+            from src.app import default_view_params
+            self._bench_render(Renderer(), model, default_view_params(), None, 2, n)
+
+    def bench_3d(self, filepath, n):
+        from src.vtk_loader_3d import load_vtk_3d
+        from src.bvh import CapsuleBVH
+        from src.picking import get_bvh, pick_ray, _pick_radius
+        times, model = _timed(lambda: load_vtk_3d(filepath, use_cache=False), self.repeat)
+        self.record('load_vtk_3d', 3, n, times)
+        times, _ = _timed(model.build_segment_list, self.repeat)
+        self.record('build_segment_list', 3, n, times)
+
+        table = model.segment_table
+        times, _ = _timed(lambda: CapsuleBVH(table.p0, table.p1, _pick_radius(table)), self.repeat)
+        self.record('bvh_build', 3, n, times)
+        get_bvh(model)
+
+        # Raios de fora da caixa envolvente em direção ao meio de ramos aleatórios
+        rng = np.random.default_rng(0)
+        rows = rng.integers(0, len(table), self.picks)
+        mid = (table.p0[rows].astype(np.float64) + table.p1[rows]) / 2.0
+        extent = float(np.linalg.norm(np.subtract(model.bounds[1::2], model.bounds[0::2])))
+        dirs = rng.normal(size=(self.picks, 3))
+        dirs /= np.linalg.norm(dirs, axis=1, keepdims=True)
+        origins = mid - dirs * 2.0 * extent
+        times, _ = _timed(lambda: [pick_ray(model, o, d) for o, d in zip(origins, dirs)], self.repeat)
+        self.record('pick_ray', 3, n, times, per=self.picks, picks=self.picks)
+
+        if self.gl is not None:
+            from src.renderer3d import Renderer3D
+            from src.app3d import default_view_params, fit_view
+            view_params = default_view_params()
+            fit_view(view_params, model)
+            self._bench_render(Renderer3D(), model, view_params, {}, 3, n)
+
+    def _bench_render(self, renderer, model, view_params, options, dim, n):
+        from OpenGL.GL import glClear, glFinish, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+        renderer.resize(self.width, self.height)
+
+        def frame():
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            if options is None:
+                renderer.render(model, view_params)
+            else:
+                renderer.render(model, view_params, options)
+            glFinish()
+
+        first, _ = _timed(frame, 1)
+        self.record('render_first', dim, n, first, retained=renderer.retained)
+        times, _ = _timed(lambda: [frame() for _ in range(self.frames)], self.repeat)
+        self.record('render_frame', dim, n, times, per=self.frames, frames=self.frames, retained=renderer.retained)
+
+        if dim == 3:
+            from src.picking import pick_segment
+            renderer.setup_camera(view_params)
+            rng = np.random.default_rng(1)
+            xs = rng.uniform(0, self.width, self.picks)
+            ys = rng.uniform(0, self.height, self.picks)
+            times, _ = _timed(lambda: [pick_segment(model, x, y, self.height) for x, y in zip(xs, ys)], self.repeat)
+            self.record('pick_segment', 3, n, times, per=self.picks, picks=self.picks)
+
+
+def compare(old_path: str, new_path: str):
+    """Tabela mediana antiga × nova por (etapa, dim, terminais)."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    old_by_key = {(r['stage'], r['dim'], r['terminals']): r for r in old['results']}
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    print(f"{'etapa':<20s} {'dim':>3s} {'terminais':>10s} {'antes (ms)':>12s} {'depois (ms)':>12s} {'razão':>7s}")
+    for r in new['results']:
+        o = old_by_key.get((r['stage'], r['dim'], r['terminals']))
+        if o is None:
+            continue
+        ratio = r['median_ms'] / o['median_ms'] if o['median_ms'] > 0 else float('nan')
+        print(f"{r['stage']:<20s} {r['dim']:>3d} {r['terminals']:>10d} {o['median_ms']:>12.3f} "
+              f"{r['median_ms']:>12.3f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terminals', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="tamanhos (terminais; a árvore tem 2N-1 ramos)")
+    parser.add_argument('--dims', type=int, nargs='+', choices=[2, 3], default=[2, 3])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--picks', type=int, default=200, help="picks por medição")
+    parser.add_argument('--frames', type=int, default=10, help="frames por medição de render_frame")
+    parser.add_argument('--size', default='800x600', help="LARGURAxALTURA do FBO")
+    parser.add_argument('--backend', choices=['auto', 'glfw', 'egl', 'none'], default='auto')
+    parser.add_argument('--data-dir', default=None, help="onde gravar/reaproveitar os .vtk (padrão: temporário)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help="arquivo JSON (padrão: bench_<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('ANTES', 'DEPOIS'), help="compara dois JSON e sai")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    try:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+    except ValueError:
+        parser.error(f"--size inválido: {args.size}")
+
+    if args.backend != 'none':
+        # O backend do PyOpenGL é fixado no primeiro import de OpenGL
+        from src.main_headless import configure_platform
+        backend = configure_platform(args.backend)
+    else:
+        backend = 'none'
+
+    suite = Suite(args.repeat, args.picks, args.frames, width, height)
+    gl_renderer = suite.open_gl(backend)
+    commit = _git_commit()
+    meta = {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'gl_backend': backend if gl_renderer else None, 'gl_renderer': gl_renderer,
+            'seed': args.seed, 'repeat': args.repeat, 'size': [width, height]}
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    try:
+        for n in args.terminals:
+            for dim in args.dims:
+                name = f"tree{dim}D_Nterm{n:04d}_step{n:04d}.vtk"
+                filepath = os.path.join(data_dir, f"seed{args.seed}", name)
+                if not os.path.exists(filepath):
+                    t0 = time.perf_counter()
+                    write_cco_vtk(os.path.dirname(filepath), n, dim, args.seed)
+                    print(f"{name}: gerado em {time.perf_counter() - t0:.1f} s")
+                if dim == 2:
+                    suite.bench_2d(filepath, n)
+                else:
+                    suite.bench_3d(filepath, n)
+    finally:
+        suite.close_gl()
+        if tmp is not None:
+            tmp.cleanup()
+
+    out = args.out or f"bench_{commit or 'local'}.json"
+    with open(out, 'w') as f:
+        json.dump({'meta': meta, 'results': suite.results, 'skipped': suite.skipped}, f, indent=1)
+    print(f"Resultados: {out}")
+
+
+if __name__ == "__main__":
+    main()
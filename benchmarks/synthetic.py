@@ -0,0 +1,180 @@
+"""
+Gerador de árvores sintéticas em VTK legado ASCII (mesmo layout dos arquivos do pacote de dados).
+Serve para medir o desempenho com tamanhos bem maiores que os datasets fornecidos.
+
+- synthetic_tree: árvore recursiva aleatória (cada nó novo pendurado num nó anterior qualquer)
+- cco_tree: árvore binária como as do gerador CCO: raiz na borda do domínio, só bifurcações,
+  2·Nterm - 1 ramos, comprimentos que encolhem com o volume atendido por cada subárvore e raios
+  pela lei de Murray (r^γ do pai = soma dos r^γ dos filhos, fluxo igual em todos os terminais)
+
+Uso direto (escreve um arquivo com o nome no formato dos datasets):
+    python -m benchmarks.synthetic saida/ --terminals 500000 --dim 2 [--binary]
+"""
+import os
+import argparse
+import numpy as np
+
+
+def synthetic_tree(n_segments: int, dim: int = 3, seed: int = 0):
+    """
+    Gera uma árvore aleatória com n_segments segmentos.
+    Nó 0 é a raiz (um único filho, como nos arquivos CCO); cada nó i >= 2 é filho de um nó anterior.
+    Retorna (points (n+1)×3, lines n×2, radii n).
+    """
+    rng = np.random.default_rng(seed)
+    n_points = n_segments + 1
+    parent = np.zeros(n_points, dtype=np.int64)
+    if n_points > 2:
+        parent[2:] = 1 + (rng.random(n_points - 2) * np.arange(1, n_points - 1)).astype(np.int64)
+
+    # Posição = soma dos deslocamentos ao longo do caminho até a raiz.
+    # Um nível de ancestral por iteração; árvores recursivas aleatórias têm profundidade O(log n).
+    step = rng.normal(scale=0.01, size=(n_points, 3))
+    if dim == 2:
+        step[:, 2] = 0.0
+    step[0] = 0.0
+    pos = step.copy()
+    depth = (np.arange(n_points) > 0).astype(np.int64)
+    anc = parent.copy()
+    while np.any(anc > 0):
+        pos += np.where((anc > 0)[:, None], step[anc], 0.0)
+        depth += anc > 0
+        anc = parent[anc]
+
+    lines = np.column_stack([parent[1:], np.arange(1, n_points)])
+    radii = 0.02 * 0.9 ** depth[1:]
+    return pos, lines, radii
+
+
+def _split_leaves(k: np.ndarray, rng) -> np.ndarray:
+    """Terminais do primeiro filho de cada bifurcação com k terminais (1..k-1, assimetria moderada)."""
+    j = np.rint(rng.beta(2.0, 2.0, size=len(k)) * k).astype(np.int64)
+    return np.clip(j, 1, k - 1)
+
+
+def cco_tree(n_terminals: int, dim: int = 3, seed: int = 0, domain_radius: float = None,
+             terminal_radius: float = 0.1, gamma: float = 2.4):
+    """
+    Árvore binária no estilo CCO com n_terminals terminais (2·n_terminals - 1 ramos).
+    Montada por níveis (vetorizada): cada nó interno com k terminais se divide em dois filhos com
+    j e k - j terminais; o comprimento do ramo de um filho é proporcional a (k_filho/N)^(1/dim)
+    do raio do domínio, e o filho menor desvia mais da direção do pai. Raios:
+    terminal_radius · k^(1/γ) (γ = 2.4 reproduz a razão raiz/terminal dos datasets; 3 = Murray clássico).
+    Padrões de domain_radius como nos datasets: 0.05 (2D, disco) e 0.028 (3D, esfera).
+    Retorna (points 2N×3, lines (2N-1)×2, radii 2N-1), ramos em ordem de nível.
+    """
+    rng = np.random.default_rng(seed)
+    n = max(int(n_terminals), 1)
+    if domain_radius is None:
+        domain_radius = 0.05 if dim == 2 else 0.028
+
+    # Raiz (ponto 0) no topo do domínio; primeiro ramo desce até a primeira bifurcação (ponto 1)
+    points = [np.array([[0.0, 0.0, 0.0]]), np.zeros((1, 3))]
+    root = np.array([0.0, domain_radius, 0.0]) if dim == 2 else np.array([0.0, 0.0, domain_radius])
+    down = -root / domain_radius
+    points[0][0] = root
+    points[1][0] = root + down * domain_radius * 0.6
+    lines = [np.array([[0, 1]])]
+    leaves = [np.array([n])]
+
+    # Fronteira: nós internos ainda por dividir (índice, posição, direção de chegada, terminais)
+    idx = np.array([1])
+    pos = points[1].copy()
+    direction = down[None, :].copy()
+    k = np.array([n])
+    next_index = 2
+    while True:
+        internal = k >= 2
+        idx, pos, direction, k = idx[internal], pos[internal], direction[internal], k[internal]
+        if not len(k):
+            break
+        m = len(k)
+        j = _split_leaves(k, rng)
+        child_k = np.concatenate([j, k - j])
+        # Eixo perpendicular à direção do pai: plano da bifurcação
+        if dim == 2:
+            perp = np.column_stack([-direction[:, 1], direction[:, 0], np.zeros(m)])
+        else:
+            perp = np.cross(direction, rng.normal(size=(m, 3)))
+        perp /= np.maximum(np.linalg.norm(perp, axis=1, keepdims=True), 1e-12)
+        frac = child_k / np.concatenate([k, k])
+        angle = np.radians(75.0) * (1.0 - frac) + rng.normal(scale=np.radians(8.0), size=2 * m)
+        side = np.concatenate([np.ones(m), -np.ones(m)])[:, None]
+        parent_dir = np.concatenate([direction, direction])
+        child_dir = np.cos(angle)[:, None] * parent_dir + side * np.sin(angle)[:, None] * np.concatenate([perp, perp])
+        # Perto da borda do domínio, os ramos são puxados para o centro (a árvore preenche o domínio)
+        start = np.concatenate([pos, pos])
+        dist = np.linalg.norm(start, axis=1, keepdims=True)
+        pull = np.clip(dist / domain_radius - 0.6, 0.0, 1.0) * 1.5
+        child_dir -= pull * start / np.maximum(dist, 1e-12)
+        child_dir /= np.maximum(np.linalg.norm(child_dir, axis=1, keepdims=True), 1e-12)
+        length = domain_radius * 0.5 * (child_k / n) ** (1.0 / dim) * rng.lognormal(sigma=0.25, size=2 * m)
+        child_pos = start + child_dir * length[:, None]
+
+        child_idx = next_index + np.arange(2 * m)
+        next_index += 2 * m
+        points.append(child_pos)
+        lines.append(np.column_stack([np.concatenate([idx, idx]), child_idx]))
+        leaves.append(child_k)
+        idx, pos, direction, k = child_idx, child_pos, child_dir, child_k
+
+    points = np.concatenate(points)
+    lines = np.concatenate(lines)
+    radii = terminal_radius * np.concatenate(leaves) ** (1.0 / gamma)
+    if dim == 2:
+        points[:, 2] = 0.0
+    return points, lines, radii
+
+
+def write_vtk(filepath: str, points: np.ndarray, lines: np.ndarray, radii: np.ndarray, binary: bool = False):
+    """Escreve POLYDATA (ASCII ou BINARY big-endian) com POINTS, LINES e CELL_DATA (raio)."""
+    cells = np.column_stack([np.full(len(lines), 2), lines])
+    with open(filepath, 'wb') as f:
+        f.write(b"# vtk DataFile Version 3.0\nvtk output\n")
+        f.write(b"BINARY\n" if binary else b"ASCII\n")
+        f.write(b"DATASET POLYDATA\n")
+        f.write(f"POINTS  {len(points)}  float\n".encode())
+        if binary:
+            f.write(np.asarray(points, dtype='>f4').tobytes() + b"\n")
+        else:
+            np.savetxt(f, points, fmt='%.7f', delimiter='  ')
+        f.write(f"LINES  {len(lines)}  {3 * len(lines)}\n".encode())
+        if binary:
+            f.write(cells.astype('>i4').tobytes() + b"\n")
+        else:
+            np.savetxt(f, cells, fmt='%d', delimiter='  ')
+        f.write(f"CELL_DATA  {len(lines)}\nscalars raio float\nLOOKUP_TABLE default\n".encode())
+        if binary:
+            f.write(np.asarray(radii, dtype='>f4').tobytes() + b"\n")
+        else:
+            np.savetxt(f, radii, fmt='%.7f')
+
+
+def write_synthetic_vtk(filepath: str, n_segments: int, dim: int = 3, seed: int = 0, binary: bool = False):
+    points, lines, radii = synthetic_tree(n_segments, dim=dim, seed=seed)
+    write_vtk(filepath, points, lines, radii, binary=binary)
+
+
+def write_cco_vtk(directory: str, n_terminals: int, dim: int = 3, seed: int = 0, binary: bool = False) -> str:
+    """Escreve a árvore CCO sintética com o nome no formato dos datasets (treeXD_NtermNNNN_stepNNNN.vtk)."""
+    os.makedirs(directory, exist_ok=True)
+    filepath = os.path.join(directory, f"tree{dim}D_Nterm{n_terminals:04d}_step{n_terminals:04d}.vtk")
+    points, lines, radii = cco_tree(n_terminals, dim=dim, seed=seed)
+    write_vtk(filepath, points, lines, radii, binary=binary)
+    return filepath
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out', help="diretório de saída")
+    parser.add_argument('--terminals', type=int, nargs='+', default=[512])
+    parser.add_argument('--dim', type=int, choices=[2, 3], default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--binary', action='store_true', help="VTK BINARY em vez de ASCII")
+    args = parser.parse_args()
+    for n in args.terminals:
+        print(write_cco_vtk(args.out, n, args.dim, args.seed, args.binary))
+
+
+if __name__ == "__main__":
+    main()
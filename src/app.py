@@ -1,10 +1,28 @@
 import glfw
 import os
-from src.vtk_loader import load_vtk
+import time
+from src.vtk_loader import load_vtk, model_from_polydata
 from src.renderer import Renderer
+from src.step_cache import StepCache
+from src.step_loader import StepLoader
+from src.frame_pacer import FramePacer
+from src.growth_animation import GrowthAnimation
+from src.timeline import load_timeline_background
+from src.profiler import PROFILER
+from src.stats_overlay import StatsOverlay
+
+def default_view_params():
+    """Initial 2D view (also used by the headless renderer)."""
+    return {
+        'zoom': 3.0,  # Start zoomed in for better visibility
+        'pan_x': 0.0,
+        'pan_y': 0.0,
+        'rotation': 180.0 # Root at top, growing down
+    }
 
 class App:
-    def __init__(self, data_dir, n_term_str="064", initial_step=8, step_inc=8):
+    def __init__(self, data_dir, n_term_str="064", initial_step=8, step_inc=8, use_timeline=True,
+                 swap_interval=1, fps_cap=None, animation_duration=None, animation_easing='linear'):
         self.window = None
         self.renderer = Renderer()
         
@@ -20,35 +38,52 @@ class App:
         
         self.model = None
         self.needs_update = True
+
+        # Growth timeline index (src/timeline.py): steps are rebuilt from memory instead of
+        # reading one file per step. Built on a background thread (poll_timeline swaps the loader
+        # in); until then, or if disabled or the directory is not one growth sequence, steps are read from file
+        self.timeline = None
+        self._timeline_loader = None
+        self._timeline_future = load_timeline_background(data_dir) if use_timeline else None
+
+        # Step cache: LRU with memory budget + background prefetch of neighbouring steps
+        self.step_cache = StepCache(self._load_step)
+        self.prefetch_radius = 1      # step±1 while browsing
+        self.playback_lookahead = 3   # step±k while the animation is playing
+        # Asynchronous loading: the previous model stays on screen until the new one is in the VBOs
+        self.step_loader = StepLoader(self.step_cache, self.renderer)
         
         # Animation state
         self.animation_playing = False  # Manual control only (use Space to play)
-        self.animation_speed = 2.0  # Segments per second
-        self.animation_timer = 0.0
-        self.last_frame_time = None
+        # Time-based growth: 2 segments/sec by default, or the whole tree in animation_duration seconds
+        self.animation = GrowthAnimation(speed=2.0, duration=animation_duration, easing=animation_easing)
+
+        # Frame pacing: redraw only when something changed; swap_interval 1 = vsync, 0 = off; optional FPS cap
+        self.swap_interval = swap_interval
+        self.pacer = FramePacer(fps_cap)
         
         # View params
-        self.view_params = {
-            'zoom': 3.0,  # Start zoomed in for better visibility
-            'pan_x': 0.0,
-            'pan_y': 0.0,
-            'rotation': 180.0 # Root at top, growing down
-        }
+        self.view_params = default_view_params()
         
         self.last_mouse_pos = (0, 0)
         self.mouse_dragging = False
         self.mouse_button = None # 0: left, 1: right, 2: middle
 
+        # Instrumentation overlay (F3) and per-frame CSV dump (F4); profiling is off until F3
+        self.stats_overlay = StatsOverlay("TP1 - 2D Arterial Tree")
+
     def init_gl(self):
         if not glfw.init():
             return False
 
-        self.window = glfw.create_window(800, 600, "TP1 - 2D Arterial Tree", None, None)
+        self.window = glfw.create_window(800, 600, self.stats_overlay.title, None, None)
         if not self.window:
             glfw.terminate()
             return False
 
         glfw.make_context_current(self.window)
+        glfw.swap_interval(self.swap_interval)
+        glfw.set_window_refresh_callback(self.window, lambda window: self.pacer.invalidate())
         glfw.set_key_callback(self.window, self.key_callback)
         glfw.set_mouse_button_callback(self.window, self.mouse_button_callback)
         glfw.set_cursor_pos_callback(self.window, self.cursor_pos_callback)
@@ -57,76 +92,191 @@ class App:
         
         return True
 
-    def load_current_step(self):
+    def step_filepath(self, step):
         # Filename pattern: tree2D_Nterm0064_step0008.vtk
         # Note the padding in Nterm part and step part
-        # Nterm seems to be 4 digits in filename inside Nterm_064 folder?
-        # Let's check the filename again: tree2D_Nterm0064_step0064.vtk
         # Directory: TP1_2D/Nterm_064
-        
-        step_str = f"{self.current_step:04d}"
+        step_str = f"{step:04d}"
         nterm_padded = f"{int(self.n_term):04d}"
         filename = f"tree2D_Nterm{nterm_padded}_step{step_str}.vtk"
-        filepath = os.path.join(self.data_dir, filename)
+        return os.path.join(self.data_dir, filename)
+
+    def load_current_step(self, visible_count=None):
+        """Requests the current step without blocking; poll_loading swaps the model in once it is ready."""
+        filepath = self.step_filepath(self.current_step)
         
         if os.path.exists(filepath):
             print(f"Loading: {filepath}")
-            self.model = load_vtk(filepath)
-            # Model will show all segments by default (visible_count = None)
+            self.step_loader.request(filepath, visible_count)
+            if self.window is not None and self.step_loader.loading:
+                glfw.set_window_title(self.window, f"{self.stats_overlay.title} | Loading "
+                                                   f"{os.path.basename(filepath)}")
         else:
             print(f"File not found: {filepath}")
 
+    def poll_timeline(self):
+        """Switches step loading to the timeline index once the background build has finished."""
+        future = self._timeline_future
+        if future is None or not future.done():
+            return
+        self._timeline_future = None
+        try:
+            timeline = future.result()
+        except Exception as e:
+            # Any build failure just leaves steps being read from file
+            print(f"Timeline unavailable: {e}")
+            return
+        if timeline is None:
+            return
+        self._timeline_loader = timeline.loader(model_from_polydata, load_vtk)
+        self.timeline = timeline
+        print(f"Timeline ready: {len(timeline)} steps")
+
+    def _load_step(self, filepath):
+        """StepCache loader: the timeline index once it is ready, otherwise the file."""
+        loader = self._timeline_loader
+        return loader(filepath) if loader is not None else load_vtk(filepath)
+
+    def poll_loading(self):
+        """Advances the requested load (once per frame) and installs the model when it is ready."""
+        self.poll_timeline()
+        done = self.step_loader.poll()
+        if done is None:
+            return
+        filepath, model, visible_count, seconds = done
+        self.pacer.invalidate()
+        if self.window is not None:
+            glfw.set_window_title(self.window, self.stats_overlay.title)
+        stats = self.step_cache.stats()
+        print(f"  {os.path.basename(filepath)} in {seconds * 1e3:.0f} ms; cache: {stats['hits']} hits, "
+              f"{stats['misses']} misses, {stats['entries']} steps")
+        if model is None:
+            # Read failed: keep showing the previous model
+            return
+        self.model = model
+        # Model shows all segments by default (cached models keep the last visit's state)
+        self.model.visible_count = visible_count
+        self.prefetch_neighbours()
+
+    def prefetch_neighbours(self):
+        """Queues step±1 (step±k during playback) for background loading, nearest first."""
+        k = self.playback_lookahead if self.animation_playing else self.prefetch_radius
+        paths = []
+        for offset in range(1, k + 1):
+            for step in (self.current_step + offset * self.step_increment,
+                         self.current_step - offset * self.step_increment):
+                if self.min_step <= step <= self.max_step:
+                    filepath = self.step_filepath(step)
+                    if os.path.exists(filepath):
+                        paths.append(filepath)
+        self.step_cache.prefetch(paths)
+
+    def scrub(self, fraction):
+        """Moves the animation by a fraction of the whole timeline (all steps, one frame per segment)."""
+        if self.timeline is None or self.model is None:
+            return
+        k = self.timeline.step_index(self.current_step)
+        if k < 0:
+            return
+        # Repeated scrubbing during a load starts from the requested position, not the model on screen
+        visible = self.step_loader.visible_count or self.model.visible_count or len(self.model.segments)
+        frame = self.timeline.frame_of(k, visible) + int(fraction * self.timeline.frame_count())
+        k, visible = self.timeline.locate(frame)
+        step = int(self.timeline.steps[k])
+        self.needs_update = False
+        if step == self.current_step and not self.step_loader.loading:
+            self.model.visible_count = visible
+            return
+        self.current_step = step
+        self.load_current_step(visible)
+
+    def _animating(self):
+        return (self.animation_playing and self.model is not None and self.model.visible_count is not None
+                and not self.step_loader.loading)
+
+    def advance_animation(self, dt):
+        """
+        Advance the animation by dt seconds. visible_count is derived from the elapsed time
+        (GrowthAnimation), so speed does not depend on the frame rate and a frame may add thousands
+        of segments; only the drawn range changes. Paused while the next step is loading.
+        """
+        if not self._animating():
+            return
+        animation = self.animation
+        animation.sync(len(self.model.segments), self.model.visible_count)
+        count = animation.advance(dt)
+        if count != self.model.visible_count:
+            self.model.visible_count = count
+            self.pacer.invalidate()
+        elif animation.finished:
+            if self.current_step < self.max_step:
+                # Reached end, load next step
+                self.current_step += self.step_increment
+                self.needs_update = True
+            else:
+                self.animation_playing = False  # Stop at end
+            self.pacer.invalidate()
+
+    def _next_tick(self):
+        """Seconds until visible_count changes, or None if the animation is not advancing."""
+        if not self._animating():
+            return None
+        return self.animation.next_change()
+
     def run(self):
         self.load_current_step()
-        import time
-        self.last_frame_time = time.time()
+        pacer = self.pacer
         
         while not glfw.window_should_close(self.window):
-            # Update animation timer
-            current_time = time.time()
-            dt = current_time - self.last_frame_time
-            self.last_frame_time = current_time
-            
-            # Progressive animation
-            if self.animation_playing and self.model and self.model.visible_count is not None:
-                self.animation_timer += dt * self.animation_speed
-                if self.animation_timer >= 1.0:
-                    self.animation_timer = 0.0
-                    if self.model.visible_count < len(self.model.segments):
-                        self.model.visible_count += 1
-                    else:
-                        # Reached end, load next step
-                        if self.current_step < self.max_step:
-                            self.current_step += self.step_increment
-                            self.needs_update = True
-                        else:
-                            self.animation_playing = False  # Stop at end
+            # One monotonic clock read per iteration
+            frame_start = time.perf_counter()
+            self.advance_animation(pacer.tick())
             
             # Update logic
             if self.needs_update:
                 self.load_current_step()
                 self.needs_update = False
+            with PROFILER.timer('load'):
+                self.poll_loading()
+            if self.step_loader.loading:
+                # Progress bar and sliced upload: one frame per iteration until the load completes
+                pacer.invalidate()
 
-            # Render
-            r, g, b = 0.0, 0.0, 0.0 # Black background
-            from OpenGL.GL import glClear, glClearColor, GL_COLOR_BUFFER_BIT
-            glClearColor(r, g, b, 1.0)
-            glClear(GL_COLOR_BUFFER_BIT)
-            
-            self.renderer.render(self.model, self.view_params)
-            
-            glfw.swap_buffers(self.window)
-            glfw.poll_events()
+            # Render only when something changed and the FPS cap allows it
+            if pacer.should_render():
+                r, g, b = 0.0, 0.0, 0.0 # Black background
+                from OpenGL.GL import glClear, glClearColor, GL_COLOR_BUFFER_BIT
+                glClearColor(r, g, b, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT)
+                
+                with PROFILER.timer('render'):
+                    self.renderer.render(self.model, self.view_params)
+                self.step_loader.draw(self.renderer.width, self.renderer.height)
+                self.stats_overlay.draw(self.window, self.renderer.width, self.renderer.height)
+                
+                with PROFILER.timer('swap'):
+                    glfw.swap_buffers(self.window)
+                pacer.frame_done()
+                if PROFILER.enabled:
+                    PROFILER.add_time('frame', time.perf_counter() - frame_start)
+                    PROFILER.end_frame()
+            # Sleep until an event, the next animation tick or the next allowed frame
+            pacer.wait(self._next_tick())
             
+        self.step_loader.shutdown()
+        self.step_cache.shutdown()
         glfw.terminate()
 
     # Callbacks
     def key_callback(self, window, key, scancode, action, mods):
         if action == glfw.PRESS or action == glfw.REPEAT:
+            self.pacer.invalidate()
             if key == glfw.KEY_SPACE:
                 # Toggle play/pause
                 self.animation_playing = not self.animation_playing
                 print(f"Animation: {'Playing' if self.animation_playing else 'Paused'}")
+                if self.animation_playing:
+                    self.prefetch_neighbours()
             elif key == glfw.KEY_RIGHT:
                 # Speed up or skip forward
                 if self.model and self.model.visible_count is not None:
@@ -145,22 +295,36 @@ class App:
                         self.needs_update = True
             elif key == glfw.KEY_UP:
                 # Increase speed
-                self.animation_speed *= 1.5
-                print(f"Speed: {self.animation_speed:.1f} segments/sec")
+                self.animation.scale_rate(1.5)
+                print(f"Speed: {self.animation.rate():.1f} segments/sec")
             elif key == glfw.KEY_DOWN:
                 # Decrease speed
-                self.animation_speed /= 1.5
-                print(f"Speed: {self.animation_speed:.1f} segments/sec")
+                self.animation.scale_rate(1 / 1.5)
+                print(f"Speed: {self.animation.rate():.1f} segments/sec")
+            elif key == glfw.KEY_PAGE_UP:
+                # Scrub the whole growth timeline (needs the timeline index)
+                self.scrub(0.05)
+            elif key == glfw.KEY_PAGE_DOWN:
+                self.scrub(-0.05)
             elif key == glfw.KEY_R:
                 # Reset animation
                 if self.model:
                     self.model.visible_count = 1
                     self.animation_playing = True
                 print("Animation reset")
+            elif key == glfw.KEY_F3:
+                # Toggle the instrumentation overlay (frame graph + p50/p95/p99 in the title)
+                self.stats_overlay.toggle(window)
+                print(f"Profiling: {'on' if PROFILER.enabled else 'off'}")
+            elif key == glfw.KEY_F4:
+                # Dump the recorded per-frame samples
+                path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+                print(f"Profile: {PROFILER.write_csv(path)} frames written to {path}")
             elif key == glfw.KEY_ESCAPE:
                 glfw.set_window_should_close(window, True)
 
     def mouse_button_callback(self, window, button, action, mods):
+        self.pacer.invalidate()
         if action == glfw.PRESS:
             self.mouse_dragging = True
             self.mouse_button = button
@@ -171,6 +335,7 @@ class App:
 
     def cursor_pos_callback(self, window, xpos, ypos):
         if self.mouse_dragging:
+            self.pacer.invalidate()
             dx = xpos - self.last_mouse_pos[0]
             dy = ypos - self.last_mouse_pos[1]
             self.last_mouse_pos = (xpos, ypos)
@@ -191,6 +356,7 @@ class App:
                 self.view_params['rotation'] += dx * rot_speed
 
     def scroll_callback(self, window, xoffset, yoffset):
+        self.pacer.invalidate()
         zoom_speed = 1.1
         if yoffset > 0:
             self.view_params['zoom'] *= zoom_speed
@@ -199,3 +365,4 @@ class App:
 
     def window_size_callback(self, window, width, height):
         self.renderer.resize(width, height)
+        self.pacer.invalidate()
@@ -5,18 +5,54 @@ Usa dataset TP2_3D.
 """
 import glfw
 import os
+import re
 import time
 import math
+import functools
 import numpy as np
 from OpenGL.GL import glClearColor, glClear, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_SMOOTH
-from src.vtk_loader_3d import load_vtk_3d
+from OpenGL.error import GLError, NullFunctionError
+from src.vtk_loader_3d import load_vtk_3d, model_from_polydata
+from src.step_delta import load_vtk_3d_delta, verify_step_delta
 from src.renderer3d import Renderer3D
 from src.picking import pick_segment
+from src.gpu_picking import ColorPicker
 from src.dataset_utils import auto_detect_dataset
+from src.step_cache import StepCache
+from src.step_loader import StepLoader
+from src.frame_pacer import FramePacer
+from src.growth_animation import GrowthAnimation
+from src.timeline import load_timeline_background
+from src.profiler import PROFILER
+from src.stats_overlay import StatsOverlay
+
+
+def default_view_params():
+    """Câmera inicial (também usada pelo modo headless)."""
+    return {
+        'yaw': 45.0,
+        'pitch': 25.0,
+        'distance': 0.15,
+        'target': [0.0, 0.0, 0.0]
+    }
+
+
+def fit_view(view_params, model):
+    """Centra a câmera na árvore e ajusta a distância à caixa envolvente."""
+    view_params['target'] = model.target.tolist()
+    if model.bounds:
+        ext = np.array([
+            model.bounds[1] - model.bounds[0],
+            model.bounds[3] - model.bounds[2],
+            model.bounds[5] - model.bounds[4]
+        ])
+        view_params['distance'] = max(0.05, float(np.linalg.norm(ext)) * 1.2)
 
 
 class App3D:
-    def __init__(self, data_dir, n_term_str="128", initial_step=16, step_inc=16):
+    def __init__(self, data_dir, n_term_str="128", initial_step=16, step_inc=16, pick_mode='ray',
+                 use_timeline=True, radius_mode='mean', swap_interval=1, fps_cap=None,
+                 animation_duration=None, animation_easing='linear'):
         self.window = None
         self.renderer = Renderer3D()
         self.data_dir = data_dir
@@ -27,20 +63,37 @@ class App3D:
         self.min_step = initial_step
         self.model = None
         self.needs_update = True
+        # Regra do raio por ponto usada em todos os carregamentos (vtk_loader_3d.RADIUS_MODES)
+        self.radius_mode = radius_mode
 
-        # Animação (igual TP1)
+        # Índice da timeline (src/timeline.py): steps montados da memória, sem ler um arquivo por step.
+        # Construído numa thread à parte (poll_timeline troca o loader quando fica pronto); até lá, e se
+        # desativado ou o diretório não for uma sequência de crescimento, os steps vêm do delta/arquivo
+        self.timeline = None
+        self._timeline_loader = None
+        self._timeline_future = load_timeline_background(data_dir) if use_timeline else None
+
+        # Cache de steps (LRU com orçamento de memória) + prefetch em background dos vizinhos
+        self.step_cache = StepCache(self._load_step)
+        # Step seguinte montado por delta a partir do anterior em cache (verify_delta: confere com recarga completa)
+        self.delta_loading = True
+        self.verify_delta = False
+        self.prefetch_radius = 1      # step±1 navegando
+        self.playback_lookahead = 3   # step±k durante a animação
+        # Carga assíncrona: o modelo anterior fica na tela até o novo estar nos VBOs
+        self.step_loader = StepLoader(self.step_cache, self.renderer)
+
+        # Animação por tempo: visible_count sai do tempo decorrido (2 ramos/s como no TP1, ou a
+        # árvore inteira em animation_duration s), com vários ramos por frame se preciso
         self.animation_playing = False
-        self.animation_speed = 2.0
-        self.animation_timer = 0.0
-        self.last_frame_time = None
+        self.animation = GrowthAnimation(speed=2.0, duration=animation_duration, easing=animation_easing)
+
+        # Ritmo de frames: só redesenha quando algo muda; swap_interval 1 = vsync, 0 = sem; fps_cap opcional
+        self.swap_interval = swap_interval
+        self.pacer = FramePacer(fps_cap)
 
         # Câmera: orbit (esquerdo) + pan (direito ou Shift+esquerdo)
-        self.view_params = {
-            'yaw': 45.0,
-            'pitch': 25.0,
-            'distance': 0.15,
-            'target': [0.0, 0.0, 0.0]
-        }
+        self.view_params = default_view_params()
 
         # Opções de render (TP2)
         self.fixed_radius = False
@@ -49,20 +102,29 @@ class App3D:
         self.color_by = 'depth'
         self.selected_segment_id = -1
 
+        # Picking: 'ray' (ray cast contra cápsulas) ou 'gpu' (cor-id no framebuffer, o que está na tela)
+        self.pick_mode = pick_mode
+        self.color_picker = ColorPicker()
+
         self.last_mouse_pos = (0.0, 0.0)
         self.mouse_dragging = False
         self.mouse_button = None
         self.mouse_mods = 0
         self.mouse_dragged = False
 
+        # Overlay de instrumentação (F3) e CSV com as amostras por frame (F4); desligado até o F3
+        self.stats_overlay = StatsOverlay("TP2 - 3D Arterial Tree")
+
     def init_gl(self):
         if not glfw.init():
             return False
-        self.window = glfw.create_window(800, 600, "TP2 - 3D Arterial Tree", None, None)
+        self.window = glfw.create_window(800, 600, self.stats_overlay.title, None, None)
         if not self.window:
             glfw.terminate()
             return False
         glfw.make_context_current(self.window)
+        glfw.swap_interval(self.swap_interval)
+        glfw.set_window_refresh_callback(self.window, lambda window: self.pacer.invalidate())
         glfw.set_key_callback(self.window, self.key_callback)
         glfw.set_mouse_button_callback(self.window, self.mouse_button_callback)
         glfw.set_cursor_pos_callback(self.window, self.cursor_pos_callback)
@@ -70,82 +132,230 @@ class App3D:
         glfw.set_window_size_callback(self.window, self.window_size_callback)
         return True
 
-    def load_current_step(self):
-        """Carrega arquivo do step atual (igual TP1, mas tree3D)."""
-        step_str = f"{self.current_step:04d}"
+    def step_filepath(self, step):
+        step_str = f"{step:04d}"
         nterm_padded = f"{int(self.n_term):04d}"
         filename = f"tree3D_Nterm{nterm_padded}_step{step_str}.vtk"
-        filepath = os.path.join(self.data_dir, filename)
+        return os.path.join(self.data_dir, filename)
+
+    def load_current_step(self, visible_count=None):
+        """
+        Pede o arquivo do step atual (igual TP1, mas tree3D) sem bloquear; o modelo troca em
+        _install_step quando estiver carregado e nos VBOs. visible_count: o do modelo novo (None = todos).
+        """
+        filepath = self.step_filepath(self.current_step)
         if os.path.exists(filepath):
             print(f"Loading: {filepath}")
-            self.model = load_vtk_3d(filepath)
-            if self.model and self.model.is_valid_tree:
-                bifurc = sum(1 for c in self.model.children_of.values() if len(c) >= 2)
-                print(f"  Árvore: raiz={self.model.root}, {len(self.model.segment_list)} ramos, "
-                      f"{bifurc} bifurcações, depth_max={self.model.max_depth}")
-                self.model.visible_count = None
-                self.view_params['target'] = self.model.target.tolist()
-                if self.model.bounds:
-                    ext = np.array([
-                        self.model.bounds[1] - self.model.bounds[0],
-                        self.model.bounds[3] - self.model.bounds[2],
-                        self.model.bounds[5] - self.model.bounds[4]
-                    ])
-                    self.view_params['distance'] = max(0.05, float(np.linalg.norm(ext)) * 1.2)
+            self.step_loader.request(filepath, visible_count)
+            if self.window is not None and self.step_loader.loading:
+                glfw.set_window_title(self.window, f"{self.stats_overlay.title} | Carregando "
+                                                   f"{os.path.basename(filepath)}")
         else:
             print(f"File not found: {filepath}")
 
+    def poll_timeline(self):
+        """Passa a montar os steps do índice da timeline quando a construção em background termina."""
+        future = self._timeline_future
+        if future is None or not future.done():
+            return
+        self._timeline_future = None
+        try:
+            timeline = future.result()
+        except Exception as e:
+            # Qualquer falha na construção só deixa os steps vindo do delta/arquivo
+            print(f"Timeline indisponível: {e}")
+            return
+        if timeline is None:
+            return
+        self._timeline_loader = timeline.loader(
+            functools.partial(model_from_polydata, radius_mode=self.radius_mode),
+            functools.partial(load_vtk_3d, radius_mode=self.radius_mode))
+        self.timeline = timeline
+        print(f"Timeline pronta: {len(timeline)} steps")
+
+    def poll_loading(self):
+        """Avança a carga pedida (uma vez por frame); troca o modelo quando estiver pronto."""
+        self.poll_timeline()
+        done = self.step_loader.poll()
+        if done is None:
+            return
+        filepath, model, visible_count, seconds = done
+        self.pacer.invalidate()
+        if self.window is not None:
+            glfw.set_window_title(self.window, self.stats_overlay.title)
+        stats = self.step_cache.stats()
+        print(f"  {os.path.basename(filepath)} em {seconds * 1e3:.0f} ms; cache: {stats['hits']} hits, "
+              f"{stats['misses']} misses, {stats['entries']} steps")
+        if model is None:
+            # Falha na leitura: o modelo anterior continua na tela
+            return
+        self.model = model
+        self.prefetch_neighbours()
+        if self.model.is_valid_tree:
+            bifurc = self.model.bifurcation_count()
+            print(f"  Árvore: raiz={self.model.root}, {len(self.model.segment_table)} ramos, "
+                  f"{bifurc} bifurcações, depth_max={self.model.max_depth}")
+            self.model.visible_count = visible_count
+            fit_view(self.view_params, self.model)
+
+    def _load_step(self, filepath):
+        """Loader do StepCache: timeline se houver; senão, com delta_loading, parte do step anterior já carregado."""
+        timeline_loader = self._timeline_loader
+        if timeline_loader is not None:
+            return timeline_loader(filepath)
+        # Roda nas threads do StepCache: o progresso só alimenta a barra do StepLoader
+        progress = self.step_loader.progress(filepath)
+        match = re.search(r'_step(\d+)\.vtk$', filepath)
+        if self.delta_loading and match:
+            previous = self.step_cache.peek(self.step_filepath(int(match.group(1)) - self.step_increment))
+            if previous is not None:
+                model, delta = load_vtk_3d_delta(filepath, previous, radius_mode=self.radius_mode,
+                                                 progress=progress)
+                if delta is not None:
+                    print(f"  Delta {os.path.basename(filepath)}: {delta.summary()}")
+                    if self.verify_delta:
+                        mismatches = verify_step_delta(model, filepath, self.radius_mode)
+                        print(f"  Verificação do delta: {'OK' if not mismatches else mismatches}")
+                return model
+        return load_vtk_3d(filepath, radius_mode=self.radius_mode, progress=progress)
+
+    def prefetch_neighbours(self):
+        """Agenda step±1 (step±k durante a animação) para carregar em background, mais próximos primeiro."""
+        k = self.playback_lookahead if self.animation_playing else self.prefetch_radius
+        paths = []
+        for offset in range(1, k + 1):
+            for step in (self.current_step + offset * self.step_increment,
+                         self.current_step - offset * self.step_increment):
+                if self.min_step <= step <= self.max_step:
+                    filepath = self.step_filepath(step)
+                    if os.path.exists(filepath):
+                        paths.append(filepath)
+        self.step_cache.prefetch(paths)
+
+    def scrub(self, fraction):
+        """Avança/recua a animação uma fração da timeline inteira (todos os steps, um frame por ramo)."""
+        if self.timeline is None or self.model is None:
+            return
+        k = self.timeline.step_index(self.current_step)
+        if k < 0:
+            return
+        # Scrub repetido durante a carga parte do ponto já pedido, não do modelo ainda na tela
+        visible = self.step_loader.visible_count or self.model.visible_count or len(self.model.segment_table)
+        frame = self.timeline.frame_of(k, visible) + int(fraction * self.timeline.frame_count())
+        k, visible = self.timeline.locate(frame)
+        step = int(self.timeline.steps[k])
+        self.needs_update = False
+        if step == self.current_step and not self.step_loader.loading:
+            self.model.visible_count = visible
+            return
+        self.current_step = step
+        self.load_current_step(visible)
+
+    def _animating(self) -> bool:
+        return (self.animation_playing and self.model is not None and self.model.visible_count is not None
+                and not self.step_loader.loading)
+
+    def advance_animation(self, dt):
+        """
+        Avança a animação dt segundos: visible_count vem do tempo (GrowthAnimation), então a
+        velocidade não depende do FPS e um frame pode acrescentar milhares de ramos. Só muda o
+        intervalo desenhado. Parada enquanto o step seguinte carrega.
+        """
+        if not self._animating():
+            return
+        animation = self.animation
+        animation.sync(len(self.model.segment_table), self.model.visible_count)
+        count = animation.advance(dt)
+        if count != self.model.visible_count:
+            self.model.visible_count = count
+            self.pacer.invalidate()
+        elif animation.finished:
+            if self.current_step < self.max_step:
+                self.current_step += self.step_increment
+                self.needs_update = True
+            else:
+                self.animation_playing = False
+            self.pacer.invalidate()
+
+    def _next_tick(self):
+        """Segundos até o visible_count mudar, ou None se a animação não estiver andando."""
+        if not self._animating():
+            return None
+        return self.animation.next_change()
+
     def run(self):
         self.load_current_step()
-        self.last_frame_time = time.time()
+        pacer = self.pacer
 
         while not glfw.window_should_close(self.window):
-            dt = time.time() - self.last_frame_time
-            self.last_frame_time = time.time()
-
-            # Animação progressiva (igual TP1)
-            if self.animation_playing and self.model and self.model.visible_count is not None:
-                self.animation_timer += dt * self.animation_speed
-                if self.animation_timer >= 1.0:
-                    self.animation_timer = 0.0
-                    if self.model.visible_count < len(self.model.segment_list):
-                        self.model.visible_count += 1
-                    else:
-                        if self.current_step < self.max_step:
-                            self.current_step += self.step_increment
-                            self.needs_update = True
-                        else:
-                            self.animation_playing = False
+            frame_start = time.perf_counter()
+            self.advance_animation(pacer.tick())
 
             if self.needs_update:
                 self.load_current_step()
                 self.needs_update = False
+            with PROFILER.timer('load'):
+                self.poll_loading()
+            if self.step_loader.loading:
+                # Barra de progresso e envio em fatias: um frame por iteração até a carga terminar
+                pacer.invalidate()
 
-            glClearColor(0.08, 0.08, 0.12, 1.0)
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-            self.renderer.render(self.model, self.view_params, {
-                'fixed_radius': self.fixed_radius,
-                'shade_model': self.shade_model,
-                'transparency': self.transparency,
-                'color_by': self.color_by,
-                'selected_segment_id': self.selected_segment_id
-            })
-            glfw.swap_buffers(self.window)
-            glfw.poll_events()
+            if pacer.should_render():
+                glClearColor(0.08, 0.08, 0.12, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                with PROFILER.timer('render'):
+                    self.renderer.render(self.model, self.view_params, self.render_options())
+                self.step_loader.draw(self.renderer.width, self.renderer.height)
+                self.stats_overlay.draw(self.window, self.renderer.width, self.renderer.height)
+                with PROFILER.timer('swap'):
+                    glfw.swap_buffers(self.window)
+                pacer.frame_done()
+                if PROFILER.enabled:
+                    PROFILER.add_time('frame', time.perf_counter() - frame_start)
+                    PROFILER.end_frame()
+            # Dorme até um evento, o próximo tick da animação ou o próximo frame permitido
+            pacer.wait(self._next_tick())
 
+        self.color_picker.release()
+        self.step_loader.shutdown()
+        self.step_cache.shutdown()
         glfw.terminate()
 
+    def render_options(self):
+        return {
+            'fixed_radius': self.fixed_radius,
+            'shade_model': self.shade_model,
+            'transparency': self.transparency,
+            'color_by': self.color_by,
+            'selected_segment_id': self.selected_segment_id
+        }
+
+    def pick(self, x, y):
+        """Id do ramo sob o cursor pelo modo de picking atual; 'gpu' cai para 'ray' se faltar FBO/VBO."""
+        if self.pick_mode == 'gpu' and self.renderer.retained:
+            try:
+                return self.color_picker.pick(self.renderer, self.model, self.view_params,
+                                              self.render_options(), x, y)
+            except (GLError, NullFunctionError) as e:
+                print(f"Picking por cor indisponível ({e}); usando ray cast")
+                self.pick_mode = 'ray'
+        _, h = glfw.get_framebuffer_size(self.window)
+        return pick_segment(self.model, x, y, h)
+
     def key_callback(self, window, key, scancode, action, mods):
         if action != glfw.PRESS and action != glfw.REPEAT:
             return
+        self.pacer.invalidate()
         from OpenGL.GL import GL_FLAT
         if key == glfw.KEY_SPACE:
             self.animation_playing = not self.animation_playing
             if self.animation_playing and self.model and self.model.visible_count is None:
                 self.model.visible_count = 1
+            if self.animation_playing:
+                self.prefetch_neighbours()
         elif key == glfw.KEY_RIGHT:
             if self.model and self.model.visible_count is not None:
-                self.model.visible_count = min(self.model.visible_count + 5, len(self.model.segment_list))
+                self.model.visible_count = min(self.model.visible_count + 5, len(self.model.segment_table))
             else:
                 if self.current_step < self.max_step:
                     self.current_step += self.step_increment
@@ -158,9 +368,9 @@ class App3D:
                     self.current_step -= self.step_increment
                     self.needs_update = True
         elif key == glfw.KEY_UP:
-            self.animation_speed *= 1.5
+            self.animation.scale_rate(1.5)
         elif key == glfw.KEY_DOWN:
-            self.animation_speed /= 1.5
+            self.animation.scale_rate(1 / 1.5)
         elif key == glfw.KEY_R:
             self.fixed_radius = not self.fixed_radius
         elif key == glfw.KEY_1:
@@ -169,15 +379,40 @@ class App3D:
             self.shade_model = GL_SMOOTH
         elif key == glfw.KEY_T:
             self.transparency = not self.transparency
+        elif key == glfw.KEY_O:
+            mode = 'sorted' if self.renderer.transparency_mode == 'oit' else 'oit'
+            self.renderer.transparency_mode = mode
+            print(f"Transparência: {mode}")
+        elif key == glfw.KEY_G:
+            self.renderer.tubes = not self.renderer.tubes
+            print(f"Geometria: {'tubos' if self.renderer.tubes else 'linhas'}")
+        elif key == glfw.KEY_L:
+            self.renderer.lod = not self.renderer.lod
+            print(f"LOD por subárvore: {'ligado' if self.renderer.lod else 'desligado'} "
+                  f"({self.renderer.lod_pixels:g} px)")
         elif key == glfw.KEY_C:
             self.color_by = 'radius' if self.color_by == 'depth' else 'depth'
+        elif key == glfw.KEY_P:
+            self.pick_mode = 'gpu' if self.pick_mode == 'ray' else 'ray'
+            print(f"Picking: {self.pick_mode}")
+        elif key == glfw.KEY_PAGE_UP:
+            self.scrub(0.05)
+        elif key == glfw.KEY_PAGE_DOWN:
+            self.scrub(-0.05)
         elif key == glfw.KEY_0 and self.model:
             self.model.visible_count = 1
             self.animation_playing = True
+        elif key == glfw.KEY_F3:
+            self.stats_overlay.toggle(window)
+            print(f"Instrumentação: {'ligada' if PROFILER.enabled else 'desligada'}")
+        elif key == glfw.KEY_F4:
+            path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+            print(f"Perfil: {PROFILER.write_csv(path)} frames gravados em {path}")
         elif key == glfw.KEY_ESCAPE:
             glfw.set_window_should_close(window, True)
 
     def mouse_button_callback(self, window, button, action, mods):
+        self.pacer.invalidate()
         if action == glfw.PRESS:
             self.mouse_dragging = True
             self.mouse_button = button
@@ -187,18 +422,20 @@ class App3D:
         elif action == glfw.RELEASE:
             if button == glfw.MOUSE_BUTTON_LEFT and self.model and not self.mouse_dragged:
                 x, y = glfw.get_cursor_pos(window)
-                _, h = glfw.get_framebuffer_size(window)
-                self.selected_segment_id = pick_segment(self.model, x, y, h)
+                self.selected_segment_id = self.pick(x, y)
                 if self.selected_segment_id >= 0:
-                    seg = next((s for s in self.model.segment_list if s.id == self.selected_segment_id), None)
-                    if seg:
-                        print(f"[HUD] id={seg.id} length={seg.length:.4f} r0={seg.r0:.4f} r1={seg.r1:.4f} depth={seg.depth}")
+                    t = self.model.segment_table
+                    k = t.find(self.selected_segment_id)
+                    if k >= 0:
+                        print(f"[HUD] id={t.ids[k]} length={t.length[k]:.4f} r0={t.r0[k]:.4f} "
+                              f"r1={t.r1[k]:.4f} depth={t.depth[k]}")
             self.mouse_dragging = False
             self.mouse_button = None
 
     def cursor_pos_callback(self, window, xpos, ypos):
         if not self.mouse_dragging:
             return
+        self.pacer.invalidate()
         dx = xpos - self.last_mouse_pos[0]
         dy = ypos - self.last_mouse_pos[1]
         self.last_mouse_pos = (xpos, ypos)
@@ -235,8 +472,10 @@ class App3D:
             self.view_params['pitch'] = max(-89, min(89, self.view_params['pitch'] + dy * sens))
 
     def scroll_callback(self, window, xoffset, yoffset):
+        self.pacer.invalidate()
         s = 1.08 if yoffset > 0 else 1.0 / 1.08
         self.view_params['distance'] = max(0.02, min(2.0, self.view_params['distance'] / s))
 
     def window_size_callback(self, window, width, height):
         self.renderer.resize(width, height)
+        self.pacer.invalidate()
@@ -0,0 +1,190 @@
+"""
+Análise em lote de arquivos VTK - TP1/TP2
+Estatísticas por arquivo (contagens, bifurcações, max_depth, comprimento total, distribuição
+dos raios, validade da árvore) calculadas com o mesmo caminho de load_vtk_3d/Model3D.
+
+Os arquivos são distribuídos em lotes por um pool de processos; cada lote volta como um único
+array estruturado (uma linha de STATS_DTYPE por arquivo, ~110 bytes), sem modelos nem listas
+de Segment para serializar, então o custo de comunicação não cresce com o tamanho das árvores.
+A tabela final pode ser gravada em CSV, JSON ou Parquet (este último precisa de pyarrow).
+"""
+import os
+import re
+import sys
+import csv
+import json
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.model3d import Model3D
+from src.vtk_cache import load_polydata
+from src.vtk_loader_3d import point_radius
+
+# status: 0 = árvore válida, 1 = VTK lido mas não é árvore (ciclos/várias raízes), 2 = erro de leitura
+STATUS_OK, STATUS_INVALID, STATUS_ERROR = 0, 1, 2
+
+STATS_DTYPE = np.dtype([
+    ('n_term', 'i4'), ('step', 'i4'), ('dim', 'i1'), ('status', 'i1'), ('valid', '?'),
+    ('points', 'i8'), ('segments', 'i8'), ('bifurcations', 'i8'), ('leaves', 'i8'), ('max_depth', 'i4'),
+    ('total_length', 'f8'),
+    ('radius_min', 'f8'), ('radius_p10', 'f8'), ('radius_p50', 'f8'), ('radius_mean', 'f8'),
+    ('radius_p90', 'f8'), ('radius_max', 'f8'),
+    ('load_ms', 'f8'),
+])
+
+_NAME_RE = re.compile(r'Nterm(\d+)_step(\d+)')
+
+
+def find_vtk_files(paths) -> list:
+    """Arquivos .vtk dos caminhos dados (arquivos ou diretórios, percorridos recursivamente), ordenados."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith('.vtk'))
+        elif path.endswith('.vtk'):
+            files.append(path)
+    return sorted(files)
+
+
+def file_stats(filepath: str, use_cache: bool = False, radius_mode: str = 'mean') -> np.void:
+    """Uma linha de STATS_DTYPE para o arquivo (tempo de carga incluso)."""
+    row = np.zeros((), dtype=STATS_DTYPE)
+    row['n_term'] = row['step'] = row['max_depth'] = -1
+    row['bifurcations'] = row['leaves'] = -1
+    match = _NAME_RE.search(os.path.basename(filepath))
+    if match:
+        row['n_term'], row['step'] = int(match.group(1)), int(match.group(2))
+
+    t0 = time.perf_counter()
+    try:
+        data = load_polydata(filepath, use_cache)
+        # Mesmo modelo de model_from_polydata, mas uma árvore inválida ainda rende estatísticas
+        model = Model3D()
+        model.points = np.asarray(data.points)
+        model.segments = np.asarray(data.lines)
+        model.radius_point = point_radius(data.lines, data.cell_scalars, len(data.points), radius_mode)
+        try:
+            model.build_segment_list()
+        except ValueError:
+            row['status'] = STATUS_INVALID
+        ends = model.points[np.asarray(model.segments, dtype=np.int64)].astype(np.float64)
+    except Exception:
+        # Arquivo truncado/malformado ou lines apontando para pontos que não existem
+        row['status'] = STATUS_ERROR
+        row['load_ms'] = (time.perf_counter() - t0) * 1e3
+        return row
+    row['load_ms'] = (time.perf_counter() - t0) * 1e3
+
+    row['valid'] = model.is_valid_tree
+    row['points'] = len(model.points)
+    row['segments'] = len(model.segments)
+    row['dim'] = 2 if len(model.points) and not np.any(model.points[:, 2]) else 3
+    if len(model.segments):
+        row['total_length'] = float(np.linalg.norm(ends[:, 1] - ends[:, 0], axis=1).sum())
+    if model.is_valid_tree:
+        row['bifurcations'] = model.bifurcation_count()
+        row['leaves'] = int(np.count_nonzero(model.segment_table.is_leaf_segment))
+        row['max_depth'] = model.max_depth
+
+    radii = np.asarray(data.cell_scalars, dtype=np.float64)
+    if radii.size:
+        p10, p50, p90 = np.percentile(radii, (10, 50, 90))
+        row['radius_min'], row['radius_max'] = radii.min(), radii.max()
+        row['radius_p10'], row['radius_p50'], row['radius_p90'] = p10, p50, p90
+        row['radius_mean'] = radii.mean()
+    return row
+
+
+def _stats_batch(args) -> tuple:
+    """Tarefa do pool: (início, caminhos, use_cache, radius_mode) -> (início, array estruturado)."""
+    start, paths, use_cache, radius_mode = args
+    out = np.zeros(len(paths), dtype=STATS_DTYPE)
+    for k, path in enumerate(paths):
+        out[k] = file_stats(path, use_cache, radius_mode)
+    return start, out
+
+
+def collect_stats(files, workers: int = None, batch_size: int = None, use_cache: bool = False,
+                  radius_mode: str = 'mean', progress=None) -> np.ndarray:
+    """
+    Estatísticas de todos os arquivos, na ordem de `files`.
+    workers: processos (None = os.cpu_count(); 1 = no próprio processo).
+    batch_size: arquivos por tarefa (None = ~8 tarefas por processo, no máximo 64 arquivos).
+    progress: função (arquivos prontos, total) chamada a cada lote.
+    """
+    files = list(files)
+    table = np.zeros(len(files), dtype=STATS_DTYPE)
+    workers = workers or os.cpu_count() or 1
+    if batch_size is None:
+        batch_size = max(1, min(64, len(files) // (8 * workers)))
+    tasks = [(start, files[start:start + batch_size], use_cache, radius_mode)
+             for start in range(0, len(files), batch_size)]
+
+    done = 0
+    if workers == 1:
+        results = map(_stats_batch, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_stats_batch, tasks)
+    try:
+        for start, rows in results:
+            table[start:start + len(rows)] = rows
+            done += len(rows)
+            if progress is not None:
+                progress(done, len(files))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return table
+
+
+def _open_output(output: str):
+    return contextlib.nullcontext(sys.stdout) if output == '-' else open(output, 'w', newline='')
+
+
+def _records(files, table: np.ndarray):
+    for path, row in zip(files, table.tolist()):
+        yield dict(zip(('file',) + STATS_DTYPE.names, (path,) + row))
+
+
+def output_format(output: str, fmt: str = None) -> str:
+    """
+    Formato de saída: fmt ('csv', 'json' ou 'parquet') ou, se None, a extensão de output
+    ('-' = CSV no stdout). Lança ValueError para formato desconhecido e ImportError se Parquet
+    não tiver pyarrow — dá para conferir antes de processar os arquivos.
+    """
+    if fmt is None:
+        fmt = 'csv' if output == '-' else os.path.splitext(output)[1].lstrip('.').lower()
+    if fmt not in ('csv', 'json', 'parquet'):
+        raise ValueError(f"formato de saída desconhecido: {fmt!r} (use csv, json ou parquet)")
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise ImportError("saída Parquet precisa do pacote pyarrow (pip install pyarrow)") from e
+    return fmt
+
+
+def write_table(output: str, files, table: np.ndarray, fmt: str = None):
+    """Grava a tabela (coluna 'file' + STATS_DTYPE) no formato de output_format(output, fmt)."""
+    fmt = output_format(output, fmt)
+    columns = ('file',) + STATS_DTYPE.names
+    if fmt == 'csv':
+        with _open_output(output) as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for path, row in zip(files, table.tolist()):
+                writer.writerow((path,) + row)
+    elif fmt == 'json':
+        with _open_output(output) as f:
+            json.dump(list(_records(files, table)), f)
+            f.write('\n')
+    else:
+        import pyarrow
+        import pyarrow.parquet
+        data = {'file': pyarrow.array(list(files), type=pyarrow.string())}
+        data.update({name: pyarrow.array(table[name]) for name in STATS_DTYPE.names})
+        pyarrow.parquet.write_table(pyarrow.table(data), output)
@@ -0,0 +1,179 @@
+"""
+BVH de cápsulas para picking - TP2
+Ramos ordenados por código de Morton do ponto médio; folhas = blocos consecutivos de
+leaf_size ramos; níveis acima formam uma árvore binária completa implícita (nó i tem
+filhos 2i e 2i+1). Construção e consulta são vetorizadas: a consulta desce nível a nível
+testando as AABBs de todos os nós candidatos de uma vez e, nas folhas atingidas, testa
+as cápsulas em lote.
+A BVH só poupa trabalho quando as cápsulas são pequenas perto da árvore. Nos datasets (e em
+cco_tree) o raio de picking é maior que a árvore inteira e o raio atravessa quase todas as
+folhas. Por isso, quando a AABB média das folhas passa de brute_ratio vezes a extensão da árvore
+(sem os raios) em todos os eixos, a consulta nem desce: testa todas as cápsulas de uma vez (o
+mesmo que closest_hit). Decidido na construção; com raios pequenos a razão fica bem abaixo de 1.
+"""
+import numpy as np
+
+
+def ray_capsule_batch(ray_origin: np.ndarray, ray_dir: np.ndarray,
+                      a: np.ndarray, b: np.ndarray) -> tuple:
+    """
+    Versão vetorizada de picking._ray_segment_distance para N segmentos [a, b].
+    Retorna (dist, t_ray), arrays de tamanho N.
+    """
+    ab = b - a
+    ao = ray_origin - a
+    d = ray_dir
+    dd = np.dot(d, d)
+    ab_ab = np.einsum('ij,ij->i', ab, ab)
+    d_ab = ab @ d
+    ao_d = ao @ d
+    ao_ab = np.einsum('ij,ij->i', ao, ab)
+
+    denom = dd * ab_ab - d_ab ** 2
+    parallel = np.abs(denom) < 1e-20
+    safe = np.where(parallel, 1.0, denom)
+    t_ray = np.maximum(0.0, (ab_ab * -ao_d + d_ab * ao_ab) / safe)
+    s = np.clip((dd * ao_ab + d_ab * -ao_d) / safe, 0.0, 1.0)
+
+    # Raio paralelo ao segmento: ponto do segmento mais próximo da origem, t_ray = 0
+    s_par = np.clip(ao_ab / (ab_ab + 1e-20), 0.0, 1.0)
+    s = np.where(parallel, s_par, s)
+    t_ray = np.where(parallel, 0.0, t_ray)
+
+    point_on_ray = ray_origin + t_ray[:, None] * d
+    point_on_seg = a + s[:, None] * ab
+    dist = np.linalg.norm(point_on_ray - point_on_seg, axis=1)
+    return dist, t_ray
+
+
+def closest_hit(ray_origin, ray_dir, p0, p1, radius) -> tuple:
+    """Índice (em p0/p1) da cápsula atingida mais próxima da câmera e seu t, ou (-1, inf)."""
+    if len(p0) == 0:
+        return -1, float('inf')
+    dist, t_ray = ray_capsule_batch(ray_origin, ray_dir, p0, p1)
+    t_hit = np.where(dist < radius, t_ray, np.inf)
+    k = int(np.argmin(t_hit))
+    if not np.isfinite(t_hit[k]):
+        return -1, float('inf')
+    return k, float(t_hit[k])
+
+
+def _part1by2(v: np.ndarray) -> np.ndarray:
+    """Espalha 10 bits: b9..b0 -> b9 0 0 b8 0 0 ... b0 (para intercalar 3 eixos)."""
+    v = v.astype(np.uint32) & 0x3FF
+    v = (v | (v << 16)) & 0x030000FF
+    v = (v | (v << 8)) & 0x0300F00F
+    v = (v | (v << 4)) & 0x030C30C3
+    v = (v | (v << 2)) & 0x09249249
+    return v
+
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    """Código de Morton de 30 bits de cada ponto, normalizado pela caixa envolvente."""
+    lo = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lo, 1e-12)
+    q = np.clip(((points - lo) / extent * 1023.0).astype(np.int64), 0, 1023)
+    return (_part1by2(q[:, 0]) << 2) | (_part1by2(q[:, 1]) << 1) | _part1by2(q[:, 2])
+
+
+class CapsuleBVH:
+    def __init__(self, p0: np.ndarray, p1: np.ndarray, radius: np.ndarray, leaf_size: int = 16,
+                 brute_ratio: float = 1.0):
+        n = len(p0)
+        self.n = n
+        self.leaf_size = leaf_size
+        p0 = np.asarray(p0, dtype=np.float64)
+        p1 = np.asarray(p1, dtype=np.float64)
+        radius = np.asarray(radius, dtype=np.float64)
+
+        self.order = np.argsort(morton_codes((p0 + p1) / 2.0), kind='stable') if n else np.zeros(0, np.int64)
+        self.p0 = p0[self.order]
+        self.p1 = p1[self.order]
+        self.radius = radius[self.order]
+
+        # AABB de cada folha (bloco de leaf_size ramos consecutivos)
+        n_leaves = max(1, -(-n // leaf_size))
+        n_padded = 1 << (n_leaves - 1).bit_length()
+        leaf_min = np.full((n_padded, 3), np.inf)
+        leaf_max = np.full((n_padded, 3), -np.inf)
+        self.brute = False
+        if n:
+            box_min = np.minimum(self.p0, self.p1) - self.radius[:, None]
+            box_max = np.maximum(self.p0, self.p1) + self.radius[:, None]
+            starts = np.arange(0, n, leaf_size)
+            leaf_min[:len(starts)] = np.minimum.reduceat(box_min, starts, axis=0)
+            leaf_max[:len(starts)] = np.maximum.reduceat(box_max, starts, axis=0)
+            # Folhas do tamanho da árvore inteira: todo raio que passa pela árvore atinge quase todas
+            leaf_extent = (leaf_max[:len(starts)] - leaf_min[:len(starts)]).mean(axis=0)
+            tree_extent = np.maximum(self.p0, self.p1).max(axis=0) - np.minimum(self.p0, self.p1).min(axis=0)
+            self.brute = bool(np.all(leaf_extent > brute_ratio * tree_extent))
+
+        # Níveis da raiz até as folhas; nível k tem 2^k nós
+        levels = [(leaf_min, leaf_max)]
+        while len(levels[-1][0]) > 1:
+            lo, hi = levels[-1]
+            levels.append((np.minimum(lo[0::2], lo[1::2]), np.maximum(hi[0::2], hi[1::2])))
+        self.levels = levels[::-1]
+
+    def _hit_leaves(self, ray_origin: np.ndarray, ray_dir: np.ndarray) -> tuple:
+        """Folhas cuja AABB o raio (t >= 0) atravessa e o t de entrada em cada uma."""
+        d = np.where(np.abs(ray_dir) < 1e-30, 1e-30, ray_dir)
+        inv_d = 1.0 / d
+        nodes = np.zeros(1, dtype=np.int64)
+        t_enter = np.zeros(1)
+        last = len(self.levels) - 1
+        for depth, (bmin, bmax) in enumerate(self.levels):
+            t1 = (bmin[nodes] - ray_origin) * inv_d
+            t2 = (bmax[nodes] - ray_origin) * inv_d
+            t_near = np.maximum(np.minimum(t1, t2).max(axis=1), 0.0)
+            t_far = np.maximum(t1, t2).min(axis=1)
+            # Nós vazios (preenchimento até potência de 2) têm bmin = +inf > bmax
+            hit = (bmin[nodes, 0] <= bmax[nodes, 0]) & (t_far >= t_near)
+            nodes, t_enter = nodes[hit], t_near[hit]
+            if nodes.size == 0 or depth == last:
+                break
+            nodes = np.concatenate([2 * nodes, 2 * nodes + 1])
+        return nodes, t_enter
+
+    def query(self, ray_origin: np.ndarray, ray_dir: np.ndarray, chunk: int = 64) -> tuple:
+        """
+        Índice original do ramo atingido mais próximo e seu t, ou (-1, inf).
+        As folhas atingidas são testadas em lotes por ordem de entrada do raio; para assim
+        que a próxima folha começa depois do melhor acerto.
+        """
+        ray_origin = np.asarray(ray_origin, dtype=np.float64)
+        ray_dir = np.asarray(ray_dir, dtype=np.float64)
+        if self.brute:
+            return self._brute(ray_origin, ray_dir)
+        leaves, t_enter = self._hit_leaves(ray_origin, ray_dir)
+        order = np.argsort(t_enter, kind='stable')
+        leaves, t_enter = leaves[order], t_enter[order]
+
+        best_k, best_t = -1, float('inf')
+        pos = 0
+        while pos < leaves.size and t_enter[pos] <= best_t:
+            end = pos + chunk
+            starts = leaves[pos:end] * self.leaf_size
+            counts = np.maximum(np.minimum(starts + self.leaf_size, self.n) - starts, 0)
+            first_out = np.cumsum(counts) - counts
+            idx = np.repeat(starts - first_out, counts) + np.arange(int(counts.sum()))
+            dist, t_ray = ray_capsule_batch(ray_origin, ray_dir, self.p0[idx], self.p1[idx])
+            t_hit = np.where(dist < self.radius[idx], t_ray, np.inf)
+            t = float(t_hit.min())
+            if t <= best_t and np.isfinite(t):
+                # Empate em t: vence o menor índice original, como no teste por força bruta
+                k = int(self.order[idx[t_hit == t]].min())
+                if t < best_t or k < best_k:
+                    best_k, best_t = k, t
+            pos = end
+            chunk *= 2
+        return best_k, best_t
+
+    def _brute(self, ray_origin: np.ndarray, ray_dir: np.ndarray) -> tuple:
+        """Todas as cápsulas de uma vez; empate em t: menor índice original, como em query()."""
+        dist, t_ray = ray_capsule_batch(ray_origin, ray_dir, self.p0, self.p1)
+        t_hit = np.where(dist < self.radius, t_ray, np.inf)
+        t = float(t_hit.min()) if self.n else float('inf')
+        if not np.isfinite(t):
+            return -1, float('inf')
+        return int(self.order[t_hit == t].min()), t
@@ -0,0 +1,261 @@
+"""
+Culling por frustum e por tamanho na tela - TP1/TP2
+Octree (3D) / quadtree (2D) linear sobre os pontos médios dos ramos: os ramos são ordenados
+por código de Morton e cada nó é um prefixo do código, ou seja, um trecho contíguo dessa
+ordem. Cada nível guarda, por nó, a AABB justa dos ramos (pontas p0/p1), o trecho e a menor
+linha (ordem BFS) que ele contém. Construção de baixo para cima com reduceat, uma vez por modelo.
+
+A consulta usa a matriz projeção × modelview atual (serve para a perspectiva do TP2 e para o
+glOrtho rotacionado do TP1) e desce nível a nível, vetorizada como a BVH de picking:
+- nó fora de um dos 6 planos do frustum: descartado ('culled');
+- nó que projeta em menos de min_pixels: vira um único ramo, o de menor linha ('merged') —
+  tudo nele cai no mesmo pixel, e a menor linha aparece sempre que algum ramo do nó aparece
+  (visible_count da animação conta na ordem das linhas);
+- folha (ou nó inteiro dentro do frustum, sem fusão): aceito inteiro.
+"""
+import numpy as np
+from OpenGL.GL import glGetDoublev, GL_PROJECTION_MATRIX, GL_MODELVIEW_MATRIX
+from src.bvh import _part1by2
+from src.profiler import PROFILER
+
+_BITS = 10   # bits por eixo do código de Morton (profundidade máxima da árvore)
+
+
+def _part1by1(v: np.ndarray) -> np.ndarray:
+    """Espalha 10 bits: b9..b0 -> b9 0 b8 0 ... b0 (para intercalar 2 eixos)."""
+    v = v.astype(np.uint32) & 0x3FF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def morton_codes_nd(points: np.ndarray, dim: int) -> np.ndarray:
+    """Código de Morton de dim×10 bits (dim = 2 ou 3) de cada ponto, normalizado pela caixa envolvente."""
+    points = points[:, :dim]
+    lo = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lo, 1e-12)
+    q = np.clip(((points - lo) / extent * ((1 << _BITS) - 1)).astype(np.int64), 0, (1 << _BITS) - 1)
+    if dim == 2:
+        return ((_part1by1(q[:, 0]) << 1) | _part1by1(q[:, 1])).astype(np.int64)
+    return ((_part1by2(q[:, 0]) << 2) | (_part1by2(q[:, 1]) << 1) | _part1by2(q[:, 2])).astype(np.int64)
+
+
+def frustum_planes(mvp: np.ndarray, pad=(1.0, 1.0)) -> np.ndarray:
+    """
+    6 planos (a, b, c, d) do volume de recorte de mvp (4×4, linhas × vetor coluna), com
+    a·x + b·y + c·z + d >= 0 dentro. pad alarga x/y em NDC (margem para linhas grossas).
+    """
+    m = np.asarray(mvp, dtype=np.float64).copy()
+    m[0] /= pad[0]
+    m[1] /= pad[1]
+    return np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+
+
+class _Level:
+    __slots__ = ('prefix', 'start', 'count', 'bmin', 'bmax', 'min_row', 'child_first', 'child_count')
+
+
+class SegmentOctree:
+    def __init__(self, p0: np.ndarray, p1: np.ndarray, dim: int = 3, leaf_size: int = 32):
+        """p0/p1: N×3 pontas dos ramos (linha k = ramo k da tabela/modelo). dim=2 para o quadtree do TP1."""
+        p0 = np.asarray(p0, dtype=np.float64)
+        p1 = np.asarray(p1, dtype=np.float64)
+        n = len(p0)
+        self.n = n
+        self.dim = dim
+        self.leaf_size = leaf_size
+        self.levels = []
+        if n == 0:
+            self.order = np.zeros(0, dtype=np.int64)
+            return
+        codes = morton_codes_nd((p0 + p1) * 0.5, dim)
+        self.order = np.argsort(codes, kind='stable')
+        codes = codes[self.order]
+        box_min = np.minimum(p0, p1)[self.order]
+        box_max = np.maximum(p0, p1)[self.order]
+
+        # Nível mais fundo: um nó por código distinto
+        level = _Level()
+        level.start = np.flatnonzero(np.diff(codes, prepend=-1))
+        level.prefix = codes[level.start]
+        level.count = np.diff(np.append(level.start, n))
+        level.bmin = np.minimum.reduceat(box_min, level.start, axis=0)
+        level.bmax = np.maximum.reduceat(box_max, level.start, axis=0)
+        level.min_row = np.minimum.reduceat(self.order, level.start)
+        level.child_first = level.child_count = None
+        levels = [level]
+        # Cada nível acima agrupa os nós de baixo pelo prefixo (dim bits a menos)
+        for _ in range(_BITS):
+            below = levels[-1]
+            parent = below.prefix >> dim
+            first = np.flatnonzero(np.diff(parent, prepend=-1))
+            level = _Level()
+            level.prefix = parent[first]
+            level.start = below.start[first]
+            level.count = np.add.reduceat(below.count, first)
+            level.bmin = np.minimum.reduceat(below.bmin, first, axis=0)
+            level.bmax = np.maximum.reduceat(below.bmax, first, axis=0)
+            level.min_row = np.minimum.reduceat(below.min_row, first)
+            level.child_first = first
+            level.child_count = np.diff(np.append(first, len(below.prefix)))
+            levels.append(level)
+        self.levels = levels[::-1]   # raiz primeiro
+
+    def query(self, planes: np.ndarray, pixel_scale: float, w_row: np.ndarray, min_pixels: float = 1.0) -> tuple:
+        """
+        Ramos a desenhar para o frustum `planes` (frustum_planes). pixel_scale: pixels por unidade de
+        mundo em w = 1; w_row: 4ª linha da MVP (w de recorte; (0, 0, 0, 1) na ortográfica).
+        Retorna (linhas aceitas em trechos inteiros, linhas representantes dos nós fundidos,
+        nº de ramos fora do frustum, nº de ramos fundidos além dos representantes).
+        """
+        if self.n == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, 0, 0
+        normal = planes[:, :3]
+        positive = normal >= 0.0
+        w_dir = np.asarray(w_row[:3], dtype=np.float64)
+        w_norm = float(np.linalg.norm(w_dir))
+        nodes = np.zeros(1, dtype=np.int64)
+        accepted = []     # (start, count) dos trechos aceitos
+        merged = []
+        culled = merged_count = 0
+        last = len(self.levels) - 1
+        for depth, level in enumerate(self.levels):
+            bmin = level.bmin[nodes]
+            bmax = level.bmax[nodes]
+            count = level.count[nodes]
+            # Vértice mais "para dentro" de cada plano: se até ele está fora, a caixa inteira está
+            far = np.einsum('nk,pk->np', bmax, normal * positive) + np.einsum('nk,pk->np', bmin, normal * ~positive)
+            near = np.einsum('nk,pk->np', bmin, normal * positive) + np.einsum('nk,pk->np', bmax, normal * ~positive)
+            outside = ((far + planes[:, 3]) < 0.0).any(axis=1)
+            inside = ((near + planes[:, 3]) >= 0.0).all(axis=1)
+            culled += int(count[outside].sum())
+            keep = ~outside
+            nodes, bmin, bmax, count, inside = nodes[keep], bmin[keep], bmax[keep], count[keep], inside[keep]
+
+            # Tamanho na tela pelo ponto da caixa mais próximo do olho (conservador)
+            center = (bmin + bmax) * 0.5
+            half = np.linalg.norm(bmax - bmin, axis=1) * 0.5
+            w_near = center @ w_dir + w_row[3] - w_norm * half
+            with np.errstate(divide='ignore', invalid='ignore'):
+                size = np.where(w_near > 0.0, 2.0 * half * pixel_scale / w_near, np.inf)
+            small = size < min_pixels
+            if small.any():
+                merged.append(level.min_row[nodes[small]])
+                merged_count += int(count[small].sum()) - int(small.sum())
+
+            done = ~small & ((count <= self.leaf_size) | (inside & (min_pixels <= 0.0)))
+            if depth == last:
+                done = ~small
+            accepted.append((level.start[nodes[done]], count[done]))
+            rest = nodes[~small & ~done]
+            if rest.size == 0 or depth == last:
+                break
+            first = level.child_first[rest]
+            n_children = level.child_count[rest]
+            offsets = np.cumsum(n_children) - n_children
+            nodes = np.repeat(first - offsets, n_children) + np.arange(int(n_children.sum()))
+
+        starts = np.concatenate([s for s, _ in accepted])
+        counts = np.concatenate([c for _, c in accepted])
+        offsets = np.cumsum(counts) - counts
+        idx = np.repeat(starts - offsets, counts) + np.arange(int(counts.sum()))
+        rows = self.order[idx]
+        reps = np.concatenate(merged) if merged else np.zeros(0, dtype=np.int64)
+        return rows, reps, culled, merged_count
+
+
+def current_mvp() -> np.ndarray:
+    """Projeção × modelview do contexto GL atual, 4×4 para vetor coluna."""
+    projection = np.asarray(glGetDoublev(GL_PROJECTION_MATRIX), dtype=np.float64).reshape(4, 4)
+    modelview = np.asarray(glGetDoublev(GL_MODELVIEW_MATRIX), dtype=np.float64).reshape(4, 4)
+    # OpenGL devolve por colunas: a transposta do produto invertido é P · MV
+    return (modelview @ projection).T
+
+
+class FrustumCuller:
+    """
+    Octree/quadtree por modelo + resultado da última consulta em cache (refeita só quando a
+    câmera, a janela ou a margem mudam), já convertido em linhas do batch de VBO.
+    """
+
+    def __init__(self, dim: int = 3, min_pixels: float = 1.0, leaf_size: int = 32):
+        self.enabled = True
+        self.dim = dim
+        self.min_pixels = min_pixels
+        self.leaf_size = leaf_size
+        self.stats = {'drawn': 0, 'culled': 0, 'merged': 0}
+        self._tree = None       # (fonte, SegmentOctree)
+        self._next = None       # (fonte, SegmentOctree) montada por prepare() para o próximo modelo
+        self._result = None     # (chave da consulta, linhas da tabela em ordem crescente, culled, merged)
+        self._batch_rows = None  # (resultado, batch, linhas do batch em ordem crescente)
+
+    def tree(self, source, segments) -> SegmentOctree:
+        """Octree da geometria `source` (SegmentTable/Model2D); segments() -> (p0, p1) só ao reconstruir."""
+        if self._tree is None or self._tree[0] is not source:
+            prepared = self._next
+            if prepared is not None and prepared[0] is source:
+                self._tree, self._next = prepared, None
+            else:
+                with PROFILER.timer('octree_build'):
+                    p0, p1 = segments()
+                    self._tree = (source, SegmentOctree(p0, p1, self.dim, self.leaf_size))
+            self._result = None
+        return self._tree[1]
+
+    def prepare(self, source, segments):
+        """
+        Monta a octree de `source` sem mexer na que está em uso (p.ex. numa thread de carga,
+        enquanto o modelo anterior ainda é desenhado); tree(source) a adota depois.
+        """
+        current = self._tree
+        if current is not None and current[0] is source:
+            return
+        with PROFILER.timer('octree_build'):
+            p0, p1 = segments()
+            self._next = (source, SegmentOctree(p0, p1, self.dim, self.leaf_size))
+
+    def batch_rows(self, source, segments, batch, mvp: np.ndarray, width: int, height: int,
+                   margin_px: float = 0.0, visible_count=None):
+        """
+        Linhas do batch a desenhar (crescentes: cada faixa de espessura fica contígua), ou None se
+        nada foi descartado nem fundido (desenho normal do batch inteiro).
+        margin_px: meia espessura da linha mais grossa, para ramos rentes à borda não sumirem.
+        """
+        tree = self.tree(source, segments)
+        key = (mvp.tobytes(), width, height, float(margin_px), self.min_pixels)
+        if self._result is None or self._result[0] != key:
+            with PROFILER.timer('cull'):
+                planes = frustum_planes(mvp, (1.0 + 2.0 * margin_px / max(width, 1),
+                                              1.0 + 2.0 * margin_px / max(height, 1)))
+                # Linha y da MVP = escala vertical da projeção × eixo y da câmera (modelview rígida)
+                pixel_scale = 0.5 * height * float(np.linalg.norm(mvp[1, :3]))
+                rows, reps, culled, merged = tree.query(planes, pixel_scale, mvp[3], self.min_pixels)
+                rows = np.sort(np.concatenate([rows, reps]))
+            self._result = (key, rows, culled, merged)
+        _, rows, culled, merged = self._result
+        if visible_count is not None:
+            hidden = len(rows) - int(np.searchsorted(rows, visible_count))
+        else:
+            hidden = 0
+        if culled == 0 and merged == 0:
+            self._count(tree.n if visible_count is None else min(visible_count, tree.n), 0, 0)
+            return None
+        cache = self._batch_rows
+        if cache is None or cache[0] is not self._result or cache[1] is not batch:
+            order = batch.row_of_rank()[rows]
+            order.sort()
+            cache = self._batch_rows = (self._result, batch, order)
+        order = cache[2]
+        if hidden:
+            order = order[batch.rank[order] < visible_count]
+        self._count(len(order), culled, merged)
+        return order
+
+    def _count(self, drawn, culled, merged):
+        self.stats = {'drawn': drawn, 'culled': culled, 'merged': merged}
+        if PROFILER.enabled:
+            PROFILER.count('segments_culled', culled)
+            PROFILER.count('segments_merged', merged)
@@ -2,6 +2,19 @@ import os
 import glob
 import re
 
+def list_step_files(data_dir):
+    """
+    Arquivos VTK do diretório com padrão Nterm####_step####, ordenados por step.
+    Retorna: lista de (step, caminho)
+    """
+    steps = []
+    for filepath in glob.glob(os.path.join(data_dir, "*.vtk")):
+        match = re.search(r'Nterm(\d+)_step(\d+)', os.path.basename(filepath))
+        if match:
+            steps.append((int(match.group(2)), filepath))
+    steps.sort()
+    return steps
+
 def auto_detect_dataset(data_dir):
     """
     Detecta automaticamente os arquivos VTK em um diretório e determina:
@@ -0,0 +1,87 @@
+"""
+Ritmo de frames - TP1/TP2
+Os laços de render só desenham quando algo mudou (flag dirty: entrada, tick da animação, carga
+concluída) e, entre um frame e outro, esperam eventos com glfw.wait_events_timeout em vez de girar
+com poll_events: parado, o visualizador fica dormindo até o próximo evento. Com fps_cap, os frames
+são espaçados de 1/fps_cap s; o swap interval (vsync) é configurado pelo App em init_gl.
+dt vem de um relógio monotônico (perf_counter), lido uma vez por iteração.
+"""
+import time
+import glfw
+
+
+class FramePacer:
+    def __init__(self, fps_cap: float = None, idle_timeout: float = 0.5, max_dt: float = 1.0,
+                 wait_events=glfw.wait_events_timeout, poll_events=glfw.poll_events):
+        """
+        fps_cap: limite de frames por segundo (None = sem limite além do vsync).
+        idle_timeout: espera máxima sem nenhum evento (s), para o laço ainda ver window_should_close.
+        max_dt: teto do dt de um tick (janela arrastada, breakpoint): a animação não dá um salto.
+        wait_events/poll_events: funções de eventos (as do GLFW; trocáveis para medir sem janela).
+        """
+        self.fps_cap = fps_cap
+        self.idle_timeout = idle_timeout
+        self.max_dt = max_dt
+        self.dirty = True
+        self.frames = 0
+        self._wait_events = wait_events
+        self._poll_events = poll_events
+        self._last = None
+        self._next_frame = 0.0
+
+    def invalidate(self):
+        """Pede um frame (chamado pelos callbacks de entrada e quando o estado desenhado muda)."""
+        self.dirty = True
+
+    def tick(self) -> float:
+        """Segundos desde o tick anterior (0 no primeiro), limitados a max_dt."""
+        now = time.perf_counter()
+        dt = 0.0 if self._last is None else min(now - self._last, self.max_dt)
+        self._last = now
+        return dt
+
+    def should_render(self) -> bool:
+        """Há algo novo para desenhar e o limite de FPS já permite o próximo frame."""
+        return self.dirty and (not self.fps_cap or time.perf_counter() >= self._next_frame)
+
+    def frame_done(self):
+        """Marca o frame como desenhado (depois do swap) e agenda o próximo pelo fps_cap."""
+        self.dirty = False
+        self.frames += 1
+        if self.fps_cap:
+            now = time.perf_counter()
+            # Sem acumular atraso: um frame que passou do prazo não faz os seguintes saírem em rajada
+            self._next_frame = max(self._next_frame + 1.0 / self.fps_cap, now)
+
+    def wait(self, timeout: float = None):
+        """
+        Processa eventos até a próxima iteração. Com frame pendente, espera só até o fps_cap liberar
+        (sem limite: poll_events). Sem nada a desenhar, dorme até um evento ou `timeout` s
+        (p.ex. o próximo tick da animação; None = ocioso, até idle_timeout).
+        """
+        if self.dirty:
+            timeout = self._next_frame - time.perf_counter() if self.fps_cap else 0.0
+        elif timeout is None:
+            timeout = self.idle_timeout
+        else:
+            timeout = min(timeout, self.idle_timeout)
+        if timeout > 0.0:
+            self._wait_events(timeout)
+        else:
+            self._poll_events()
+
+
+def pacing_options(argv) -> tuple:
+    """
+    (swap_interval, fps_cap) de --swap-interval=N (1 = vsync, padrão; 0 = desligado) e --fps=N
+    (sem limite se ausente ou 0) na linha de comando. Lança ValueError se o valor não for número.
+    """
+    swap_interval, fps_cap = 1, None
+    for arg in argv:
+        if arg.startswith('--swap-interval='):
+            swap_interval = int(arg.split('=', 1)[1])
+        elif arg.startswith('--fps='):
+            fps_cap = float(arg.split('=', 1)[1]) or None
+    if swap_interval < 0 or (fps_cap is not None and fps_cap < 0):
+        raise ValueError("--swap-interval e --fps não podem ser negativos")
+    return swap_interval, fps_cap
@@ -0,0 +1,93 @@
+"""
+Gravação de sequências de frames (modo headless).
+A thread do GL só faz a leitura dos pixels e entrega o buffer; inversão vertical, codificação
+PNG e escrita rodam num pool de threads. Diretório: um arquivo por frame (frame_000000.png
+ou .rgb). Pipe/arquivo ('-' = stdout): frames concatenados na ordem, p.ex. para
+`ffmpeg -f rawvideo -pix_fmt rgb24 -s LxA -i - saida.mp4` (raw) ou `-f image2pipe` (png).
+"""
+import os
+import sys
+import struct
+import zlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def encode_png(rgb: np.ndarray, level: int = 6) -> bytes:
+    """PNG RGB8 de um array altura×largura×3 (linha 0 em cima), só com zlib da biblioteca padrão."""
+    h, w, _ = rgb.shape
+    raw = np.empty((h, 1 + 3 * w), dtype=np.uint8)
+    raw[:, 0] = 0  # filtro "None" em todas as linhas
+    raw[:, 1:] = rgb.reshape(h, 3 * w)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw.tobytes(), level)) + chunk(b"IEND", b""))
+
+
+class FrameWriter:
+    def __init__(self, output: str, fmt: str = 'png', workers: int = 2, max_pending: int = 8):
+        if fmt not in ('png', 'raw'):
+            raise ValueError(f"formato de frame desconhecido: {fmt}")
+        self.fmt = fmt
+        self.frames = 0
+        self.bytes_written = 0
+        # Limite de frames em voo: segura a memória se a codificação ficar para trás do GL
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frame-writer")
+
+        self.directory = None
+        self._stream = None
+        self._owns_stream = False
+        if output == '-':
+            self._stream = sys.stdout.buffer
+        elif os.path.isdir(output) or not os.path.splitext(output)[1]:
+            os.makedirs(output, exist_ok=True)
+            self.directory = output
+        else:
+            self._stream = open(output, 'wb')
+            self._owns_stream = True
+
+    def submit(self, rgba: np.ndarray):
+        """Enfileira um frame lido do GL (altura×largura×4, linha 0 embaixo). Não codifica na chamada."""
+        index = self.frames
+        self.frames += 1
+        self._pending.append(self._pool.submit(self._encode, index, rgba))
+        # Em pipe a escrita precisa sair na ordem: é feita aqui, à medida que os frames mais antigos ficam prontos
+        while len(self._pending) > self.max_pending or (self._pending and self._pending[0].done()):
+            self._finish(self._pending.popleft())
+
+    def _encode(self, index: int, rgba: np.ndarray):
+        rgb = np.ascontiguousarray(rgba[::-1, :, :3])
+        data = encode_png(rgb) if self.fmt == 'png' else rgb.tobytes()
+        if self.directory is None:
+            return data
+        ext = 'png' if self.fmt == 'png' else 'rgb'
+        with open(os.path.join(self.directory, f"frame_{index:06d}.{ext}"), 'wb') as f:
+            f.write(data)
+        with self._lock:
+            self.bytes_written += len(data)
+        return None
+
+    def _finish(self, future):
+        data = future.result()
+        if data is not None:
+            self._stream.write(data)
+            self.bytes_written += len(data)
+
+    def close(self):
+        """Espera os frames pendentes e fecha a saída."""
+        while self._pending:
+            self._finish(self._pending.popleft())
+        self._pool.shutdown(wait=True)
+        if self._stream is not None:
+            self._stream.flush()
+            if self._owns_stream:
+                self._stream.close()
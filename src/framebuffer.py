@@ -0,0 +1,63 @@
+"""
+Framebuffer offscreen (FBO com cor RGBA8 + depth em renderbuffers).
+Usado pelo picking por cor e pelo modo headless: desenha sem depender do tamanho nem da
+visibilidade da janela/superfície do contexto.
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.error import GLError
+
+
+class Framebuffer:
+    def __init__(self):
+        self.fbo = None
+        self.renderbuffers = None
+        self.width = 0
+        self.height = 0
+
+    def ensure(self, width: int, height: int, grow_only: bool = False):
+        """Cria o FBO (ou recria se o tamanho mudou; com grow_only, só se precisar crescer)."""
+        if self.fbo is not None:
+            fits = width <= self.width and height <= self.height if grow_only else \
+                (width, height) == (self.width, self.height)
+            if fits:
+                return
+        self.release()
+        self.fbo = glGenFramebuffers(1)
+        self.renderbuffers = glGenRenderbuffers(2)
+        self.width, self.height = width, height
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.renderbuffers[0])
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.renderbuffers[0])
+        glBindRenderbuffer(GL_RENDERBUFFER, self.renderbuffers[1])
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.renderbuffers[1])
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self.release()
+            raise GLError(err=status, description=b"framebuffer offscreen incompleto")
+
+    def bind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+    def unbind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def read_rgba(self, x: int = 0, y: int = 0, width: int = None, height: int = None) -> np.ndarray:
+        """Pixels RGBA8 do FBO (deve estar ligado), altura×largura×4, linha 0 embaixo (ordem do GL)."""
+        width = self.width if width is None else width
+        height = self.height if height is None else height
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        data = glReadPixels(x, y, width, height, GL_RGBA, GL_UNSIGNED_BYTE)
+        return np.frombuffer(bytes(data), dtype=np.uint8).reshape(height, width, 4)
+
+    def release(self):
+        if self.fbo is not None:
+            glDeleteFramebuffers(1, [self.fbo])
+            glDeleteRenderbuffers(2, self.renderbuffers)
+            self.fbo = None
+            self.renderbuffers = None
+            self.width = self.height = 0
@@ -0,0 +1,64 @@
+"""
+Picking por cor (GPU) - TP2
+Redesenha os ramos com a cor = id (linha da SegmentTable) num framebuffer offscreen pequeno,
+restrito à vizinhança do cursor por gluPickMatrix, e lê esses poucos pixels de volta.
+Usa os mesmos VBOs e espessuras de linha do Renderer3D: seleciona exatamente o que aparece na
+tela e o custo de leitura não depende do número de ramos.
+"""
+import math
+import numpy as np
+from OpenGL.GL import *
+from src.framebuffer import Framebuffer
+from src.segment_batch import rgba_to_rows
+from src.profiler import PROFILER
+
+
+class ColorPicker:
+    def __init__(self, radius: int = 3):
+        # Vizinhança lida: (2*radius+1)² pixels em torno do cursor (tolerância para linhas finas)
+        self.radius = radius
+        self.target = Framebuffer()
+
+    def read_rows(self, renderer, model, view_params, options, mouse_x: float, mouse_y: float) -> np.ndarray:
+        """Linhas da SegmentTable (-1 = fundo) na vizinhança do cursor, (2r+1)² (linha 0 embaixo)."""
+        # Linhas largas são recortadas pelo centro antes de engrossar: a região desenhada ganha
+        # uma margem de meia espessura máxima para os ramos vizinhos aparecerem como na tela.
+        margin = int(math.ceil(renderer.max_line_width(model, options) / 2.0)) + 1
+        read = 2 * self.radius + 1
+        size = read + 2 * margin
+        self.target.ensure(size, size, grow_only=True)
+        # Cursor em coordenadas de janela (y para baixo); OpenGL usa y para cima
+        region = (mouse_x, renderer.height - mouse_y, size, size)
+        self.target.bind()
+        try:
+            glViewport(0, 0, size, size)
+            glClearColor(0.0, 0.0, 0.0, 0.0)
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            renderer.render_ids(model, view_params, options, pick_region=region)
+            pixels = self.target.read_rgba(margin, margin, read, read)
+        finally:
+            self.target.unbind()
+            glViewport(0, 0, renderer.width, renderer.height)
+        return rgba_to_rows(pixels)
+
+    def pick(self, renderer, model, view_params, options, mouse_x: float, mouse_y: float) -> int:
+        """Id do ramo desenhado sob o cursor (ou o mais próximo dele na vizinhança), ou -1."""
+        if not model or not len(model.segment_table):
+            return -1
+        with PROFILER.timer('pick'):
+            row = nearest_row(self.read_rows(renderer, model, view_params, options, mouse_x, mouse_y))
+        table = model.segment_table
+        return int(table.ids[row]) if 0 <= row < len(table) else -1
+
+    def release(self):
+        self.target.release()
+
+
+def nearest_row(rows: np.ndarray) -> int:
+    """Valor não-fundo mais próximo do centro da janela de pixels, ou -1."""
+    h, w = rows.shape
+    yy, xx = np.mgrid[0:h, 0:w]
+    dist2 = (yy - h // 2) ** 2 + (xx - w // 2) ** 2
+    dist2 = np.where(rows >= 0, dist2, np.iinfo(np.int64).max)
+    k = int(np.argmin(dist2))
+    return int(rows.flat[k]) if rows.flat[k] >= 0 else -1
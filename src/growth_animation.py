@@ -0,0 +1,132 @@
+"""
+Animação de crescimento por tempo - TP1/TP2
+A posição da animação é um tempo t (s) dentro da árvore atual; visible_count (prefixo da ordem BFS,
+que os renderers em lote usam só como limite do intervalo desenhado) sai de t em O(1):
+    visible_count = 1 + floor(easing(t / duração) × (total - 1))
+e o caminho inverso (time_of) também é O(1), então buscar qualquer ponto é só trocar t.
+Cada frame avança t pelo dt do relógio: a velocidade não depende do FPS, e com árvores grandes
+entram milhares de ramos por frame. A duração vem de `speed` (ramos/s, como antes) ou de um alvo
+fixo (`duration`: a árvore inteira em N s, qualquer que seja o tamanho).
+"""
+import math
+
+
+def _smoothstep_inverse(y: float) -> float:
+    return 0.5 - math.sin(math.asin(1.0 - 2.0 * y) / 3.0)
+
+
+# nome -> (easing de [0, 1] em [0, 1], inversa)
+EASINGS = {
+    'linear': (lambda p: p, lambda y: y),
+    'in': (lambda p: p * p, math.sqrt),
+    'out': (lambda p: 1.0 - (1.0 - p) ** 2, lambda y: 1.0 - math.sqrt(1.0 - y)),
+    'in_out': (lambda p: p * p * (3.0 - 2.0 * p), _smoothstep_inverse),
+}
+
+
+class GrowthAnimation:
+    def __init__(self, speed: float = 2.0, duration: float = None, easing: str = 'linear'):
+        """
+        speed: ramos por segundo (média, com easing) quando não há duration.
+        duration: segundos para a árvore inteira (None = total / speed).
+        easing: uma das chaves de EASINGS.
+        """
+        if easing not in EASINGS:
+            raise ValueError(f"easing desconhecido: {easing!r} (use {', '.join(EASINGS)})")
+        if speed <= 0:
+            raise ValueError(f"speed tem que ser positivo: {speed!r}")
+        self.speed = speed
+        self.duration = duration
+        self.easing = easing
+        self.total = 0
+        self.count = 0     # último visible_count calculado
+        self.time = 0.0
+
+    def length(self) -> float:
+        """Duração (s) de 1 ramo até a árvore inteira."""
+        if self.duration:
+            return self.duration
+        return (self.total - 1) / self.speed if self.speed > 0 else math.inf
+
+    def count_at(self, t: float) -> int:
+        """visible_count no tempo t (O(1)), entre 1 e total."""
+        if self.total <= 1:
+            return self.total
+        length = self.length()
+        p = 1.0 if length <= 0 else min(max(t / length, 0.0), 1.0)
+        # Folga de arredondamento: time_of(k) tem que dar exatamente k de volta
+        return 1 + min(int(EASINGS[self.easing][0](p) * (self.total - 1) + 1e-9), self.total - 1)
+
+    def time_of(self, count: int) -> float:
+        """Primeiro tempo em que visible_count chega a `count` (inversa de count_at, O(1))."""
+        length = self.length()
+        if self.total <= 1 or math.isinf(length):
+            return 0.0   # speed zerada depois de criada: a animação fica parada no começo
+        y = min(max((count - 1) / (self.total - 1), 0.0), 1.0)
+        return EASINGS[self.easing][1](y) * length
+
+    def sync(self, total: int, count: int):
+        """
+        Alinha o tempo a um visible_count mudado fora da animação (teclas, scrub, step novo).
+        Não faz nada se (total, count) for o que a própria animação produziu por último.
+        """
+        if total != self.total or count != self.count:
+            self.total = total
+            self.seek_count(count)
+
+    def seek(self, t: float) -> int:
+        """Vai para o tempo t (limitado à duração); retorna o visible_count."""
+        self.time = min(max(t, 0.0), self.length())
+        self.count = self.count_at(self.time)
+        return self.count
+
+    def seek_count(self, count: int) -> int:
+        return self.seek(self.time_of(count))
+
+    def advance(self, dt: float) -> int:
+        """Avança dt segundos; retorna o visible_count (pode pular muitos ramos de uma vez)."""
+        return self.seek(self.time + dt)
+
+    @property
+    def finished(self) -> bool:
+        return self.time >= self.length()
+
+    def next_change(self) -> float:
+        """Segundos até o visible_count mudar (para o laço dormir até lá); None se não vai mudar."""
+        if math.isinf(self.length()):
+            return None
+        if self.finished:
+            return 0.0
+        return max(0.0, self.time_of(self.count + 1) - self.time)
+
+    def scale_rate(self, factor: float):
+        """Acelera (factor > 1) ou desacelera mantendo o ramo atual: speed × factor ou duration / factor."""
+        count = self.count
+        if self.duration:
+            self.duration /= factor
+        else:
+            self.speed *= factor
+        self.seek_count(count)
+
+    def rate(self) -> float:
+        """Ramos por segundo em média sobre a árvore inteira."""
+        length = self.length()
+        return (self.total - 1) / length if 0 < length < math.inf else self.speed
+
+
+def animation_options(argv) -> tuple:
+    """
+    (duration, easing) de --duration=S (a árvore inteira em S s; ausente ou 0 = 2 ramos/s) e
+    --easing=NOME (chave de EASINGS) na linha de comando. Lança ValueError se algum for inválido.
+    """
+    duration, easing = None, 'linear'
+    for arg in argv:
+        if arg.startswith('--duration='):
+            duration = float(arg.split('=', 1)[1]) or None
+        elif arg.startswith('--easing='):
+            easing = arg.split('=', 1)[1]
+    if duration is not None and duration < 0:
+        raise ValueError("--duration não pode ser negativo")
+    if easing not in EASINGS:
+        raise ValueError(f"--easing desconhecido: {easing!r} (use {', '.join(EASINGS)})")
+    return duration, easing
@@ -0,0 +1,159 @@
+"""
+Modo headless - TP1/TP2
+Renderiza a animação de crescimento (visible_count = 1..N em cada step) sem janela visível,
+para relatórios e imagens de regressão. O desenho vai para um FBO (src/framebuffer.py) do
+tamanho pedido; o contexto vem de uma janela GLFW invisível (precisa de display) ou de EGL
+offscreen (sem display; com Mesa, cai na rasterização por software llvmpipe se não houver GPU).
+A leitura de cada frame é entregue ao FrameWriter, que codifica/grava em threads.
+
+O backend do PyOpenGL é fixado no primeiro import de OpenGL: o ponto de entrada
+(src/main_headless.py) configura o ambiente antes de importar este módulo.
+"""
+import os
+import time
+import ctypes
+from OpenGL.GL import *
+from src.framebuffer import Framebuffer
+from src.dataset_utils import list_step_files
+from src.step_cache import StepCache
+
+# Mesmas cores de fundo de App (2D) e App3D
+_BACKGROUND = {'2d': (0.0, 0.0, 0.0), '3d': (0.08, 0.08, 0.12)}
+
+
+class GlfwContext:
+    """Contexto de uma janela GLFW invisível."""
+
+    def __init__(self):
+        import glfw
+        self._glfw = glfw
+        if not glfw.init():
+            raise RuntimeError("glfw.init() falhou (sem display?); use --backend egl")
+        glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+        self.window = glfw.create_window(64, 64, "headless", None, None)
+        if not self.window:
+            glfw.terminate()
+            raise RuntimeError("não foi possível criar a janela GLFW invisível")
+        glfw.make_context_current(self.window)
+
+    def release(self):
+        self._glfw.destroy_window(self.window)
+        self._glfw.terminate()
+
+
+class EglContext:
+    """Contexto OpenGL (perfil de compatibilidade) via EGL com uma pbuffer mínima; sem display."""
+
+    def __init__(self):
+        from OpenGL import EGL
+        self._egl = EGL
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize falhou")
+        attribs = (EGL.EGLint * 11)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                    EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+                                    EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        n_configs = EGL.EGLint()
+        if not EGL.eglChooseConfig(self.display, attribs, ctypes.pointer(config), 1,
+                                   ctypes.pointer(n_configs)) or n_configs.value == 0:
+            raise RuntimeError("nenhuma configuração EGL com OpenGL")
+        # Desenho vai para o FBO; a pbuffer só existe para tornar o contexto corrente
+        surface_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, 16, EGL.EGL_HEIGHT, 16, EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(self.display, config, surface_attribs)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if not self.context or not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+            raise RuntimeError("não foi possível criar/ativar o contexto EGL")
+
+    def release(self):
+        EGL = self._egl
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglDestroySurface(self.display, self.surface)
+        EGL.eglTerminate(self.display)
+
+
+def create_context(backend: str):
+    return EglContext() if backend == 'egl' else GlfwContext()
+
+
+def growth_counts(n_segments: int, stride: int = 1, final_only: bool = False) -> list:
+    """visible_count de cada frame da animação de um step: stride, 2·stride, ..., sempre terminando em N."""
+    if n_segments <= 0:
+        return []
+    if final_only:
+        return [n_segments]
+    counts = list(range(stride, n_segments, stride))
+    return counts + [n_segments]
+
+
+def _dataset_kind(filepath: str) -> str:
+    return '3d' if 'tree3D' in os.path.basename(filepath) else '2d'
+
+
+def render_dataset(data_dir: str, writer, width: int = 800, height: int = 600, stride: int = 1,
+                   final_only: bool = False, options=None, progress=print) -> dict:
+    """
+    Renderiza todos os steps de data_dir (ordem crescente) no contexto GL corrente e envia cada
+    frame ao writer. O próximo step é carregado em background (StepCache) enquanto o atual é desenhado.
+    Retorna estatísticas (frames, steps, tempo de desenho+leitura e total).
+    """
+    files = [path for _, path in list_step_files(data_dir)]
+    if not files:
+        raise ValueError(f"Nenhum arquivo VTK encontrado em {data_dir}")
+    kind = _dataset_kind(files[0])
+    if kind == '3d':
+        from src.vtk_loader_3d import load_vtk_3d as loader
+        from src.renderer3d import Renderer3D as RendererClass
+        from src.app3d import default_view_params, fit_view
+    else:
+        from src.vtk_loader import load_vtk as loader
+        from src.renderer import Renderer as RendererClass
+        from src.app import default_view_params
+        fit_view = None
+
+    renderer = RendererClass()
+    target = Framebuffer()
+    target.ensure(width, height)
+    target.bind()
+    renderer.resize(width, height)
+    cache = StepCache(loader)
+    background = _BACKGROUND[kind]
+    render_time = 0.0
+    frames = 0
+    t_start = time.perf_counter()
+    try:
+        for i, filepath in enumerate(files):
+            cache.prefetch(files[i + 1:i + 2])
+            model = cache.get(filepath)
+            if model is None:
+                progress(f"  ignorado (falha ao carregar): {filepath}")
+                continue
+            n = len(model.segment_table) if kind == '3d' else len(model.segments)
+            view_params = default_view_params()
+            if fit_view is not None:
+                fit_view(view_params, model)
+            counts = growth_counts(n, stride, final_only)
+            progress(f"{os.path.basename(filepath)}: {n} segmentos, {len(counts)} frames")
+            for count in counts:
+                t0 = time.perf_counter()
+                model.visible_count = None if count == n else count
+                glClearColor(*background, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                if kind == '3d':
+                    renderer.render(model, view_params, options)
+                else:
+                    renderer.render(model, view_params)
+                pixels = target.read_rgba()
+                render_time += time.perf_counter() - t0
+                writer.submit(pixels)
+                frames += 1
+            model.visible_count = None
+    finally:
+        cache.shutdown()
+        target.unbind()
+        target.release()
+    return {'frames': frames, 'steps': len(files), 'render_s': render_time,
+            'total_s': time.perf_counter() - t_start}
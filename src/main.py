@@ -9,6 +9,8 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.app import App
+from src.frame_pacer import pacing_options
+from src.growth_animation import animation_options
 
 def main():
     # Caminho padrão para os dados (relativo à raiz do projeto)
@@ -16,9 +18,21 @@ def main():
     
     base_data_path = os.path.join("TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados", "TP1_2D", "Nterm_256")
     
+    # Opções: --swap-interval=N (1 = vsync, 0 = desligado) e --fps=N (limite de frames por segundo);
+    # --duration=S (árvore inteira em S s) e --easing=linear|in|out|in_out (animação)
+    try:
+        swap_interval, fps_cap = pacing_options(sys.argv[1:])
+        animation_duration, animation_easing = animation_options(sys.argv[1:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    # --no-timeline: lê cada step do arquivo, sem construir o índice da timeline em background
+    use_timeline = '--no-timeline' not in sys.argv[1:]
+
     # Verifica se foi passado um caminho via linha de comando
-    if len(sys.argv) > 1:
-        arg_path = sys.argv[1]
+    if args:
+        arg_path = args[0]
         if os.path.exists(arg_path):
             base_data_path = arg_path
             print(f"Usando caminho fornecido: {base_data_path}")
@@ -38,11 +52,15 @@ def main():
     from src.dataset_utils import auto_detect_dataset
     try:
         n_term, initial_step, step_inc = auto_detect_dataset(base_data_path)
-        app = App(base_data_path, n_term_str=n_term, initial_step=initial_step, step_inc=step_inc)
+        app = App(base_data_path, n_term_str=n_term, initial_step=initial_step, step_inc=step_inc,
+                  use_timeline=use_timeline, swap_interval=swap_interval, fps_cap=fps_cap,
+                  animation_duration=animation_duration, animation_easing=animation_easing)
     except Exception as e:
         print(f"Erro ao detectar dataset automaticamente: {e}")
         print("Usando parâmetros padrão...")
-        app = App(base_data_path, n_term_str="064", initial_step=8, step_inc=8)
+        app = App(base_data_path, n_term_str="064", initial_step=8, step_inc=8,
+                  use_timeline=use_timeline, swap_interval=swap_interval, fps_cap=fps_cap,
+                  animation_duration=animation_duration, animation_easing=animation_easing)
     
     if app.init_gl():
         app.run()
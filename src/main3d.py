@@ -11,14 +11,41 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.app3d import App3D
+from src.vtk_loader_3d import RADIUS_MODES
 from src.dataset_utils import auto_detect_dataset
+from src.frame_pacer import pacing_options
+from src.growth_animation import animation_options
 
 
 def main():
     base_path = os.path.join("TP_CCO_Pacote_Dados", "TP_CCO_Pacote_Dados", "TP2_3D", "Nterm_128")
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    # --gpu-pick: picking por cor-id no framebuffer em vez de ray cast (também alternável com P)
+    pick_mode = 'gpu' if '--gpu-pick' in sys.argv[1:] else 'ray'
+    # --tubes: ramos como tubos instanciados em vez de linhas (também alternável com G)
+    tubes = '--tubes' in sys.argv[1:]
+    # --lod: subárvores pequenas na tela desenhadas como um ramo representante (também alternável com L)
+    lod = '--lod' in sys.argv[1:]
+    # --no-timeline: steps por delta/arquivo, sem construir o índice da timeline em background
+    use_timeline = '--no-timeline' not in sys.argv[1:]
+    # --verify-delta: confere cada step montado por delta com a recarga completa (só sem a timeline)
+    verify_delta = '--verify-delta' in sys.argv[1:]
+    # --radius=mean|max|parent|murray: regra do raio por ponto ao carregar (padrão: média)
+    radius_mode = next((a.split('=', 1)[1] for a in sys.argv[1:] if a.startswith('--radius=')), 'mean')
+    if radius_mode not in RADIUS_MODES:
+        print(f"Erro: --radius deve ser um de {', '.join(RADIUS_MODES)}")
+        return
+    # --swap-interval=N (1 = vsync, 0 = desligado) e --fps=N (limite de frames por segundo);
+    # --duration=S (árvore inteira em S s) e --easing=linear|in|out|in_out (animação)
+    try:
+        swap_interval, fps_cap = pacing_options(sys.argv[1:])
+        animation_duration, animation_easing = animation_options(sys.argv[1:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
 
-    if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
-        base_path = sys.argv[1]
+    if args and os.path.exists(args[0]):
+        base_path = args[0]
         print(f"Usando: {base_path}")
 
     if not os.path.exists(base_path):
@@ -27,11 +54,20 @@ def main():
 
     try:
         n_term, initial_step, step_inc = auto_detect_dataset(base_path)
-        app = App3D(base_path, n_term_str=n_term, initial_step=initial_step, step_inc=step_inc)
+        app = App3D(base_path, n_term_str=n_term, initial_step=initial_step, step_inc=step_inc,
+                    pick_mode=pick_mode, use_timeline=use_timeline, radius_mode=radius_mode,
+                    swap_interval=swap_interval, fps_cap=fps_cap,
+                    animation_duration=animation_duration, animation_easing=animation_easing)
     except Exception as e:
         print(f"Erro ao detectar dataset: {e}")
-        app = App3D(base_path, n_term_str="128", initial_step=16, step_inc=16)
+        app = App3D(base_path, n_term_str="128", initial_step=16, step_inc=16, pick_mode=pick_mode,
+                    use_timeline=use_timeline, radius_mode=radius_mode, swap_interval=swap_interval,
+                    fps_cap=fps_cap,
+                    animation_duration=animation_duration, animation_easing=animation_easing)
 
+    app.renderer.tubes = tubes
+    app.renderer.lod = lod
+    app.verify_delta = verify_delta
     if app.init_gl():
         app.run()
     else:
@@ -0,0 +1,72 @@
+"""
+TP1/TP2 - Análise em lote (sem janela)
+Calcula as estatísticas de cada arquivo VTK dos diretórios dados (p.ex. vários Nterm_*),
+distribuindo os arquivos por um pool de processos, e grava uma tabela CSV, JSON ou Parquet
+(uma linha por arquivo; colunas em src/batch_stats.py).
+
+Exemplos:
+    python src/main_batch.py TP_CCO_Pacote_Dados/TP_CCO_Pacote_Dados --out stats.csv
+    python src/main_batch.py TP_CCO_Pacote_Dados/TP_CCO_Pacote_Dados/TP2_3D/Nterm_* --out stats.parquet --workers 8
+    python src/main_batch.py <dir> --out - | column -s, -t
+"""
+import os
+import sys
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.batch_stats import (find_vtk_files, collect_stats, output_format, write_table,
+                             STATUS_INVALID, STATUS_ERROR)
+from src.vtk_loader_3d import RADIUS_MODES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help="diretórios (percorridos recursivamente) ou arquivos .vtk")
+    parser.add_argument('--out', default='stats.csv', help="arquivo .csv/.json/.parquet, ou '-' para CSV no stdout")
+    parser.add_argument('--format', choices=['csv', 'json', 'parquet'], help="padrão: pela extensão de --out")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processos (1 = sem pool)")
+    parser.add_argument('--batch-size', type=int, help="arquivos por tarefa (padrão: automático)")
+    parser.add_argument('--cache', action='store_true', help="usa/grava o .vtk.cache ao lado de cada arquivo")
+    parser.add_argument('--radius', choices=RADIUS_MODES, default='mean', help="regra do raio por ponto")
+    args = parser.parse_args()
+
+    files = find_vtk_files(args.paths)
+    if not files:
+        parser.error("nenhum arquivo .vtk encontrado")
+    try:
+        fmt = output_format(args.out, args.format)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+
+    # Progresso no stderr: o stdout pode ser a própria tabela (--out -)
+    def progress(done, total):
+        print(f"\r  {done}/{total} arquivos", end='', file=sys.stderr, flush=True)
+
+    t0 = time.perf_counter()
+    table = collect_stats(files, workers=args.workers, batch_size=args.batch_size, use_cache=args.cache,
+                          radius_mode=args.radius, progress=progress)
+    elapsed = time.perf_counter() - t0
+    print(file=sys.stderr)
+    try:
+        write_table(args.out, files, table, fmt)
+    except OSError as e:
+        print(f"Erro ao gravar {args.out}: {e}", file=sys.stderr)
+        return 1
+
+    invalid = int((table['status'] == STATUS_INVALID).sum())
+    errors = int((table['status'] == STATUS_ERROR).sum())
+    print(f"{len(files)} arquivos em {elapsed:.2f} s ({len(files) / max(elapsed, 1e-9):.0f} arquivos/s, "
+          f"{args.workers} processos): {int(table['segments'].sum())} segmentos, "
+          f"{invalid} árvores inválidas, {errors} erros de leitura", file=sys.stderr)
+    if args.out != '-':
+        print(f"Tabela: {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+TP1/TP2 - Renderização headless da animação de crescimento
+Percorre todos os steps de um diretório do dataset (2D ou 3D, detectado pelo nome dos
+arquivos), desenha cada frame da animação e grava PNG/raw num diretório ou num pipe.
+
+Exemplos:
+    python src/main_headless.py TP_CCO_Pacote_Dados/TP_CCO_Pacote_Dados/TP2_3D/Nterm_128 --out frames/
+    python src/main_headless.py <dir> --out - --format raw --size 1280x720 | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 1280x720 -r 30 -i - crescimento.mp4
+"""
+import os
+import sys
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+def configure_platform(backend: str = 'auto', software: bool = False) -> str:
+    """
+    Escolhe o backend ('glfw' ou 'egl') e prepara o ambiente; precisa rodar antes de importar OpenGL.
+    'auto' usa GLFW (janela invisível) se houver display X11/Wayland e EGL caso contrário.
+    software=True força o rasterizador de CPU do Mesa (LIBGL_ALWAYS_SOFTWARE).
+    """
+    has_display = bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    if backend == 'auto':
+        backend = 'glfw' if has_display else 'egl'
+    if backend == 'egl':
+        os.environ['PYOPENGL_PLATFORM'] = 'egl'
+        if not has_display:
+            os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+    if software:
+        os.environ['LIBGL_ALWAYS_SOFTWARE'] = '1'
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data_dir', help="diretório com os arquivos VTK de um Nterm")
+    parser.add_argument('--out', default='frames', help="diretório de saída, arquivo, ou '-' para stdout")
+    parser.add_argument('--format', choices=['png', 'raw'], default='png', help="raw = RGB24 sem cabeçalho")
+    parser.add_argument('--size', default='800x600', help="LARGURAxALTURA em pixels")
+    parser.add_argument('--stride', type=int, default=1, help="segmentos adicionados por frame")
+    parser.add_argument('--final-only', action='store_true', help="um frame por step (árvore completa)")
+    parser.add_argument('--backend', choices=['auto', 'glfw', 'egl'], default='auto')
+    parser.add_argument('--software', action='store_true', help="força rasterização por software (Mesa)")
+    parser.add_argument('--workers', type=int, default=2, help="threads de codificação/gravação")
+    args = parser.parse_args()
+
+    try:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+    except ValueError:
+        parser.error(f"--size inválido: {args.size}")
+    if not os.path.isdir(args.data_dir):
+        parser.error(f"diretório não encontrado: {args.data_dir}")
+
+    backend = configure_platform(args.backend, args.software)
+    # Imports com OpenGL só depois de escolher o backend
+    from src.headless import create_context, render_dataset
+    from src.frame_writer import FrameWriter
+
+    # Com saída em stdout, as mensagens vão para stderr
+    log = sys.stderr if args.out == '-' else sys.stdout
+
+    def progress(msg):
+        print(msg, file=log)
+
+    try:
+        context = create_context(backend)
+    except RuntimeError as e:
+        print(f"Falha ao criar contexto OpenGL ({backend}): {e}", file=sys.stderr)
+        sys.exit(1)
+
+    from OpenGL.GL import glGetString, GL_RENDERER
+    progress(f"Backend: {backend} ({glGetString(GL_RENDERER).decode()}), {width}x{height}")
+    writer = FrameWriter(args.out, args.format, workers=args.workers)
+    try:
+        stats = render_dataset(args.data_dir, writer, width, height, stride=max(1, args.stride),
+                               final_only=args.final_only, progress=progress)
+    finally:
+        writer.close()
+        context.release()
+    progress(f"{stats['frames']} frames de {stats['steps']} steps em {stats['total_s']:.1f} s "
+             f"(desenho+leitura {stats['render_s']:.1f} s, {writer.bytes_written / 2**20:.1f} MB gravados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,29 @@
 import numpy as np
+from src.profiler import PROFILER
 
 class Model2D:
     def __init__(self):
-        self.vertices = []  # List of [x, y, z] (z=0 for 2D)
-        self.segments = []  # List of [start_index, end_index]
-        self.radii = []     # List of float radius per segment
+        self.vertices = np.zeros((0, 3), dtype=np.float32)  # (N, 3) array of [x, y, z] (z=0 for 2D)
+        self.segments = np.zeros((0, 2), dtype=np.int32)    # (M, 2) array of [start_index, end_index]
+        self.radii = np.zeros(0, dtype=np.float32)          # (M,) float radius per segment
         self.bounds = None  # (min_x, max_x, min_y, max_y)
         self.visible_count = None  # None = show all, int = show first N segments
 
     def compute_bounds(self):
-        if not self.vertices:
+        if len(self.vertices) == 0:
             return
         
-        verts = np.array(self.vertices)
-        min_vals = np.min(verts, axis=0)
-        max_vals = np.max(verts, axis=0)
+        with PROFILER.timer('bounds'):
+            min_vals = np.min(self.vertices, axis=0)
+            max_vals = np.max(self.vertices, axis=0)
         
         # simple margin
         self.bounds = (min_vals[0], max_vals[0], min_vals[1], max_vals[1])
         
+    def nbytes(self):
+        """Approximate memory footprint (used by the step cache budget)."""
+        return self.vertices.nbytes + self.segments.nbytes + self.radii.nbytes
+
     def get_center(self):
         if not self.bounds:
             self.compute_bounds()
@@ -1,11 +1,20 @@
 """
 Modelo 3D para árvore arterial - TP2
-Estrutura explícita: parent_of, children_of, root.
+Estrutura explícita em arrays (CSR): parent, child_offsets/child_index, bfs_order, root.
+parent_of/children_of continuam disponíveis como dicts construídos sob demanda.
+Ramos em colunas (SegmentTable); segment_list é uma visão preguiçosa de Segment por linha.
 Validação: grafo acíclico, cada nó (exceto raiz) tem exatamente 1 pai.
 """
 import numpy as np
+from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Optional
+from src.profiler import PROFILER
+from src.subtree_lod import SubtreeSummary
+
+# Bits de SegmentTable.flags
+SEG_ROOT = 1
+SEG_LEAF = 2
 
 
 @dataclass
@@ -25,124 +34,272 @@ class Segment:
     is_leaf_segment: bool
 
 
+class SegmentTable:
+    """
+    Ramos da árvore em colunas (arrays contíguos), em ordem BFS: a linha k é o k-ésimo
+    ramo da animação de crescimento. Substitui a lista de Segment (um objeto e três
+    arrays pequenos por ramo) por ~70 bytes por ramo.
+    """
+
+    def __init__(self, n: int = 0):
+        self.ids = np.zeros(n, dtype=np.int32)          # id do segmento (índice nas lines)
+        self.i0 = np.zeros(n, dtype=np.int32)           # nó pai
+        self.i1 = np.zeros(n, dtype=np.int32)           # nó filho
+        self.p0 = np.zeros((n, 3), dtype=np.float32)
+        self.p1 = np.zeros((n, 3), dtype=np.float32)
+        self.r0 = np.zeros(n, dtype=np.float32)
+        self.r1 = np.zeros(n, dtype=np.float32)
+        self.length = np.zeros(n, dtype=np.float32)
+        self.dir = np.zeros((n, 3), dtype=np.float32)
+        self.depth = np.zeros(n, dtype=np.int32)
+        self.flags = np.zeros(n, dtype=np.uint8)        # SEG_ROOT | SEG_LEAF
+        self.row_of_id = np.zeros(n, dtype=np.int32)    # inverso de ids: id -> linha
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def is_root_segment(self) -> np.ndarray:
+        return (self.flags & SEG_ROOT) != 0
+
+    @property
+    def is_leaf_segment(self) -> np.ndarray:
+        return (self.flags & SEG_LEAF) != 0
+
+    def find(self, seg_id: int) -> int:
+        """Linha do segmento com esse id, ou -1."""
+        if 0 <= seg_id < len(self.row_of_id):
+            return int(self.row_of_id[seg_id])
+        return -1
+
+    def row(self, k: int) -> Segment:
+        """Monta o Segment da linha k (p0/p1/dir são views das colunas)."""
+        flags = int(self.flags[k])
+        return Segment(
+            id=int(self.ids[k]), i0=int(self.i0[k]), i1=int(self.i1[k]),
+            p0=self.p0[k], p1=self.p1[k], r0=float(self.r0[k]), r1=float(self.r1[k]),
+            length=float(self.length[k]), dir=self.dir[k], depth=int(self.depth[k]),
+            is_root_segment=bool(flags & SEG_ROOT), is_leaf_segment=bool(flags & SEG_LEAF)
+        )
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.ids, self.i0, self.i1, self.p0, self.p1, self.r0, self.r1,
+                                      self.length, self.dir, self.depth, self.flags, self.row_of_id))
+
+
+class SegmentListView(Sequence):
+    """segment_list como visão preguiçosa da SegmentTable: cada acesso monta o Segment da linha."""
+
+    def __init__(self, table: SegmentTable):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self._table.row(i) for i in range(*k.indices(len(self._table)))]
+        if k < 0:
+            k += len(self._table)
+        if not 0 <= k < len(self._table):
+            raise IndexError(k)
+        return self._table.row(k)
+
+
 class Model3D:
     def __init__(self):
         self.points: np.ndarray = np.zeros((0, 3))
-        self.segments: List[Tuple[int, int]] = []
+        self.segments: np.ndarray = np.zeros((0, 2), dtype=np.int32)
         self.radius_point: np.ndarray = np.zeros(0)
-        self.segment_list: List[Segment] = []
+        self.segment_table: SegmentTable = SegmentTable()
         self.bounds: Optional[Tuple[float, float, float, float, float, float]] = None
         self.target: np.ndarray = np.zeros(3)
         self.max_depth: int = 0
         self.visible_count: Optional[int] = None
 
-        self.parent_of: Dict[int, int] = {}
-        self.children_of: Dict[int, List[int]] = {}
+        # Topologia em arrays (CSR): filhos do nó v em child_index[child_offsets[v]:child_offsets[v + 1]],
+        # na ordem das lines; child_segment guarda o id do segmento de cada aresta.
+        self.parent: np.ndarray = np.zeros(0, dtype=np.int32)          # pai de cada nó (-1 = nenhum)
+        self.child_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.child_index: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.child_segment: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.bfs_order: np.ndarray = np.zeros(0, dtype=np.int32)       # ids de segmento em ordem BFS
+        self.segment_depth: np.ndarray = np.zeros(0, dtype=np.int32)   # depth por id de segmento
+        self._parent_of: Optional[Dict[int, int]] = None
+        self._children_of: Optional[Dict[int, List[int]]] = None
+        self._subtree_summary = None   # SubtreeSummary (LOD por subárvore), sob demanda
         self.root: int = 0
         self.is_valid_tree: bool = False
 
     def compute_bounds(self):
         if len(self.points) == 0:
             return
-        min_vals = np.min(self.points, axis=0)
-        max_vals = np.max(self.points, axis=0)
+        with PROFILER.timer('bounds'):
+            min_vals = np.min(self.points, axis=0)
+            max_vals = np.max(self.points, axis=0)
         self.bounds = (min_vals[0], max_vals[0], min_vals[1], max_vals[1], min_vals[2], max_vals[2])
         self.target = (min_vals + max_vals) / 2.0
 
+    @property
+    def segment_list(self) -> SegmentListView:
+        """Ramos em ordem BFS como Segment (visão preguiçosa de segment_table)."""
+        return SegmentListView(self.segment_table)
+
+    def nbytes(self) -> int:
+        """Memória do modelo (todos os dados estão em arrays)."""
+        topology = (self.parent, self.child_offsets, self.child_index, self.child_segment,
+                    self.bfs_order, self.segment_depth)
+        arrays = self.points.nbytes + self.segments.nbytes + self.radius_point.nbytes
+        return arrays + sum(a.nbytes for a in topology) + self.segment_table.nbytes()
+
+    @property
+    def parent_of(self) -> Dict[int, int]:
+        """Visão dict de parent (filho -> pai), construída no primeiro acesso."""
+        if self._parent_of is None:
+            children = np.nonzero(self.parent >= 0)[0]
+            self._parent_of = dict(zip(children.tolist(), self.parent[children].tolist()))
+        return self._parent_of
+
+    @property
+    def children_of(self) -> Dict[int, List[int]]:
+        """Visão dict do CSR (pai -> lista de filhos), construída no primeiro acesso."""
+        if self._children_of is None:
+            offsets = self.child_offsets.tolist()
+            children = self.child_index.tolist()
+            self._children_of = {
+                v: children[offsets[v]:offsets[v + 1]]
+                for v in np.nonzero(np.diff(self.child_offsets))[0].tolist()
+            }
+        return self._children_of
+
+    def subtree_summary(self):
+        """Resumo de cada subárvore para o LOD (src/subtree_lod.py), calculado na primeira chamada."""
+        summary = self._subtree_summary
+        if summary is None or summary.table is not self.segment_table:
+            with PROFILER.timer('subtree_build'):
+                summary = self._subtree_summary = SubtreeSummary(self)
+        return summary
+
+    def child_count(self) -> np.ndarray:
+        """Número de filhos de cada nó."""
+        return np.diff(self.child_offsets)
+
+    def bifurcation_count(self) -> int:
+        return int(np.count_nonzero(self.child_count() >= 2))
+
     def _build_tree_structure(self) -> bool:
         """
-        Constrói parent_of e children_of a partir das lines.
+        Constrói parent e o CSR de filhos a partir das lines, e percorre a árvore em BFS
+        por níveis (bfs_order, segment_depth). Tudo em arrays: O(N).
         Detecta raiz: nó que nunca aparece como filho.
         Valida: sem ciclos, cada nó (exceto raiz) tem exatamente 1 pai.
         """
-        self.parent_of = {}
-        self.children_of = {}
-        all_children = set()
-        parent_candidates = {}
-
-        for i0, i1 in self.segments:
-            all_children.add(i1)
-            if i0 not in self.children_of:
-                self.children_of[i0] = []
-            self.children_of[i0].append(i1)
-            if i1 in parent_candidates and parent_candidates[i1] != i0:
-                return False
-            parent_candidates[i1] = i0
-
-        roots = [i0 for i0, _ in self.segments if i0 not in all_children]
+        self.is_valid_tree = False
+        self._parent_of = None
+        self._children_of = None
+
+        segs = np.asarray(self.segments, dtype=np.int64).reshape(-1, 2)
+        i0, i1 = segs[:, 0], segs[:, 1]
+        n_nodes = max(len(self.points), int(segs.max()) + 1 if len(segs) else 0)
+
+        # CSR: filhos agrupados por pai; argsort estável mantém a ordem das lines
+        order = np.argsort(i0, kind='stable')
+        self.child_offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(i0, minlength=n_nodes), out=self.child_offsets[1:])
+        self.child_index = i1[order].astype(np.int32)
+        self.child_segment = order.astype(np.int32)
+        self.parent = np.full(n_nodes, -1, dtype=np.int32)
+        self.parent[i1] = i0
+        self.bfs_order = np.zeros(0, dtype=np.int32)
+        self.segment_depth = np.zeros(len(segs), dtype=np.int32)
+
+        if len(segs) == 0:
+            return False
+        # Nó com mais de um pai (ou line repetida)
+        if np.bincount(i1, minlength=n_nodes).max() > 1:
+            return False
+        is_child = np.zeros(n_nodes, dtype=bool)
+        is_child[i1] = True
+        roots = np.unique(i0[~is_child[i0]])
         if len(roots) != 1:
             return False
-        self.root = roots[0]
-        self.parent_of = parent_candidates
-
-        visited = {self.root}
-        queue = [self.root]
-        while queue:
-            node = queue.pop(0)
-            for child in self.children_of.get(node, []):
-                if child in visited:
-                    return False
-                visited.add(child)
-                queue.append(child)
-
-        if len(visited) != len(all_children) + 1:
+        self.root = int(roots[0])
+
+        # BFS por níveis: a fronteira de cada nível, na ordem da fila, expande todos os filhos de uma vez
+        order_parts = []
+        frontier = np.array([self.root], dtype=np.int64)
+        level = 0
+        while frontier.size:
+            starts = self.child_offsets[frontier]
+            n_child = self.child_offsets[frontier + 1] - starts
+            total = int(n_child.sum())
+            if total == 0:
+                break
+            first_out = np.cumsum(n_child) - n_child
+            idx = np.repeat(starts - first_out, n_child) + np.arange(total)
+            seg_ids = self.child_segment[idx]
+            self.segment_depth[seg_ids] = level
+            order_parts.append(seg_ids)
+            frontier = self.child_index[idx].astype(np.int64)
+            level += 1
+
+        self.bfs_order = np.concatenate(order_parts).astype(np.int32)
+        # Nós que a BFS não alcança (ciclos desconectados da raiz)
+        if len(self.bfs_order) != len(segs):
             return False
         self.is_valid_tree = True
         return True
 
     def _bfs_order(self) -> List[Tuple[int, int, int]]:
         """Retorna (seg_id, i0, i1) em ordem BFS: raiz → galhos → ramificações → folhas."""
-        order = []
-        queue = [self.root]
-        seg_by_endpoints = {(i0, i1): sid for sid, (i0, i1) in enumerate(self.segments)}
-
-        while queue:
-            node = queue.pop(0)
-            for child in self.children_of.get(node, []):
-                seg_id = seg_by_endpoints.get((node, child), -1)
-                if seg_id >= 0:
-                    order.append((seg_id, node, child))
-                queue.append(child)
-
-        return order
-
-    def build_segment_list(self):
-        """Constrói segment_list em ordem topológica (BFS)."""
+        segs = np.asarray(self.segments)[self.bfs_order]
+        return list(zip(self.bfs_order.tolist(), segs[:, 0].tolist(), segs[:, 1].tolist()))
+
+    def build_segment_list(self, previous: Optional[SegmentTable] = None,
+                           previous_row: Optional[np.ndarray] = None):
+        """
+        Constrói segment_table (e a visão segment_list) em ordem topológica (BFS).
+        previous/previous_row (carregamento incremental, ver step_delta): para cada id de
+        segmento, a linha de previous com as mesmas extremidades (ou -1). A geometria
+        (p0, p1, length, dir) desses ramos é copiada; só a dos ramos novos é calculada.
+        """
         if not self._build_tree_structure():
             raise ValueError("VTK não representa uma árvore válida (ciclos ou múltiplas raízes)")
 
-        parents = set(self.children_of.keys())
-        leaves = set()
-        for i0, i1 in self.segments:
-            if i1 not in parents:
-                leaves.add(i1)
-
-        order = self._bfs_order()
-        depth_map = {}
-        queue = [(self.root, 0)]
-        while queue:
-            node, d = queue.pop(0)
-            for child in self.children_of.get(node, []):
-                seg_id = next((sid for sid, i0, i1 in order if i0 == node and i1 == child), -1)
-                if seg_id >= 0:
-                    depth_map[seg_id] = d
-                queue.append((child, d + 1))
-
-        self.max_depth = max(depth_map.values(), default=0)
-        self.segment_list = []
-
-        for seg_id, i0, i1 in order:
-            p0 = np.array(self.points[i0], dtype=np.float64)
-            p1 = np.array(self.points[i1], dtype=np.float64)
-            diff = p1 - p0
-            length = float(np.linalg.norm(diff))
-            dir_vec = diff / length if length > 1e-10 else np.array([1.0, 0.0, 0.0])
-            r0 = float(self.radius_point[i0]) if i0 < len(self.radius_point) else 0.01
-            r1 = float(self.radius_point[i1]) if i1 < len(self.radius_point) else 0.01
-            is_root_seg = i0 == self.root
-            is_leaf_seg = i1 in leaves
-            self.segment_list.append(Segment(
-                id=seg_id, i0=i0, i1=i1, p0=p0, p1=p1, r0=r0, r1=r1,
-                length=length, dir=dir_vec, depth=depth_map.get(seg_id, 0),
-                is_root_segment=is_root_seg, is_leaf_segment=is_leaf_seg
-            ))
+        order = self.bfs_order
+        n = len(order)
+        t = SegmentTable(n)
+        segs = np.asarray(self.segments)[order]
+        t.ids[:] = order
+        t.i0[:] = segs[:, 0]
+        t.i1[:] = segs[:, 1]
+
+        if previous is not None:
+            src = np.asarray(previous_row)[order]
+            kept = src >= 0
+            for name in ('p0', 'p1', 'length', 'dir'):
+                getattr(t, name)[kept] = getattr(previous, name)[src[kept]]
+            fresh = np.nonzero(~kept)[0]
+        else:
+            fresh = slice(None)
+        t.p0[fresh] = self.points[t.i0[fresh]]
+        t.p1[fresh] = self.points[t.i1[fresh]]
+        diff = t.p1[fresh].astype(np.float64) - t.p0[fresh]
+        length = np.linalg.norm(diff, axis=1)
+        t.length[fresh] = length
+        valid = length > 1e-10
+        direction = np.tile([1.0, 0.0, 0.0], (len(length), 1))
+        direction[valid] = diff[valid] / length[valid, None]
+        t.dir[fresh] = direction
+
+        n_r = len(self.radius_point)
+        radius = np.append(np.asarray(self.radius_point, dtype=np.float32), np.float32(0.01))
+        t.r0[:] = radius[np.where(t.i0 < n_r, t.i0, n_r)]
+        t.r1[:] = radius[np.where(t.i1 < n_r, t.i1, n_r)]
+        t.depth[:] = self.segment_depth[order]
+        t.flags[t.i0 == self.root] |= SEG_ROOT
+        t.flags[self.child_count()[t.i1] == 0] |= SEG_LEAF
+        t.row_of_id[order] = np.arange(n, dtype=np.int32)
+
+        self.max_depth = int(t.depth.max()) if n else 0
+        self.segment_table = t
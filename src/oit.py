@@ -0,0 +1,195 @@
+"""
+Transparência independente de ordem - TP2
+Weighted Blended OIT (McGuire & Bavoil, 2013): os ramos transparentes são desenhados em
+qualquer ordem num FBO com dois alvos float, e uma passada de composição resolve a cor:
+
+- acumulação: alvo 0 = (Σ cor·α·w, Π(1 - α)), alvo 1 = Σ α·w, com a mesma função de blend nos
+  dois (glBlendFuncSeparate(ONE, ONE, ZERO, ONE_MINUS_SRC_ALPHA): RGB soma, alfa multiplica),
+  o que dispensa glBlendFunci (GL 4.0)
+- composição: cor = Σ cor·α·w / Σ α·w, opacidade = 1 - Π(1 - α), misturada sobre o fundo
+
+O peso w cai com a profundidade normalizada entre os planos que envolvem a árvore, então os
+ramos da frente dominam como numa ordenação de trás para frente. Nada é ordenado na CPU e os
+VBOs do modo retido são desenhados como estão (um glDrawArrays por faixa de espessura).
+Alvos RGBA32F/R32F: com milhares de ramos sobrepostos num pixel, half float estouraria.
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.error import GLError
+
+_ACCUM_VS = """#version 120
+uniform float u_alpha;
+varying vec4 v_color;
+varying float v_depth;
+void main() {
+    gl_Position = ftransform();
+    v_color = vec4(gl_Color.rgb, gl_Color.a * u_alpha);
+    v_depth = -(gl_ModelViewMatrix * gl_Vertex).z;
+}
+"""
+
+ACCUM_FS = """#version 120
+uniform vec2 u_depth_range;
+varying vec4 v_color;
+varying float v_depth;
+void main() {
+    float a = v_color.a;
+    float z = clamp((v_depth - u_depth_range.x) / max(u_depth_range.y - u_depth_range.x, 1e-6), 0.0, 1.0);
+    float w = a * clamp(100.0 * pow(1.0 - z, 3.0), 1e-2, 1e2);
+    gl_FragData[0] = vec4(v_color.rgb * a * w, a);
+    gl_FragData[1] = vec4(a * w);
+}
+"""
+
+_COMPOSITE_VS = """#version 120
+varying vec2 v_uv;
+void main() {
+    gl_Position = gl_Vertex;
+    v_uv = gl_Vertex.xy * 0.5 + 0.5;
+}
+"""
+
+_COMPOSITE_FS = """#version 120
+uniform sampler2D u_accum;
+uniform sampler2D u_weight;
+varying vec2 v_uv;
+void main() {
+    vec4 accum = texture2D(u_accum, v_uv);
+    float reveal = accum.a;
+    if (reveal >= 1.0) discard;
+    float weight = texture2D(u_weight, v_uv).r;
+    gl_FragColor = vec4(accum.rgb / max(weight, 1e-5), 1.0 - reveal);
+}
+"""
+
+_QUAD = np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0]], dtype=np.float32)
+
+
+class WeightedOIT:
+    def __init__(self):
+        self.fbo = None
+        self.textures = None
+        self.width = 0
+        self.height = 0
+        self._accum_program = None
+        self._composite_program = None
+        self._previous_fbo = 0
+        self._blend_func = None
+        self._uniforms = None      # (depth_range, alpha) da acumulação em curso
+
+    def _ensure_programs(self):
+        """Compila os shaders (ShaderError se o driver recusar)."""
+        # Aqui e não no topo: segment_shader importa ACCUM_FS deste módulo
+        from src.segment_shader import ShaderError, compile_shader
+        if self._accum_program is not None:
+            return
+        try:
+            self._accum_program = shaders.compileProgram(
+                compile_shader(_ACCUM_VS, GL_VERTEX_SHADER),
+                compile_shader(ACCUM_FS, GL_FRAGMENT_SHADER), validate=False)
+            self._composite_program = shaders.compileProgram(
+                compile_shader(_COMPOSITE_VS, GL_VERTEX_SHADER),
+                compile_shader(_COMPOSITE_FS, GL_FRAGMENT_SHADER), validate=False)
+        except ShaderError:
+            raise
+        except RuntimeError as e:
+            raise ShaderError(f"link do shader OIT falhou: {e}") from e
+
+    def _ensure_targets(self, width: int, height: int):
+        if self.fbo is not None and (width, height) == (self.width, self.height):
+            return
+        self._release_targets()
+        self.width, self.height = width, height
+        self.textures = glGenTextures(2)
+        for texture, (internal, fmt) in zip(self.textures, ((GL_RGBA32F, GL_RGBA), (GL_R32F, GL_RED))):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glTexImage2D(GL_TEXTURE_2D, 0, internal, width, height, 0, fmt, GL_FLOAT, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        self.fbo = glGenFramebuffers(1)
+        previous = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.textures[0], 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT1, GL_TEXTURE_2D, self.textures[1], 0)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, previous)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self._release_targets()
+            raise GLError(err=status, description=b"framebuffer OIT incompleto")
+
+    def begin(self, width: int, height: int, depth_range, alpha: float = 0.7, program=None):
+        """
+        Liga o FBO de acumulação e o shader. Tudo desenhado até end() entra na média ponderada.
+        depth_range = (perto, longe): distâncias ao olho que envolvem a geometria transparente.
+        program: outro programa com ACCUM_FS (ex.: SegmentShader 'oit', que calcula a cor na GPU);
+        precisa das mesmas uniforms u_alpha e u_depth_range e das varyings v_color/v_depth.
+        """
+        self._ensure_programs()
+        if program is None:
+            program = self._accum_program
+        self._ensure_targets(width, height)
+        self._previous_fbo = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glDrawBuffers(2, [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1])
+        glClearBufferfv(GL_COLOR, 0, [0.0, 0.0, 0.0, 1.0])
+        glClearBufferfv(GL_COLOR, 1, [0.0, 0.0, 0.0, 0.0])
+        # Depth test, anti-aliasing e blend (ligados e função) voltam como estavam em end(): os frames
+        # opacos seguintes não podem herdar GL_LINE_SMOOTH. Só GL_ENABLE_BIT na pilha: GL_COLOR_BUFFER_BIT
+        # traria de volta os draw buffers do FBO de acumulação para o framebuffer anterior
+        self._blend_func = [int(glGetIntegerv(name)) for name in (GL_BLEND_SRC_RGB, GL_BLEND_DST_RGB,
+                                                                   GL_BLEND_SRC_ALPHA, GL_BLEND_DST_ALPHA)]
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_LINE_SMOOTH)   # cobertura do anti-aliasing entra no alfa (e na revelação)
+        glEnable(GL_BLEND)
+        glBlendFuncSeparate(GL_ONE, GL_ONE, GL_ZERO, GL_ONE_MINUS_SRC_ALPHA)
+        self._uniforms = (depth_range, alpha)
+        self.use(program)
+
+    def use(self, program):
+        """Troca o programa de acumulação entre begin() e end() (ex.: tubos e depois linhas)."""
+        depth_range, alpha = self._uniforms
+        glUseProgram(program)
+        glUniform1f(glGetUniformLocation(program, "u_alpha"), alpha)
+        glUniform2f(glGetUniformLocation(program, "u_depth_range"), *depth_range)
+
+    def end(self):
+        """Volta ao framebuffer anterior, compõe o resultado sobre ele e restaura o estado de begin()."""
+        glUseProgram(0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self._previous_fbo)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glUseProgram(self._composite_program)
+        glUniform1i(glGetUniformLocation(self._composite_program, "u_accum"), 0)
+        glUniform1i(glGetUniformLocation(self._composite_program, "u_weight"), 1)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_2D, self.textures[1])
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.textures[0])
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, _QUAD)
+        glDrawArrays(GL_TRIANGLE_FAN, 0, 4)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glActiveTexture(GL_TEXTURE0)
+        glUseProgram(0)
+        glBlendFuncSeparate(*self._blend_func)
+        glPopAttrib()
+
+    def _release_targets(self):
+        if self.fbo is not None:
+            glDeleteFramebuffers(1, [self.fbo])
+            glDeleteTextures(self.textures)
+            self.fbo = None
+            self.textures = None
+            self.width = self.height = 0
+
+    def release(self):
+        self._release_targets()
+        for program in (self._accum_program, self._composite_program):
+            if program is not None:
+                glDeleteProgram(program)
+        self._accum_program = self._composite_program = None
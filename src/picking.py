@@ -1,10 +1,21 @@
 """
 Picking por ray cast - TP2
 Ray a partir do mouse, teste contra cápsulas (segmentos).
+Padrão: BVH de cápsulas (src/bvh.py) construída uma vez por modelo; alternativa
+'brute': teste vetorizado contra todos os ramos.
 """
+import weakref
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import gluUnProject
+from src.bvh import CapsuleBVH, closest_hit
+from src.profiler import PROFILER
+
+# Raio mínimo da cápsula de picking (ramos muito finos continuam clicáveis)
+MIN_PICK_RADIUS = 0.005
+
+# BVH por modelo; refeita quando o modelo troca de segment_table
+_bvh_cache = weakref.WeakKeyDictionary()
 
 
 def get_ray_from_mouse(mouse_x: float, mouse_y: float, viewport_height: int):
@@ -75,22 +86,40 @@ def _ray_segment_distance(ray_origin: np.ndarray, ray_dir: np.ndarray,
     return dist, t_ray
 
 
-def pick_segment(model, mouse_x: float, mouse_y: float, viewport_height: int) -> int:
+def _pick_radius(table) -> np.ndarray:
+    return np.maximum(np.maximum(table.r0, table.r1), MIN_PICK_RADIUS)
+
+
+def get_bvh(model) -> CapsuleBVH:
+    """BVH de cápsulas do modelo (construída no primeiro pick e reaproveitada)."""
+    entry = _bvh_cache.get(model)
+    if entry is None or entry[0] is not model.segment_table:
+        table = model.segment_table
+        with PROFILER.timer('bvh_build'):
+            entry = (table, CapsuleBVH(table.p0, table.p1, _pick_radius(table)))
+        _bvh_cache[model] = entry
+    return entry[1]
+
+
+def pick_ray(model, ray_origin: np.ndarray, ray_dir: np.ndarray, method: str = 'bvh') -> int:
+    """Id do ramo atingido pelo raio mais próximo da câmera, ou -1. method: 'bvh' ou 'brute'."""
+    table = model.segment_table
+    if len(table) == 0:
+        return -1
+    if method == 'bvh':
+        row, _ = get_bvh(model).query(ray_origin, ray_dir)
+    else:
+        row, _ = closest_hit(ray_origin, ray_dir, table.p0.astype(np.float64),
+                             table.p1.astype(np.float64), _pick_radius(table))
+    return int(table.ids[row]) if row >= 0 else -1
+
+
+def pick_segment(model, mouse_x: float, mouse_y: float, viewport_height: int, method: str = 'bvh') -> int:
     """
     Retorna o id do segmento selecionado ou -1.
     Aproximação por cápsula: dist < max(r0, r1) -> hit.
     Escolhe o de menor t (mais próximo da câmera).
     """
-    ray_origin, ray_dir = get_ray_from_mouse(mouse_x, mouse_y, viewport_height)
-
-    best_id = -1
-    best_t = float('inf')
-
-    for seg in model.segment_list:
-        dist, t_ray = _ray_segment_distance(ray_origin, ray_dir, seg.p0, seg.p1)
-        radius = max(seg.r0, seg.r1, 0.005)
-        if dist < radius and t_ray < best_t:
-            best_t = t_ray
-            best_id = seg.id
-
-    return best_id
+    with PROFILER.timer('pick'):
+        ray_origin, ray_dir = get_ray_from_mouse(mouse_x, mouse_y, viewport_height)
+        return pick_ray(model, ray_origin, ray_dir, method)
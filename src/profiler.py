@@ -0,0 +1,139 @@
+"""
+Instrumentação - TP1/TP2
+Timers e contadores nomeados nos caminhos quentes: parse, árvore (topologia + SegmentTable),
+bounds, cores (montagem do batch), desenho, swap, pick e o frame inteiro.
+
+Desligado (padrão), PROFILER.timer() devolve um contexto vazio compartilhado e count() retorna
+na primeira linha: o custo é uma chamada de método por ponto instrumentado. Ligado, cada frame
+vira uma amostra (ms por timer, soma por contador, fechada em end_frame); as últimas `window`
+amostras dão p50/p95/p99 para o overlay e todas (até max_samples) podem ir para CSV.
+Timers de outras threads (prefetch do StepCache) entram no frame em que terminam.
+"""
+import csv
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 't0')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Profiler:
+    def __init__(self, window: int = 300, max_samples: int = 100_000):
+        self.enabled = False
+        self.window = window
+        self.frame_index = 0
+        self._lock = threading.Lock()
+        self._times = {}      # ms acumulados no frame atual, por timer
+        self._counts = {}     # soma no frame atual, por contador
+        self.history = {}     # nome -> deque das últimas `window` amostras (só frames em que rodou)
+        self.samples = deque(maxlen=max_samples)   # (frame, {nome: valor}) para o CSV
+
+    def timer(self, name: str):
+        """Contexto que mede o bloco em ms: `with PROFILER.timer('parse'): ...`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self._times[name] = self._times.get(name, 0.0) + seconds * 1e3
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def end_frame(self):
+        """Fecha a amostra do frame atual (chamado uma vez por iteração do laço de render)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            row = dict(self._times)
+            row.update(self._counts)
+            self._times.clear()
+            self._counts.clear()
+        for name, value in row.items():
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=self.window)
+            history.append(value)
+        self.samples.append((self.frame_index, row))
+        self.frame_index += 1
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        with self._lock:
+            self._times.clear()
+            self._counts.clear()
+
+    def reset(self):
+        with self._lock:
+            self._times.clear()
+            self._counts.clear()
+        self.history.clear()
+        self.samples.clear()
+        self.frame_index = 0
+
+    def percentiles(self, name: str):
+        """(p50, p95, p99) das últimas amostras de um timer/contador, ou None sem amostras."""
+        history = self.history.get(name)
+        if not history:
+            return None
+        return tuple(np.percentile(np.fromiter(history, dtype=np.float64), (50, 95, 99)))
+
+    def recent(self, name: str) -> np.ndarray:
+        """Últimas amostras de um nome, da mais antiga para a mais recente."""
+        return np.fromiter(self.history.get(name, ()), dtype=np.float64)
+
+    def report(self) -> list:
+        """Uma linha 'nome p50/p95/p99' por timer/contador com amostras, 'frame' primeiro."""
+        names = sorted(self.history, key=lambda name: (name != 'frame', name))
+        lines = []
+        for name in names:
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f"{name} {p50:.2f}/{p95:.2f}/{p99:.2f}")
+        return lines
+
+    def write_csv(self, path: str) -> int:
+        """Grava uma linha por frame (colunas = nomes; vazio onde o timer não rodou). Retorna o nº de linhas."""
+        samples = list(self.samples)
+        names = sorted({name for _, row in samples for name in row})
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame_index'] + names)
+            for frame, row in samples:
+                writer.writerow([frame] + [row.get(name, '') for name in names])
+        return len(samples)
+
+
+# Instância única usada pelos loaders, modelos, renderers e apps
+PROFILER = Profiler()
@@ -1,5 +1,12 @@
 from OpenGL.GL import *
+from OpenGL.error import GLError, NullFunctionError
 import math
+import time
+import numpy as np
+from src.segment_batch import SegmentBatch, BatchBuffers, drain
+from src.segment_shader import SegmentShader, ShaderError, segment_attributes
+from src.culling import FrustumCuller, current_mvp
+from src.profiler import PROFILER
 
 class Renderer:
     def __init__(self):
@@ -8,6 +15,29 @@ class Renderer:
         # Simple colormap (Blue to Red)
         self.min_radius = 0.0
         self.max_radius = 1.0
+        # Batched path: colour/thickness arrays built once per model. Lines are smoothed and blended,
+        # so draw order decides what ends up on top: segments stay in file order, with one draw call
+        # per run of equal (exact, fractional) width, and match the immediate path.
+        # Falls back to the immediate path below if VBOs are not available.
+        self.retained = True
+        self.width_buckets = 'exact'
+        self._buffers = BatchBuffers()
+        self._batch_model = None
+        self._batch_shading = None
+        self._range_model = None
+        # Next model: shader batch built by prepare() on a loader thread, uploaded in slices by stage()
+        # into spare VBOs that replace the current ones only when complete
+        self._prepared = None       # (model, batch)
+        self._staging = BatchBuffers()
+        self._staging_job = None    # (model, upload_chunks generator)
+        # Colour ramp sampled into a 1D texture and applied in the vertex shader;
+        # False (set automatically if shaders fail) keeps the CPU colours of get_colors.
+        self.shading = True
+        self._shader = SegmentShader(self.colormap(np.linspace(0.0, 1.0, 256)))
+        # Quadtree culling: segments outside the ortho window are skipped and sub-pixel
+        # quadtree cells collapse to one segment; counts in self.culler.stats and the profiler.
+        self.culling = True
+        self.culler = FrustumCuller(dim=2)
 
     def resize(self, width, height):
         self.width = width
@@ -35,6 +65,138 @@ class Renderer:
             
         return (r, g, b)
 
+    def colormap(self, t):
+        """Colour ramp of get_color for normalized radii t in 0..1 -> (N, 3)."""
+        brightness = np.clip(t, 0.0, 1.0) ** 0.7
+        return np.stack([0.3 * brightness, 0.15 + 0.85 * brightness, 0.3 * brightness], axis=1)
+
+    def get_colors(self, radii):
+        """Vectorized get_color: (N,) radii -> (N, 3) colours."""
+        if self.max_radius == self.min_radius:
+            t = np.full(len(radii), 0.5)
+        else:
+            t = (np.asarray(radii, dtype=np.float64) - self.min_radius) / (self.max_radius - self.min_radius)
+        return self.colormap(t)
+
+    def get_thickness(self, radii):
+        # Enhanced scaling: thin branches very thin, thick branches very thick
+        # Non-linear scaling for more contrast; minimum 0.5 to keep thin branches visible
+        return np.maximum(0.5, (np.asarray(radii, dtype=np.float64) ** 1.2) * 250)
+
+    def update_radius_range(self, model):
+        # Colour range over the whole model: computed once per model, not every frame
+        if self._range_model is model:
+            return
+        if len(model.radii):
+            self.max_radius = float(model.radii.max())
+            self.min_radius = float(model.radii.min())
+        self._range_model = model
+
+    def segment_endpoints(self, model):
+        """(p0, p1) of every drawn segment, flattened to z = 0 as in the batch."""
+        n = min(len(model.segments), len(model.radii))
+        segments = model.segments[:n]
+        verts = np.asarray(model.vertices, dtype=np.float32)
+        p0 = verts[segments[:, 0]].copy()
+        p1 = verts[segments[:, 1]].copy()
+        p0[:, 2] = 0.0  # drawn as 2D (same as glVertex2f)
+        p1[:, 2] = 0.0
+        return p0, p1
+
+    def build_batch(self, model, shading=False):
+        """
+        Per-vertex positions for the whole model in file order, in runs of equal thickness, plus
+        either CPU colours or (shading=True) the radius attribute the shader turns into colour.
+        """
+        n = min(len(model.segments), len(model.radii))
+        p0, p1 = self.segment_endpoints(model)
+        thickness = self.get_thickness(model.radii[:n])
+        if shading:
+            # No renderer state touched here: prepare() builds this batch on a loader thread
+            a0, a1 = segment_attributes(0.0, model.radii[:n], np.arange(n))
+            return SegmentBatch(p0, p1, None, None, thickness, self.width_buckets, a0=a0, a1=a1, keep_order=True)
+        self.update_radius_range(model)
+        colors = np.hstack([self.get_colors(model.radii[:n]), np.ones((n, 1))])
+        return SegmentBatch(p0, p1, colors, colors, thickness, self.width_buckets, keep_order=True)
+
+    def _take_prepared(self, model):
+        """Shader batch of the model from prepare() if there is one, else built now."""
+        prepared = self._prepared
+        if prepared is not None and prepared[0] is model:
+            self._prepared = None
+            return prepared[1]
+        return self.build_batch(model, True)
+
+    def prepare(self, model):
+        """
+        CPU side of switching to `model` (shader batch, quadtree). Makes no GL calls and leaves the
+        model on screen alone, so it can run on a loader thread; render()/stage() pick up the result.
+        """
+        if not model or self._batch_model is model:
+            return
+        if self.retained and self.shading:
+            with PROFILER.timer('prepare'):
+                self._prepared = (model, self.build_batch(model, True))
+        if self.culling:
+            self.culler.prepare(model, lambda: self.segment_endpoints(model))
+
+    def stage(self, model, budget=0.004):
+        """
+        Uploads the batch of `model` into the spare VBOs, stopping after `budget` seconds; the current
+        model keeps drawing from the VBOs in use. Call once per frame on the GL thread until it returns
+        True, at which point the VBOs have been swapped and render(model) uploads nothing. Also True
+        when there is nothing to do ahead of time (CPU colours are uploaded by render as before).
+        """
+        if not model or not (self.retained and self.shading):
+            return True
+        if self._batch_model is model and self._batch_shading:
+            self._staging_job = None
+            return True
+        deadline = time.perf_counter() + budget
+        job = self._staging_job
+        if job is None or job[0] is not model:
+            with PROFILER.timer('colors'):
+                batch = self._take_prepared(model)
+            job = self._staging_job = (model, self._staging.upload_chunks(batch))
+        try:
+            with PROFILER.timer('upload'):
+                if not drain(job[1], deadline):
+                    return False
+        except (GLError, NullFunctionError):
+            # render() hits the same error and turns the feature off; just stop staging here
+            self._staging_job = None
+            return True
+        self._buffers, self._staging = self._staging, self._buffers
+        self._batch_model = model
+        self._batch_shading = True
+        self._staging_job = None
+        return True
+
+    def _culled_rows(self, model):
+        """Batch rows inside the ortho window (sub-pixel cells merged), or None to draw everything."""
+        if not self.culling:
+            return None
+        batch = self._buffers.batch
+        margin = 0.5 * float(batch.bucket_widths.max()) if len(batch.bucket_widths) else 0.0
+        return self.culler.batch_rows(model, lambda: self.segment_endpoints(model), batch, current_mvp(),
+                                      self.width, self.height, margin, model.visible_count)
+
+    def _draw_batch(self, model):
+        rows = self._culled_rows(model)
+        attribute = None
+        if self.shading:
+            attribute = self._shader.begin(color_by='radius', radius_range=(self.min_radius, self.max_radius),
+                                           lighting='none')
+        try:
+            with PROFILER.timer('draw'):
+                if rows is None:
+                    self._buffers.draw(model.visible_count, attribute)
+                else:
+                    self._buffers.draw_rows(rows, 1.0, attribute)
+        finally:
+            if self.shading:
+                self._shader.end()
+
     def draw_circle(self, x, y, radius, color):
         glColor3f(*color)
         num_segments = 8 # Optimized for performance (was 12)
@@ -82,18 +244,7 @@ class Renderer:
         # Rotate around center
         glRotatef(view_params['rotation'], 0, 0, 1)
 
-        # Update min/max radii for coloring if needed (do once or dynamic?)
-        # For performance, we assume standard ranges or calc once.
-        if model.radii:
-            self.max_radius = max(model.radii)
-            self.min_radius = min(model.radii)
-
-        # Determine how many segments to render (for animation)
-        segments_to_render = model.segments
-        radii_to_render = model.radii
-        if model.visible_count is not None:
-            segments_to_render = model.segments[:model.visible_count]
-            radii_to_render = model.radii[:model.visible_count]
+        self.update_radius_range(model)
 
         # Enable line smoothing for rounder appearance
         glEnable(GL_LINE_SMOOTH)
@@ -101,10 +252,47 @@ class Renderer:
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-        for i, (p1_idx, p2_idx) in enumerate(segments_to_render):
+        # Each failure turns off one feature (shaders, then VBOs) and retries
+        while self.retained:
+            try:
+                if self._batch_model is not model or self._batch_shading != self.shading:
+                    with PROFILER.timer('colors'):
+                        batch = self._take_prepared(model) if self.shading else self.build_batch(model)
+                    with PROFILER.timer('upload'):
+                        self._buffers.upload(batch)
+                    self._batch_model = model
+                    self._batch_shading = self.shading
+                    self._staging_job = None
+                # visible_count (animation) is an index-range limit inside each run
+                self._draw_batch(model)
+                break
+            except (GLError, NullFunctionError, ShaderError) as e:
+                if self.shading:
+                    print(f"Shaders unavailable ({e}); computing colours on the CPU")
+                    self.shading = False
+                else:
+                    print(f"VBOs unavailable ({e}); using immediate mode")
+                    self.retained = False
+
+        if not self.retained:
+            with PROFILER.timer('draw'):
+                self.render_immediate(model)
+
+        # Disable smoothing after rendering
+        glDisable(GL_LINE_SMOOTH)
+        glDisable(GL_BLEND)
+
+    def render_immediate(self, model):
+        # Determine how many segments to render (for animation)
+        count = min(len(model.segments), len(model.radii))
+        if model.visible_count is not None:
+            count = min(count, model.visible_count)
+
+        for i in range(count):
+            p1_idx, p2_idx = model.segments[i]
             x1, y1, z1 = model.vertices[p1_idx]
             x2, y2, z2 = model.vertices[p2_idx]
-            r = radii_to_render[i]
+            r = model.radii[i]
             
             # Color
             c = self.get_color(r)
@@ -118,7 +306,3 @@ class Renderer:
             glVertex2f(x1, y1)
             glVertex2f(x2, y2)
             glEnd()
-        
-        # Disable smoothing after rendering
-        glDisable(GL_LINE_SMOOTH)
-        glDisable(GL_BLEND)
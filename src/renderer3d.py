@@ -2,17 +2,96 @@
 Renderer 3D - TP2
 Renderização de árvore arterial com GL_LINES (espessura por raio).
 Suporta iluminação Flat/Gouraud, transparência, coloração por depth/radius.
+Modo retido (padrão): posições e atributos (direção, depth, raio, id) montados uma vez por
+modelo em VBOs e desenhados com um glDrawArrays por faixa de espessura; cor, iluminação,
+raio fixo e seleção saem de uniforms do shader (src/segment_shader.py), então as teclas
+1/2/C/R e o clique não remontam nada. Sem shaders, as cores são calculadas na CPU
+(build_batch) a cada mudança de opção. O modo imediato (glBegin/glEnd por ramo) fica como
+fallback e referência de correção.
+Transparência: 'oit' (Weighted Blended OIT, src/oit.py, sem ordenação) ou 'sorted'
+(de trás para frente; a ordem fica em cache e só é refeita quando o olho se desloca mais que
+sort_threshold × diagonal da árvore).
+Tubos (tubes=True): cilindros instanciados com nível de detalhe (src/tubes.py); os ramos com
+menos de ~1,5 px de diâmetro na tela continuam como linhas de 1 px. A transparência 'sorted'
+usa sempre linhas.
+Culling (culling=True): as linhas fora do frustum não são enviadas e os nós da octree menores
+que 1 px viram um único ramo (src/culling.py); contagens em self.culler.stats e no perfil.
+LOD por subárvore (lod=True): subárvores que projetam menos que lod_pixels viram um ramo
+representante (src/subtree_lod.py), desenhado de um segundo batch com a mesma ordem de linhas.
+Troca de modelo sem travar o laço (src/step_loader.py): prepare() monta batch, octree e resumo do
+LOD numa thread de carga e stage() envia o batch para VBOs reserva em fatias, dentro de um
+orçamento de tempo por frame, trocando-os pelos atuais só no fim.
 """
 import math
+import time
 import numpy as np
 from OpenGL.GL import *
-from OpenGL.GLU import gluPerspective, gluLookAt
+from OpenGL.GLU import gluPerspective, gluLookAt, gluPickMatrix
+from OpenGL.error import GLError, NullFunctionError
+from src.segment_batch import SegmentBatch, BatchBuffers, drain
+from src.oit import WeightedOIT
+from src.segment_shader import SegmentShader, ShaderError, segment_attributes
+from src.tubes import TubeRenderer
+from src.culling import FrustumCuller, current_mvp
+from src.profiler import PROFILER
+
+# Pontos de controle do colormap de _depth_to_rgb: azul -> ciano -> verde -> amarelo -> vermelho
+_COLORMAP_T = np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+_COLORMAP_RGB = np.array([
+    [0.0, 0.0, 1.0],
+    [0.0, 1.0, 1.0],
+    [0.0, 1.0, 0.0],
+    [1.0, 1.0, 0.0],
+    [1.0, 0.0, 0.0],
+])
+_LIGHT_DIR = np.array([0.5, 1.0, 0.5]) / np.linalg.norm([0.5, 1.0, 0.5])
+_SELECTED_RGB = (1.0, 0.8, 0.2)
+_TRANSPARENT_ALPHA = 0.7
+_FIXED_LINE_WIDTH = max(1.0, 0.01 * 80.0)
+_FOV_Y = 45.0
 
 
 class Renderer3D:
     def __init__(self):
         self.width = 800
         self.height = 600
+        # Modo retido (VBO); vira False sozinho se o contexto não suportar VBOs
+        self.retained = True
+        # Linhas opacas sem anti-aliasing: o GL arredonda a largura para inteiro, então agrupar pela
+        # largura inteira dá o mesmo desenho do modo imediato (dezenas de draw calls nos datasets)
+        self.width_buckets = 'integer'
+        self._buffers = BatchBuffers()
+        self._batch_model = None
+        self._batch_key = None
+        # Próximo modelo: batch montado por prepare() e VBOs reserva que stage() preenche aos poucos
+        self._prepared = None     # (modelo, chave, batch, intervalo de raio)
+        self._staging = BatchBuffers()
+        self._staging_job = None  # (modelo, chave, intervalo de raio, gerador de upload_chunks)
+        # Cor/iluminação no shader; vira False sozinho se o driver não compilar (cores na CPU)
+        self.shading = True
+        self._shader = SegmentShader(_COLORMAP_RGB, _LIGHT_DIR, _SELECTED_RGB)
+        self._radius_range = (0.001, 0.01)
+        # Transparência: 'oit' cai para 'sorted' sozinho se faltar shader/FBO float
+        self.transparency_mode = 'oit'
+        self.sort_threshold = 0.02
+        self._oit = WeightedOIT()
+        self._sort_cache = None   # (segment_table, olho, linhas da tabela de trás para frente)
+        self._rank_rows = None    # (batch, linha do batch de cada linha da tabela)
+        # Tubos instanciados (precisam de shader e de instancing; vira False sozinho se faltar)
+        self.tubes = False
+        self._tubes = TubeRenderer(_COLORMAP_RGB, _LIGHT_DIR, _SELECTED_RGB)
+        # Culling por frustum/tamanho na tela das linhas (octree por modelo, consulta por câmera)
+        self.culling = True
+        self.culler = FrustumCuller(dim=3)
+        # LOD por subárvore: orçamento de erro em pixels; a seleção é refeita quando o olho anda
+        # mais que lod_threshold × diagonal (como a ordem de trás para frente)
+        self.lod = False
+        self.lod_pixels = 3.0
+        self.lod_threshold = 0.02
+        self._lod_buffers = BatchBuffers()
+        self._lod_batch = None    # (modelo, chave do batch principal) do batch de representantes
+        self._lod_cache = None    # (chave, olho, (máscara das linhas desenhadas, linhas colapsadas))
+        self._line_cache = None   # ((culling, seleção, batch), (linhas, representantes)) de _line_rows
 
     def resize(self, width, height):
         self.width = width
@@ -44,6 +123,11 @@ class Renderer3D:
         t = max(0.0, min(1.0, t))
         return self._depth_to_rgb(t)
 
+    def _depth_to_rgb_array(self, t: np.ndarray) -> np.ndarray:
+        """Versão vetorizada de _depth_to_rgb (mesmo colormap linear por partes). Retorna N×3."""
+        t = np.clip(t, 0.0, 1.0)
+        return np.stack([np.interp(t, _COLORMAP_T, _COLORMAP_RGB[:, c]) for c in range(3)], axis=1)
+
     def _get_color(self, seg, color_by, depth_max, radius_min, radius_max, light_factor=1.0):
         """Cor baseada em depth ou radius, com fator de iluminação."""
         if color_by == 'depth':
@@ -56,32 +140,444 @@ class Renderer3D:
             return max(0.0, min(1.0, x))
         return (clamp(r * light_factor), clamp(g * light_factor), clamp(b * light_factor))
 
-    def render(self, model, view_params, options=None):
-        if not model or not model.segment_list:
-            return
+    def _segment_colors(self, seg, shade_model, color_by, depth_max, radius_min, radius_max, selected_id):
+        """Cores (c0, c1) dos dois vértices de um ramo no modo imediato (referência do modo retido)."""
+        dot = max(0.0, np.dot(seg.dir, _LIGHT_DIR))
+        light_factor = 0.4 + 0.6 * dot
+        if seg.id == selected_id:
+            return _SELECTED_RGB, _SELECTED_RGB
+        if shade_model == GL_SMOOTH:
+            base = self._get_color(seg, color_by, depth_max, radius_min, radius_max, 1.0)
+            k = 0.3 * (2.0 * dot - 1.0)
+            f0 = max(0.3, light_factor - k)
+            f1 = max(0.3, light_factor + k)
+            c0 = tuple(max(0, min(1, base[i] * f0)) for i in range(3))
+            c1 = tuple(max(0, min(1, base[i] * f1)) for i in range(3))
+            return c0, c1
+        c = self._get_color(seg, color_by, depth_max, radius_min, radius_max, light_factor)
+        return c, c
+
+    def build_batch(self, model, options=None, p1=None) -> SegmentBatch:
+        """
+        Monta os arrays por vértice de todo o modelo (vetorizado, sem laço por ramo).
+        O intervalo do colormap de raio usa todos os ramos: com a árvore inteira visível
+        o resultado é igual ao do modo imediato. p1 substitui as pontas (representantes do LOD).
+        """
         opts = options or {}
         fixed_radius = opts.get('fixed_radius', False)
         shade_model = opts.get('shade_model', GL_SMOOTH)
-        transparency = opts.get('transparency', False)
         color_by = opts.get('color_by', 'depth')
         selected_id = opts.get('selected_segment_id', -1)
 
-        segments = model.segment_list
+        table = model.segment_table
+        n = len(table)
+        p0 = table.p0
+        p1 = table.p1 if p1 is None else p1
+        dirs = table.dir.astype(np.float64)
+        r0 = table.r0.astype(np.float64)
+        r1 = table.r1.astype(np.float64)
+        depth = table.depth.astype(np.float64)
+        ids = table.ids
+
+        if fixed_radius:
+            widths = np.full(n, _FIXED_LINE_WIDTH)
+        else:
+            widths = np.maximum(1.0, np.maximum(np.maximum(r0, r1), 0.002) * 80.0)
+
+        if color_by == 'depth':
+            base = self._depth_to_rgb_array(1.0 - depth / max(model.max_depth, 1))
+        else:
+            r_avg = (r0 + r1) / 2.0
+            r_min = r_avg.min() if len(r_avg) else 0.001
+            r_max = r_avg.max() if len(r_avg) else 0.01
+            t = (r_avg - r_min) / (r_max - r_min) if r_max > r_min else np.full(len(r_avg), 0.5)
+            base = self._depth_to_rgb_array(t)
+
+        dot = np.maximum(0.0, dirs @ _LIGHT_DIR)
+        light_factor = 0.4 + 0.6 * dot
+        if shade_model == GL_SMOOTH:
+            k = 0.3 * (2.0 * dot - 1.0)
+            f0 = np.maximum(0.3, light_factor - k)
+            f1 = np.maximum(0.3, light_factor + k)
+        else:
+            f0 = f1 = light_factor
+        c0 = np.clip(base * f0[:, None], 0.0, 1.0)
+        c1 = np.clip(base * f1[:, None], 0.0, 1.0)
+        selected = ids == selected_id
+        c0[selected] = _SELECTED_RGB
+        c1[selected] = _SELECTED_RGB
+
+        alpha = np.ones((n, 1))
+        return SegmentBatch(p0, p1, np.hstack([c0, alpha]), np.hstack([c1, alpha]),
+                            widths, self.width_buckets)
+
+    def build_attribute_batch(self, model, p1=None) -> SegmentBatch:
+        """
+        Batch para o shader: só geometria e atributos que não dependem das opções
+        (espessura variável, direção, depth, raio médio, id). Guarda o intervalo de raio do colormap.
+        p1 substitui as pontas (representantes do LOD).
+        """
+        batch, radius_range = self._attribute_batch(model, p1)
+        self._radius_range = radius_range
+        return batch
+
+    def _attribute_batch(self, model, p1=None) -> tuple:
+        """(batch, intervalo de raio) de build_attribute_batch, sem alterar o renderer (roda fora da thread GL)."""
+        table = model.segment_table
+        r0 = table.r0.astype(np.float64)
+        r1 = table.r1.astype(np.float64)
+        r_avg = (r0 + r1) / 2.0
+        radius_range = (float(r_avg.min()), float(r_avg.max())) if len(r_avg) else self._radius_range
+        widths = np.maximum(1.0, np.maximum(np.maximum(r0, r1), 0.002) * 80.0)
+        a0, a1 = segment_attributes(table.depth, r_avg, table.ids)
+        batch = SegmentBatch(table.p0, table.p1 if p1 is None else p1, None, None, widths, self.width_buckets,
+                             normals=table.dir, a0=a0, a1=a1)
+        return batch, radius_range
+
+    def verify_batch(self, model, options=None, atol=1e-5) -> bool:
+        """
+        Confere o modo retido contra o modo imediato, ramo a ramo: cores, posições e a largura
+        inteira em que o GL desenha a linha (não precisa de contexto GL).
+        """
+        opts = options or {}
+        batch = self.build_batch(model, opts)
+        segs = model.segment_list
+        radii = [(s.r0 + s.r1) / 2.0 for s in segs]
+        args = (opts.get('shade_model', GL_SMOOTH), opts.get('color_by', 'depth'), model.max_depth,
+                min(radii, default=0.001), max(radii, default=0.01), opts.get('selected_segment_id', -1))
+        fixed_radius = opts.get('fixed_radius', False)
+        widths = np.repeat(batch.bucket_widths, batch.bucket_count)
+        for row, rank in enumerate(batch.rank):
+            seg = segs[rank]
+            c0, c1 = self._segment_colors(seg, *args)
+            r = 0.01 if fixed_radius else max(seg.r0, seg.r1, 0.002)
+            if math.floor(max(1.0, r * 80.0) + 0.5) != math.floor(float(widths[row]) + 0.5):
+                return False
+            if not (np.allclose(batch.colors[2 * row, :3], c0, atol=atol)
+                    and np.allclose(batch.colors[2 * row + 1, :3], c1, atol=atol)
+                    and np.allclose(batch.positions[2 * row], seg.p0, atol=atol)
+                    and np.allclose(batch.positions[2 * row + 1], seg.p1, atol=atol)):
+                return False
+        return True
+
+    def _ensure_batch(self, model, opts):
+        """
+        Reenvia os VBOs só quando o modelo muda (com shader) ou, com cores na CPU, quando mudam
+        as opções que afetam cor/espessura.
+        """
+        if self.shading:
+            key = self._shader_key(model)
+        else:
+            key = (len(model.segment_table), opts.get('fixed_radius', False), opts.get('shade_model', GL_SMOOTH),
+                   opts.get('color_by', 'depth'), opts.get('selected_segment_id', -1), self.width_buckets)
+        if self._batch_model is not model or self._batch_key != key:
+            with PROFILER.timer('colors'):
+                if self.shading:
+                    batch, self._radius_range = self._prepared_batch(model, key)
+                else:
+                    batch = self.build_batch(model, opts)
+            with PROFILER.timer('upload'):
+                self._buffers.upload(batch)
+            self._batch_model = model
+            self._batch_key = key
+            self._staging_job = None
+
+    def _shader_key(self, model):
+        return ('shader', len(model.segment_table), self.width_buckets)
+
+    def _prepared_batch(self, model, key) -> tuple:
+        """(batch, intervalo de raio) do modelo: o de prepare(), se for deste modelo/chave, ou montado agora."""
+        prepared = self._prepared
+        if prepared is not None and prepared[0] is model and prepared[1] == key:
+            self._prepared = None
+            return prepared[2], prepared[3]
+        return self._attribute_batch(model)
+
+    def prepare(self, model):
+        """
+        Parte de CPU da troca para `model`: batch de atributos, octree do culling e resumo do LOD.
+        Não chama GL nem altera o que está sendo desenhado, então roda numa thread de carga
+        enquanto o modelo anterior continua na tela; _ensure_batch/stage() aproveitam o resultado.
+        """
+        if not model or not len(model.segment_table) or self._batch_model is model:
+            return
+        if self.retained and self.shading:
+            key = self._shader_key(model)
+            with PROFILER.timer('prepare'):
+                self._prepared = (model, key) + self._attribute_batch(model)
+        if self.culling:
+            table = model.segment_table
+            self.culler.prepare(table, lambda: (table.p0, table.p1))
+        if self.lod:
+            model.subtree_summary()
+
+    def stage(self, model, budget: float = 0.004) -> bool:
+        """
+        Envia o batch de `model` para os VBOs reserva em fatias, parando depois de `budget` segundos;
+        o modelo atual continua desenhado dos VBOs em uso. Chamar uma vez por frame (thread GL) até
+        retornar True: aí os VBOs foram trocados e render(model) não envia mais nada. Também True
+        quando não há o que adiantar (sem shader, as cores da CPU dependem das opções: render envia).
+        """
+        if not model or not len(model.segment_table) or not (self.retained and self.shading):
+            return True
+        key = self._shader_key(model)
+        if self._batch_model is model and self._batch_key == key:
+            self._staging_job = None
+            return True
+        deadline = time.perf_counter() + budget
+        job = self._staging_job
+        if job is None or job[0] is not model or job[1] != key:
+            with PROFILER.timer('colors'):
+                batch, radius_range = self._prepared_batch(model, key)
+            job = self._staging_job = (model, key, radius_range, self._staging.upload_chunks(batch))
+        try:
+            with PROFILER.timer('upload'):
+                if not drain(job[3], deadline):
+                    return False
+        except (GLError, NullFunctionError):
+            # render() encontra o mesmo erro e desliga o recurso; aqui só desiste de adiantar
+            self._staging_job = None
+            return True
+        self._buffers, self._staging = self._staging, self._buffers
+        self._batch_model, self._batch_key, self._radius_range = model, key, job[2]
+        self._staging_job = None
+        return True
+
+    def _ensure_lod_batch(self, model, opts):
+        """Batch dos representantes (mesmas espessuras, logo mesma ordem de linhas do batch principal)."""
+        self._ensure_batch(model, opts)
+        key = (model, self._batch_key)
+        if self._lod_batch != key:
+            rep_p1 = model.subtree_summary().rep_p1
+            with PROFILER.timer('colors'):
+                batch = (self.build_attribute_batch(model, rep_p1) if self.shading
+                         else self.build_batch(model, opts, rep_p1))
+            with PROFILER.timer('upload'):
+                self._lod_buffers.upload(batch)
+            self._lod_batch = key
+
+    def _line_width(self, opts):
+        """Raio fixo com shader: o batch guarda as espessuras variáveis e o desenho usa esta."""
+        return _FIXED_LINE_WIDTH if self.shading and opts.get('fixed_radius', False) else None
+
+    def max_line_width(self, model, options=None) -> float:
+        """Maior espessura de linha (pixels) que o modo retido usa para o modelo/opções."""
+        opts = options or {}
+        self._ensure_batch(model, opts)
+        if self._tubes_active(opts):
+            # Tubos são geometria de verdade (recortada corretamente); o resto é linha de 1 px
+            return 1.0
+        if self._line_width(opts) is not None:
+            return self._line_width(opts)
+        widths = self._buffers.batch.bucket_widths
+        return float(widths.max()) if len(widths) else 1.0
+
+    def _color_uniforms(self, model, opts, alpha):
+        return dict(color_by=opts.get('color_by', 'depth'), max_depth=model.max_depth,
+                    radius_range=self._radius_range,
+                    lighting='smooth' if opts.get('shade_model', GL_SMOOTH) == GL_SMOOTH else 'flat',
+                    selected_id=opts.get('selected_segment_id', -1), alpha=alpha)
+
+    def _batch_rows(self, table_rows: np.ndarray) -> np.ndarray:
+        """Linhas do batch (VBO) correspondentes a linhas da SegmentTable."""
+        batch = self._buffers.batch
+        if self._rank_rows is None or self._rank_rows[0] is not batch:
+            self._rank_rows = (batch, batch.row_of_rank())
+        return self._rank_rows[1][table_rows]
+
+    def _draw_batch(self, model, opts, alpha=1.0, rows=None, kind='color', line_width=None, buffers=None):
+        """
+        Desenha o batch (até visible_count, ou só `rows` na ordem dada) com o shader ligado às
+        opções atuais; sem shader, com as cores da CPU já nos VBOs. buffers: outro batch com a
+        mesma ordem de linhas (representantes do LOD).
+        """
+        buffers = buffers or self._buffers
+        attribute = None
+        if self.shading:
+            attribute = self._shader.begin(kind, **self._color_uniforms(model, opts, alpha))
+        if line_width is None:
+            line_width = self._line_width(opts)
+        try:
+            with PROFILER.timer('draw'):
+                if rows is None:
+                    buffers.draw(model.visible_count, attribute, line_width)
+                else:
+                    buffers.draw_rows(rows, alpha, attribute, line_width)
+        finally:
+            if self.shading:
+                self._shader.end()
+
+    def _culled_rows(self, model, opts):
+        """Linhas do batch dentro do frustum (nós sub-pixel fundidos), ou None para desenhar todas."""
+        if not self.culling:
+            return None
+        table = model.segment_table
+        margin = 0.5 * self.max_line_width(model, opts)
+        return self.culler.batch_rows(table, lambda: (table.p0, table.p1), self._buffers.batch, current_mvp(),
+                                      self.width, self.height, margin, model.visible_count)
+
+    def _subtree_lod(self, model, eye):
+        """select() do resumo de subárvores do modelo, em cache enquanto o olho não anda lod_threshold."""
+        summary = model.subtree_summary()
+        eye = np.asarray(eye, dtype=np.float64)
+        key = (summary, self._focal_pixels(), self.lod_pixels, model.visible_count)
+        cache = self._lod_cache
+        if cache is not None and cache[0] == key:
+            diagonal = float(np.linalg.norm(np.subtract(model.bounds[1::2], model.bounds[0::2]))) if model.bounds else 1.0
+            if np.linalg.norm(eye - cache[1]) <= self.lod_threshold * diagonal:
+                return cache[2]
+        result = summary.select(eye, self._focal_pixels(), self.lod_pixels, model.visible_count)
+        self._lod_cache = (key, eye, result)
+        return result
+
+    def _line_rows(self, model, opts, eye):
+        """
+        (linhas do batch desenhadas como ramo, linhas dos representantes de subárvores colapsadas):
+        None no primeiro = todas até visible_count; None no segundo = nenhuma colapsada.
+        Junta o culling e o LOD por subárvore; ambas em ordem crescente (faixas de espessura contíguas).
+        """
+        rows = self._culled_rows(model, opts)
+        if not self.lod:
+            return rows, None
+        drawn, collapsed = self._subtree_lod(model, eye)
+        if collapsed is None:
+            return rows, None
+        self._ensure_lod_batch(model, opts)
+        batch = self._buffers.batch
+        # Mesmos arrays de entrada -> mesmos arrays de saída (os índices ficam no buffer de elementos)
+        key = (rows, drawn, batch)
+        cache = self._line_cache
+        if cache is not None and all(a is b for a, b in zip(cache[0], key)):
+            return cache[1]
+        keep = drawn[batch.rank]
+        if rows is not None:
+            inside = np.zeros(len(batch), dtype=bool)
+            inside[rows] = True
+            keep &= inside
+        reps = self._batch_rows(collapsed)
+        reps.sort()
+        self._line_cache = (key, (np.flatnonzero(keep), reps))
+        return self._line_cache[1]
+
+    def back_to_front(self, model, eye) -> np.ndarray:
+        """
+        Linhas da SegmentTable da mais distante do olho para a mais próxima (ponto médio).
+        Vetorizado e em cache: só reordena se o olho andou mais que sort_threshold × diagonal.
+        """
+        table = model.segment_table
+        eye = np.asarray(eye, dtype=np.float64)
+        cache = self._sort_cache
+        if cache is not None and cache[0] is table:
+            diagonal = float(np.linalg.norm(np.subtract(model.bounds[1::2], model.bounds[0::2]))) if model.bounds else 1.0
+            if np.linalg.norm(eye - cache[1]) <= self.sort_threshold * diagonal:
+                return cache[2]
+        with PROFILER.timer('sort'):
+            mid = (table.p0.astype(np.float64) + table.p1) * 0.5
+            dist2 = np.einsum('ij,ij->i', mid - eye, mid - eye)
+            order = np.argsort(-dist2, kind='stable')
+        self._sort_cache = (table, eye, order)
+        return order
+
+    def _depth_range(self, model, eye):
+        """Distâncias ao olho da esfera que envolve a árvore (normaliza o peso do OIT)."""
+        lo = np.array(model.bounds[0::2], dtype=np.float64)
+        hi = np.array(model.bounds[1::2], dtype=np.float64)
+        center_dist = float(np.linalg.norm((lo + hi) / 2.0 - eye))
+        radius = float(np.linalg.norm(hi - lo)) / 2.0
+        return max(center_dist - radius, 0.0), center_dist + radius
+
+    def _render_oit(self, model, opts, eye):
+        self._ensure_batch(model, opts)
+        rows, reps = self._line_rows(model, opts, eye)
+        program = self._shader.program('oit') if self.shading else None
+        self._oit.begin(self.width, self.height, self._depth_range(model, np.asarray(eye)), _TRANSPARENT_ALPHA,
+                        program)
+        try:
+            self._draw_batch(model, opts, _TRANSPARENT_ALPHA, rows=rows, kind='oit')
+            if reps is not None:
+                self._draw_batch(model, opts, _TRANSPARENT_ALPHA, rows=reps, kind='oit', buffers=self._lod_buffers)
+        finally:
+            self._oit.end()
+
+    def _render_sorted(self, model, opts, eye):
+        """Ramos visíveis de trás para frente com blend, desenhados dos VBOs (ordem em cache)."""
+        self._ensure_batch(model, opts)
+        order = self.back_to_front(model, eye)
         if model.visible_count is not None:
-            segments = model.segment_list[:model.visible_count]
+            order = order[order < model.visible_count]
+        rows = self._batch_rows(order)
+        visible, reps = self._line_rows(model, opts, eye)
+        if visible is not None:
+            keep = np.zeros(len(self._buffers.batch), dtype=bool)
+            keep[visible] = True
+            rows = rows[keep[rows]]
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnable(GL_LINE_SMOOTH)
+        glHint(GL_LINE_SMOOTH_HINT, GL_NICEST)
+        try:
+            if reps is not None:
+                # Subárvores colapsadas ocupam poucos pixels: vão antes, sem ordenar
+                self._draw_batch(model, opts, _TRANSPARENT_ALPHA, rows=reps, buffers=self._lod_buffers)
+            self._draw_batch(model, opts, _TRANSPARENT_ALPHA, rows=rows)
+        finally:
+            glDisable(GL_BLEND)
+            glDisable(GL_LINE_SMOOTH)
 
-        depth_max = model.max_depth
-        radii = [(s.r0 + s.r1) / 2.0 for s in segments]
-        radius_min = min(radii) if radii else 0.001
-        radius_max = max(radii) if radii else 0.01
+    def _focal_pixels(self) -> float:
+        """Distância focal da projeção em pixels (altura da janela, fovy de setup_camera)."""
+        return self.height / (2.0 * math.tan(math.radians(_FOV_Y) / 2.0))
+
+    def _tubes_active(self, opts) -> bool:
+        return (self.tubes and self.shading and
+                not (opts.get('transparency', False) and self.transparency_mode == 'sorted'))
+
+    def _render_tubes(self, model, opts, eye, transparency):
+        """Tubos instanciados por nível de detalhe + ramos sub-pixel como linhas de 1 px (opacos ou OIT)."""
+        self._ensure_batch(model, opts)
+        tubes = self._tubes
+        fixed_radius = opts.get('fixed_radius', False)
+        tubes.update(model, eye, self._focal_pixels(), fixed_radius)
+        alpha = _TRANSPARENT_ALPHA if transparency else 1.0
+        kind = 'oit' if transparency else 'color'
+        if transparency:
+            self._oit.begin(self.width, self.height, self._depth_range(model, np.asarray(eye)), alpha,
+                            tubes.shader.program('oit'))
+        try:
+            tubes.begin(kind, fixed_radius=fixed_radius, **self._color_uniforms(model, opts, alpha))
+            try:
+                with PROFILER.timer('draw'):
+                    tubes.draw(model.visible_count)
+            finally:
+                tubes.end()
+            rows = tubes.visible_line_rows(model.visible_count)
+            if len(rows):
+                if transparency:
+                    self._oit.use(self._shader.program('oit'))
+                self._draw_batch(model, opts, alpha, rows=self._batch_rows(rows), kind=kind, line_width=1.0)
+        finally:
+            if transparency:
+                self._oit.end()
 
-        light_dir = np.array([0.5, 1.0, 0.5], dtype=np.float64)
-        light_dir = light_dir / np.linalg.norm(light_dir)
+    def _render_retained(self, model, opts, eye):
+        self._ensure_batch(model, opts)
+        rows, reps = self._line_rows(model, opts, eye)
+        self._draw_batch(model, opts, rows=rows)
+        if reps is not None:
+            self._draw_batch(model, opts, rows=reps, buffers=self._lod_buffers)
 
+    def setup_camera(self, view_params, pick_region=None):
+        """
+        Projeção + câmera orbital. pick_region=(x, y, largura, altura) em pixels da janela
+        (y para cima) restringe a projeção a essa região (gluPickMatrix), para o picking por cor.
+        Retorna a posição do olho.
+        """
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
+        if pick_region is not None:
+            gluPickMatrix(*pick_region, [0, 0, self.width, self.height])
         aspect = self.width / max(self.height, 1)
-        gluPerspective(45.0, aspect, 0.001, 10.0)
+        gluPerspective(_FOV_Y, aspect, 0.001, 10.0)
 
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
@@ -93,44 +589,113 @@ class Renderer3D:
         eye_y = t[1] + d * math.sin(pitch)
         eye_z = t[2] + d * math.cos(pitch) * math.cos(yaw)
         gluLookAt(eye_x, eye_y, eye_z, t[0], t[1], t[2], 0.0, 1.0, 0.0)
+        return eye_x, eye_y, eye_z
+
+    def render_ids(self, model, view_params, options=None, pick_region=None):
+        """
+        Desenha cada ramo com sua cor-id (ver segment_batch.rows_to_rgba) no framebuffer atual,
+        reaproveitando os VBOs do modo retido: mesma câmera, espessuras e visible_count da tela.
+        Sem blend, suavização ou dithering, para os ids chegarem intactos ao framebuffer.
+        """
+        if not model or not len(model.segment_table):
+            return
+        opts = options or {}
+        eye = self.setup_camera(view_params, pick_region)
+        glEnable(GL_DEPTH_TEST)
+        glDepthFunc(GL_LEQUAL)
+        glShadeModel(GL_FLAT)
+        glDisable(GL_BLEND)
+        glDisable(GL_LINE_SMOOTH)
+        glDisable(GL_DITHER)
+        try:
+            self._ensure_batch(model, opts)
+            if self._tubes_active(opts):
+                # Eixos como linhas de 1 px (ramos sub-pixel) e os tubos por cima, com a cor-id no shader
+                self._buffers.draw_ids(model.visible_count, 1.0)
+                tubes = self._tubes
+                tubes.update(model, eye, self._focal_pixels(), opts.get('fixed_radius', False))
+                tubes.begin('color', fixed_radius=opts.get('fixed_radius', False), ids=True,
+                            **self._color_uniforms(model, opts, 1.0))
+                try:
+                    tubes.draw(model.visible_count)
+                finally:
+                    tubes.end()
+            else:
+                self._buffers.draw_ids(model.visible_count, self._line_width(opts))
+        finally:
+            glEnable(GL_DITHER)
+            glLineWidth(1.0)
+
+    def render(self, model, view_params, options=None):
+        if not model or not len(model.segment_table):
+            return
+        opts = options or {}
+        fixed_radius = opts.get('fixed_radius', False)
+        shade_model = opts.get('shade_model', GL_SMOOTH)
+        transparency = opts.get('transparency', False)
+        color_by = opts.get('color_by', 'depth')
+        selected_id = opts.get('selected_segment_id', -1)
+
+        eye_x, eye_y, eye_z = self.setup_camera(view_params)
 
         glEnable(GL_DEPTH_TEST)
         glDepthFunc(GL_LEQUAL)
         glShadeModel(shade_model)
 
+        eye = (eye_x, eye_y, eye_z)
+        # Cada falha desliga um recurso (tubos, OIT, shaders, VBOs) e tenta de novo
+        while self.retained:
+            try:
+                if self._tubes_active(opts):
+                    self._render_tubes(model, opts, eye, transparency)
+                elif transparency and self.transparency_mode == 'oit':
+                    self._render_oit(model, opts, eye)
+                elif transparency:
+                    self._render_sorted(model, opts, eye)
+                else:
+                    self._render_retained(model, opts, eye)
+                glLineWidth(1.0)
+                return
+            except (GLError, NullFunctionError, ShaderError) as e:
+                if self._tubes_active(opts):
+                    print(f"Tubos indisponíveis ({e}); usando linhas")
+                    self.tubes = False
+                elif transparency and self.transparency_mode == 'oit':
+                    print(f"OIT indisponível ({e}); usando ordenação em cache")
+                    self.transparency_mode = 'sorted'
+                elif self.shading:
+                    print(f"Shaders indisponíveis ({e}); cores calculadas na CPU")
+                    self.shading = False
+                else:
+                    print(f"VBO indisponível ({e}); usando modo imediato")
+                    self.retained = False
+
+        segments = model.segment_list
+        if model.visible_count is not None:
+            segments = model.segment_list[:model.visible_count]
+
+        depth_max = model.max_depth
+        radii = [(s.r0 + s.r1) / 2.0 for s in segments]
+        radius_min = min(radii) if radii else 0.001
+        radius_max = max(radii) if radii else 0.01
+
         if transparency:
             glEnable(GL_BLEND)
             glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
             glEnable(GL_LINE_SMOOTH)
             glHint(GL_LINE_SMOOTH_HINT, GL_NICEST)
-            cam_pos = np.array([eye_x, eye_y, eye_z])
-            segs_with_dist = []
-            for seg in segments:
-                mid = (seg.p0 + seg.p1) / 2.0
-                dist = np.linalg.norm(mid - cam_pos)
-                segs_with_dist.append((seg, dist))
-            segs_with_dist.sort(key=lambda x: -x[1])
-            segments = [s for s, _ in segs_with_dist]
+            order = self.back_to_front(model, eye)
+            if model.visible_count is not None:
+                order = order[order < model.visible_count]
+            segments = [model.segment_list[k] for k in order.tolist()]
 
         for seg in segments:
             r = 0.01 if fixed_radius else max(seg.r0, seg.r1, 0.002)
             line_width = max(1.0, r * 80.0)
             glLineWidth(line_width)
 
-            dot = max(0.0, np.dot(seg.dir, light_dir))
-            light_factor = 0.4 + 0.6 * dot
-            base = self._get_color(seg, color_by, depth_max, radius_min, radius_max, 1.0)
-            if seg.id == selected_id:
-                c0 = c1 = (1.0, 0.8, 0.2)
-            else:
-                if shade_model == GL_SMOOTH:
-                    k = 0.3 * (2.0 * dot - 1.0)
-                    f0 = max(0.3, light_factor - k)
-                    f1 = max(0.3, light_factor + k)
-                    c0 = tuple(max(0, min(1, base[i] * f0)) for i in range(3))
-                    c1 = tuple(max(0, min(1, base[i] * f1)) for i in range(3))
-                else:
-                    c0 = c1 = self._get_color(seg, color_by, depth_max, radius_min, radius_max, light_factor)
+            c0, c1 = self._segment_colors(seg, shade_model, color_by, depth_max,
+                                          radius_min, radius_max, selected_id)
             a = 0.7 if transparency else 1.0
             glBegin(GL_LINES)
             if transparency:
@@ -0,0 +1,333 @@
+"""
+Geometria "retida" dos ramos para desenho em lote (VBO), usada por Renderer e Renderer3D.
+Os arrays por vértice (posição, cor) são montados uma vez por modelo/opções, com os
+ramos agrupados por espessura (quantize_widths): cada grupo vira um único glDrawArrays(GL_LINES).
+A mesma geometria desenhada com cores-id (linha da SegmentTable em RGB) serve ao picking por cor.
+Com shader (src/segment_shader.py) o batch leva atributos em vez de cores: normals (direção) e
+a0/a1 (atributo genérico de cada ponta), e a cor sai das uniforms.
+O envio também pode ser feito em fatias (upload_chunks + drain), alguns MB por frame, para a
+troca de step não travar o laço de render.
+"""
+import time
+import ctypes
+import numpy as np
+from OpenGL.GL import (glGenBuffers, glDeleteBuffers, glBindBuffer, glBufferData, glBufferSubData,
+                       glVertexPointer, glColorPointer, glNormalPointer, glEnableClientState, glDisableClientState,
+                       glVertexAttribPointer, glEnableVertexAttribArray, glDisableVertexAttribArray, glLineWidth,
+                       glDrawArrays, glDrawElements, GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER, GL_STATIC_DRAW,
+                       GL_STREAM_DRAW, GL_VERTEX_ARRAY,
+                       GL_COLOR_ARRAY, GL_NORMAL_ARRAY, GL_FLOAT, GL_FALSE, GL_UNSIGNED_BYTE, GL_UNSIGNED_INT,
+                       GL_LINES)
+from src.profiler import PROFILER
+
+DEFAULT_UPLOAD_CHUNK = 1024 * 1024
+
+
+def quantize_widths(widths: np.ndarray, n_buckets=8) -> tuple:
+    """
+    Agrupa larguras de linha em até n_buckets faixas geométricas, ou:
+    - 'integer': na largura inteira mais próxima, a que o GL usa em linhas sem anti-aliasing
+      (nada muda na tela);
+    - 'exact': um grupo por largura distinta (linhas com anti-aliasing usam a largura fracionária).
+    Retorna (grupo de cada ramo, largura representativa de cada grupo).
+    """
+    w = np.asarray(widths, dtype=np.float64)
+    if w.size == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    if n_buckets in ('integer', 'exact'):
+        values = np.floor(w + 0.5) if n_buckets == 'integer' else w.astype(np.float32)
+        rep, bucket = np.unique(values, return_inverse=True)
+        return bucket.astype(np.int32).ravel(), rep.astype(np.float32)
+    lo = max(float(w.min()), 1e-3)
+    hi = max(float(w.max()), lo)
+    if n_buckets <= 1 or hi / lo < 1.0 + 1e-6:
+        return np.zeros(w.size, dtype=np.int32), np.array([hi], dtype=np.float32)
+    edges = np.geomspace(lo, hi, n_buckets + 1)
+    bucket = np.clip(np.searchsorted(edges, w, side='right') - 1, 0, n_buckets - 1)
+    # Centro geométrico de cada faixa: erro relativo de espessura <= (hi/lo)^(1/2n)
+    rep = np.sqrt(edges[:-1] * edges[1:])
+    return bucket.astype(np.int32), rep.astype(np.float32)
+
+
+def rows_to_rgba(rows: np.ndarray) -> np.ndarray:
+    """Codifica linhas da SegmentTable como cores RGBA8 (linha + 1 em 24 bits; 0 = fundo)."""
+    code = np.asarray(rows, dtype=np.uint32) + 1
+    rgba = np.empty((len(code), 4), dtype=np.uint8)
+    rgba[:, 0] = code & 0xFF
+    rgba[:, 1] = (code >> 8) & 0xFF
+    rgba[:, 2] = (code >> 16) & 0xFF
+    rgba[:, 3] = 255
+    return rgba
+
+
+def rgba_to_rows(pixels: np.ndarray) -> np.ndarray:
+    """Inverso de rows_to_rgba para pixels lidos do framebuffer (...×4 uint8). Fundo -> -1."""
+    p = np.asarray(pixels, dtype=np.int64)
+    return (p[..., 0] | (p[..., 1] << 8) | (p[..., 2] << 16)) - 1
+
+
+class SegmentBatch:
+    """
+    Ramos ordenados por grupo de espessura (e, dentro do grupo, na ordem original/BFS).
+    positions/colors têm 2 vértices por ramo (p0, p1), prontos para GL_LINES.
+    c0/c1 podem ser None (cor calculada no shader a partir de normals e a0/a1).
+    keep_order: os ramos ficam na ordem original e cada grupo é um trecho contínuo dela com a mesma
+    espessura (um draw call por trecho). Necessário com blend/anti-aliasing, em que a ordem de
+    desenho decide o que fica por cima.
+    """
+
+    def __init__(self, p0: np.ndarray, p1: np.ndarray, c0, c1, widths: np.ndarray, n_buckets=8,
+                 normals: np.ndarray = None, a0: np.ndarray = None, a1: np.ndarray = None,
+                 keep_order: bool = False):
+        n = len(p0)
+        bucket, bucket_widths = quantize_widths(widths, n_buckets)
+        if keep_order:
+            order = np.arange(n, dtype=np.int64)
+            first = np.flatnonzero(np.diff(bucket, prepend=-1)) if n else np.zeros(0, dtype=np.int64)
+            self.bucket_widths = bucket_widths[bucket[first]]
+            self.bucket_first = first.astype(np.int64)
+            self.bucket_count = np.diff(np.append(first, n)).astype(np.int64)
+        else:
+            # Ordenação estável: mantém a ordem BFS dentro de cada grupo
+            order = np.argsort(bucket, kind='stable')
+            counts = np.bincount(bucket, minlength=len(bucket_widths))
+            self.bucket_widths = bucket_widths
+            self.bucket_first = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+            self.bucket_count = counts.astype(np.int64)
+        self.ordered = keep_order
+        self.rank = order.astype(np.int64)   # posição original (BFS) de cada ramo já ordenado
+
+        self.positions = np.empty((2 * n, 3), dtype=np.float32)
+        self.positions[0::2] = p0[order]
+        self.positions[1::2] = p1[order]
+        self.colors = self._interleave(c0, c1, order)
+        self.normals = None if normals is None else np.repeat(np.asarray(normals, dtype=np.float32)[order], 2, axis=0)
+        self.attributes = self._interleave(a0, a1, order)
+
+    @staticmethod
+    def _interleave(v0, v1, order):
+        """Valores por vértice (p0, p1 alternados) na ordem do batch; None se não houver."""
+        if v0 is None:
+            return None
+        out = np.empty((2 * len(order), v0.shape[1]), dtype=np.float32)
+        out[0::2] = v0[order]
+        out[1::2] = v1[order]
+        return out
+
+    def __len__(self):
+        return len(self.rank)
+
+    def id_colors(self) -> np.ndarray:
+        """Cor-id (linha da SegmentTable) por vértice, na mesma ordem de positions."""
+        return np.repeat(rows_to_rgba(self.rank), 2, axis=0)
+
+    def row_of_rank(self) -> np.ndarray:
+        """Inverso de rank: linha do batch de cada ramo na ordem original (BFS)."""
+        inverse = np.empty(len(self.rank), dtype=np.int64)
+        inverse[self.rank] = np.arange(len(self.rank))
+        return inverse
+
+    def width_runs(self, rows: np.ndarray) -> tuple:
+        """
+        Para linhas do batch numa ordem qualquer: (índices de vértice GL_LINES, início de cada
+        trecho, largura de cada trecho), com um trecho por sequência de ramos da mesma largura.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        widths = np.repeat(self.bucket_widths, self.bucket_count)[rows]
+        starts = (np.flatnonzero(np.diff(widths, prepend=np.float32(-1.0))) if len(rows)
+                  else np.zeros(0, dtype=np.int64))
+        indices = np.empty(2 * len(rows), dtype=np.uint32)
+        indices[0::2] = 2 * rows
+        indices[1::2] = 2 * rows + 1
+        return indices, starts, widths[starts]
+
+    def draw_ranges(self, visible_count=None, line_width=None):
+        """
+        (largura, primeiro vértice, nº de vértices) por grupo não vazio.
+        visible_count limita aos primeiros N ramos da ordem original: como cada grupo está
+        em ordem BFS, o limite vira um searchsorted por grupo (sem fatiar listas).
+        line_width, se dado, substitui a largura de todos os grupos (raio fixo).
+        """
+        ranges = []
+        for b, width in enumerate(self.bucket_widths):
+            first = int(self.bucket_first[b])
+            count = int(self.bucket_count[b])
+            if self.ordered and visible_count is not None and first >= visible_count:
+                break   # na ordem original: os trechos seguintes estão todos além do limite
+            if visible_count is not None:
+                count = int(np.searchsorted(self.rank[first:first + count], visible_count))
+            if count > 0:
+                ranges.append((float(width if line_width is None else line_width), 2 * first, 2 * count))
+        return ranges
+
+
+def drain(chunks, deadline: float) -> bool:
+    """Consome o gerador de upload_chunks até o fim (True) ou até perf_counter() passar de deadline (False)."""
+    for _ in chunks:
+        if time.perf_counter() >= deadline:
+            return False
+    return True
+
+
+class BatchBuffers:
+    """VBOs (posição, cor, cor-id, cor com alfa, normal, atributo) de um SegmentBatch no contexto GL atual."""
+
+    def __init__(self):
+        self.vbos = None
+        self.batch = None
+        self._ids_batch = None
+        self._alpha_key = None
+        self._capacity = [0] * 6   # bytes alocados em cada VBO
+        self.ibo = None
+        self._runs = None          # (rows, batch, início, fim e largura de cada trecho) já no ibo
+
+    def _write(self, k: int, data: np.ndarray):
+        """Atualiza o VBO k no lugar (glBufferSubData) se couber; senão realoca com folga de 50%."""
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbos[k])
+        if data.nbytes <= self._capacity[k]:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        else:
+            # Folga para o step seguinte (árvore crescendo) caber sem realocar
+            self._capacity[k] = data.nbytes + data.nbytes // 2
+            glBufferData(GL_ARRAY_BUFFER, self._capacity[k], None, GL_STATIC_DRAW)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def upload(self, batch: SegmentBatch):
+        for _ in self.upload_chunks(batch, None):
+            pass
+
+    def upload_chunks(self, batch: SegmentBatch, chunk_bytes: int = DEFAULT_UPLOAD_CHUNK):
+        """
+        upload() em fatias de até chunk_bytes (None = um array por vez), com um yield depois de cada
+        glBufferSubData: quem consome decide quantas fatias mandar por frame. Os VBOs ficam com
+        dados misturados até o fim, então só faz sentido em buffers que não estão sendo desenhados;
+        self.batch passa a ser `batch` depois da última fatia.
+        """
+        if self.vbos is None:
+            self.vbos = glGenBuffers(6)
+        for k, data in ((0, batch.positions), (1, batch.colors), (4, batch.normals), (5, batch.attributes)):
+            if data is None:
+                continue
+            row_bytes = data.nbytes // max(len(data), 1)
+            step = len(data) if chunk_bytes is None else max(1, chunk_bytes // max(row_bytes, 1))
+            if data.nbytes > self._capacity[k]:
+                self._capacity[k] = data.nbytes + data.nbytes // 2
+                glBindBuffer(GL_ARRAY_BUFFER, self.vbos[k])
+                glBufferData(GL_ARRAY_BUFFER, self._capacity[k], None, GL_STATIC_DRAW)
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+                # A alocação de um buffer grande também custa: conta como uma fatia
+                yield
+            for start in range(0, len(data), step):
+                piece = data[start:start + step]
+                # Religado a cada fatia: entre um yield e outro o frame liga outros buffers
+                glBindBuffer(GL_ARRAY_BUFFER, self.vbos[k])
+                glBufferSubData(GL_ARRAY_BUFFER, start * row_bytes, piece.nbytes, piece)
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+                yield
+        self.batch = batch
+
+    def draw(self, visible_count=None, attribute=None, line_width=None):
+        """
+        Um glLineWidth + glDrawArrays(GL_LINES) por grupo de espessura. Com attribute (localização
+        do atributo genérico do shader ligado) manda normals/attributes em vez das cores.
+        """
+        self._draw(self._bind(1, GL_FLOAT, attribute), visible_count, line_width)
+
+    def draw_ids(self, visible_count=None, line_width=None):
+        """Mesma geometria de draw(), com a cor-id de cada ramo (para picking por cor)."""
+        if self._ids_batch is not self.batch:
+            # Cores-id só dependem da ordem dos ramos: enviadas uma vez por batch, no primeiro pick
+            self._write(2, self.batch.id_colors())
+            self._ids_batch = self.batch
+        self._draw(self._bind(2, GL_UNSIGNED_BYTE), visible_count, line_width)
+
+    def draw_rows(self, rows: np.ndarray, alpha: float, attribute=None, line_width=None):
+        """
+        Desenha as linhas do batch na ordem dada (p.ex. de trás para frente), com alfa fixo:
+        um glLineWidth + glDrawElements por trecho de ramos consecutivos da mesma largura.
+        Com attribute o alfa é uniform do shader e as cores da CPU não são usadas.
+        """
+        if attribute is None and self._alpha_key != (self.batch, alpha):
+            colors = self.batch.colors.copy()
+            colors[:, 3] = alpha
+            self._write(3, colors)
+            self._alpha_key = (self.batch, alpha)
+        # Índices no buffer de elementos, reenviados só quando `rows` é outro array (câmera andou)
+        if self._runs is None or self._runs[0] is not rows or self._runs[1] is not self.batch:
+            indices, starts, widths = self.batch.width_runs(rows)
+            if self.ibo is None:
+                self.ibo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STREAM_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+            ends = np.append(starts[1:], len(rows))
+            self._runs = (rows, self.batch, starts.tolist(), ends.tolist(), widths.tolist())
+        _, _, starts, ends, widths = self._runs
+        attribute = self._bind(3, GL_FLOAT, attribute)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        try:
+            for start, end, width in zip(starts, ends, widths):
+                glLineWidth(width if line_width is None else line_width)
+                glDrawElements(GL_LINES, 2 * (end - start), GL_UNSIGNED_INT, ctypes.c_void_p(8 * start))
+            if PROFILER.enabled:
+                PROFILER.count('draw_calls', len(starts))
+                PROFILER.count('segments_drawn', len(rows))
+        finally:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+            self._unbind(attribute)
+
+    def _bind(self, color_vbo, color_type, attribute=None):
+        """
+        Liga posição + cor RGBA do VBO color_vbo ou, com attribute, normal + atributo genérico
+        para o shader. Retorna attribute para _unbind.
+        """
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbos[0])
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        if attribute is None:
+            glEnableClientState(GL_COLOR_ARRAY)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbos[color_vbo])
+            glColorPointer(4, color_type, 0, None)
+        else:
+            if self.batch.normals is not None:
+                glEnableClientState(GL_NORMAL_ARRAY)
+                glBindBuffer(GL_ARRAY_BUFFER, self.vbos[4])
+                glNormalPointer(GL_FLOAT, 0, None)
+            glEnableVertexAttribArray(attribute)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbos[5])
+            glVertexAttribPointer(attribute, self.batch.attributes.shape[1], GL_FLOAT, GL_FALSE, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return attribute
+
+    def _unbind(self, attribute):
+        if attribute is not None:
+            glDisableVertexAttribArray(attribute)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def _draw(self, attribute, visible_count, line_width):
+        try:
+            ranges = self.batch.draw_ranges(visible_count, line_width)
+            for width, first, count in ranges:
+                glLineWidth(width)
+                glDrawArrays(GL_LINES, first, count)
+            if PROFILER.enabled:
+                PROFILER.count('draw_calls', len(ranges))
+                PROFILER.count('segments_drawn', sum(count for _, _, count in ranges) // 2)
+        finally:
+            self._unbind(attribute)
+
+    def release(self):
+        if self.vbos is not None:
+            glDeleteBuffers(6, self.vbos)
+            self.vbos = None
+            self._capacity = [0] * 6
+        if self.ibo is not None:
+            glDeleteBuffers(1, [self.ibo])
+            self.ibo = None
+        self._runs = None
+        self.batch = None
+        self._ids_batch = None
+        self._alpha_key = None
@@ -0,0 +1,197 @@
+"""
+Cor e iluminação dos ramos na GPU - TP1/TP2
+Os VBOs guardam só atributos por vértice que não dependem das opções de visualização:
+direção do ramo (gl_Normal) e a_segment = (depth, raio médio, ponta 0/1, id). O vertex shader
+calcula a cor com um colormap em textura 1D e a iluminação Flat/Gouraud do modo imediato
+(mesmas fórmulas de Renderer3D._segment_colors), e destaca o ramo selecionado.
+Trocar depth/radius, Flat/Smooth ou a seleção muda só uniforms: nada é remontado nem reenviado.
+
+Dois programas com o mesmo vertex shader: 'color' (cor direto no framebuffer) e 'oit'
+(fragment shader de acumulação do WeightedOIT, mesmas uniforms u_alpha/u_depth_range).
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from src.oit import ACCUM_FS
+
+# Uniforms e funções de cor comuns aos vertex shaders de ramos (linhas aqui, tubos em src/tubes.py)
+COLOR_GLSL = """
+uniform sampler1D u_colormap;
+uniform float u_colormap_size;
+uniform int u_color_by;            // 0 = depth, 1 = radius
+uniform float u_max_depth;
+uniform vec2 u_radius_range;
+uniform int u_lighting;            // 0 = sem luz, 1 = flat, 2 = smooth
+uniform vec3 u_light_dir;
+uniform float u_selected;
+uniform vec3 u_selected_rgb;
+uniform float u_alpha;
+
+vec3 colormap_rgb(float depth, float radius) {
+    float t;
+    if (u_color_by == 0) {
+        t = 1.0 - depth / max(u_max_depth, 1.0);
+    } else if (u_radius_range.y > u_radius_range.x) {
+        t = (radius - u_radius_range.x) / (u_radius_range.y - u_radius_range.x);
+    } else {
+        t = 0.5;
+    }
+    t = clamp(t, 0.0, 1.0);
+    return texture1DLod(u_colormap, (t * (u_colormap_size - 1.0) + 0.5) / u_colormap_size, 0.0).rgb;
+}
+
+vec4 shade(vec3 base, float f, float id) {
+    vec3 rgb = clamp(base * f, 0.0, 1.0);
+    if (abs(id - u_selected) < 0.5) {
+        rgb = u_selected_rgb;
+    }
+    return vec4(rgb, u_alpha);
+}
+"""
+
+_LINE_VS = """#version 120
+attribute vec4 a_segment;          // depth, raio médio, ponta (0 = p0, 1 = p1), id
+varying vec4 v_color;
+varying float v_depth;
+""" + COLOR_GLSL + """
+void main() {
+    gl_Position = ftransform();
+    v_depth = -(gl_ModelViewMatrix * gl_Vertex).z;
+    float f = 1.0;
+    if (u_lighting > 0) {
+        float d = max(0.0, dot(gl_Normal, u_light_dir));
+        f = 0.4 + 0.6 * d;
+        if (u_lighting == 2) {
+            float k = 0.3 * (2.0 * d - 1.0);
+            f = max(0.3, a_segment.z < 0.5 ? f - k : f + k);
+        }
+    }
+    v_color = shade(colormap_rgb(a_segment.x, a_segment.y), f, a_segment.w);
+}
+"""
+
+_COLOR_FS = """#version 120
+varying vec4 v_color;
+void main() {
+    gl_FragColor = v_color;
+}
+"""
+
+_UNIFORMS = ('u_colormap', 'u_colormap_size', 'u_color_by', 'u_max_depth', 'u_radius_range', 'u_lighting',
+             'u_light_dir', 'u_selected', 'u_selected_rgb', 'u_alpha')
+_LIGHTING = {'none': 0, 'flat': 1, 'smooth': 2}
+# Atributo genérico fixado antes do link: longe dos que o perfil compat associa a gl_Vertex/gl_Normal/gl_Color
+SEGMENT_ATTRIBUTE = 6
+
+
+def segment_attributes(depth, radius, ids) -> tuple:
+    """Atributos a_segment (p0, p1) por ramo: N×4 float32 cada, só a ponta muda."""
+    a0 = np.empty((len(ids), 4), dtype=np.float32)
+    a0[:, 0] = depth
+    a0[:, 1] = radius
+    a0[:, 2] = 0.0
+    a0[:, 3] = ids
+    a1 = a0.copy()
+    a1[:, 2] = 1.0
+    return a0, a1
+
+
+class ShaderError(RuntimeError):
+    """O driver recusou compilar ou ligar um shader (os renderers caem para o caminho sem shaders)."""
+
+
+def compile_shader(source: str, shader_type) -> int:
+    """shaders.compileShader com a falha de compilação como ShaderError."""
+    try:
+        return shaders.compileShader(source, shader_type)
+    except RuntimeError as e:
+        raise ShaderError(f"compilação do shader falhou: {e}") from e
+
+
+class SegmentShader:
+    def __init__(self, colormap: np.ndarray, light_dir=(0.0, 0.0, 1.0), selected_rgb=(1.0, 0.8, 0.2),
+                 vertex_source: str = _LINE_VS, attributes=None, uniforms=()):
+        """
+        colormap: K×3 cores amostradas em t = 0..1 (interpoladas linearmente pela textura).
+        vertex_source/attributes/uniforms: outro vertex shader com COLOR_GLSL (ex.: tubos), seus
+        atributos {nome: localização} e as uniforms próprias dele (ver location()).
+        """
+        self.colormap = np.ascontiguousarray(colormap, dtype=np.float32)
+        self.light_dir = tuple(float(v) for v in light_dir)
+        self.selected_rgb = tuple(float(v) for v in selected_rgb)
+        self.vertex_source = vertex_source
+        self.attributes = attributes if attributes is not None else {'a_segment': SEGMENT_ATTRIBUTE}
+        self.uniforms = _UNIFORMS + tuple(uniforms)
+        self.texture = None
+        self._programs = {}    # tipo -> (programa, localizações das uniforms)
+
+    def _program(self, kind: str):
+        """Compila o programa na primeira vez (ShaderError se o driver recusar)."""
+        entry = self._programs.get(kind)
+        if entry is None:
+            vs = compile_shader(self.vertex_source, GL_VERTEX_SHADER)
+            fs = compile_shader(_COLOR_FS if kind == 'color' else ACCUM_FS, GL_FRAGMENT_SHADER)
+            program = glCreateProgram()
+            glAttachShader(program, vs)
+            glAttachShader(program, fs)
+            for name, location in self.attributes.items():
+                glBindAttribLocation(program, location, name)
+            glLinkProgram(program)
+            glDeleteShader(vs)
+            glDeleteShader(fs)
+            if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+                log = glGetProgramInfoLog(program)
+                glDeleteProgram(program)
+                raise ShaderError(f"link do shader de ramos falhou: {log}")
+            locations = {name: glGetUniformLocation(program, name) for name in self.uniforms}
+            entry = self._programs[kind] = (program, locations)
+        return entry
+
+    def program(self, kind: str = 'color') -> int:
+        return self._program(kind)[0]
+
+    def location(self, kind: str, name: str) -> int:
+        return self._program(kind)[1][name]
+
+    def _ensure_texture(self):
+        if self.texture is not None:
+            return
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_1D, self.texture)
+        glTexImage1D(GL_TEXTURE_1D, 0, GL_RGB32F, len(self.colormap), 0, GL_RGB, GL_FLOAT, self.colormap)
+        glTexParameteri(GL_TEXTURE_1D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_1D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_1D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_1D, 0)
+
+    def begin(self, kind: str = 'color', color_by: str = 'depth', max_depth: float = 1.0, radius_range=(0.0, 1.0),
+              lighting: str = 'smooth', selected_id: int = -1, alpha: float = 1.0) -> int:
+        """Liga o programa com as opções atuais; retorna a localização de a_segment para o VBO."""
+        program, loc = self._program(kind)
+        self._ensure_texture()
+        glUseProgram(program)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_1D, self.texture)
+        glUniform1i(loc['u_colormap'], 0)
+        glUniform1f(loc['u_colormap_size'], float(len(self.colormap)))
+        glUniform1i(loc['u_color_by'], 0 if color_by == 'depth' else 1)
+        glUniform1f(loc['u_max_depth'], float(max_depth))
+        glUniform2f(loc['u_radius_range'], float(radius_range[0]), float(radius_range[1]))
+        glUniform1i(loc['u_lighting'], _LIGHTING[lighting])
+        glUniform3f(loc['u_light_dir'], *self.light_dir)
+        glUniform1f(loc['u_selected'], float(selected_id))
+        glUniform3f(loc['u_selected_rgb'], *self.selected_rgb)
+        glUniform1f(loc['u_alpha'], float(alpha))
+        return SEGMENT_ATTRIBUTE
+
+    def end(self):
+        glBindTexture(GL_TEXTURE_1D, 0)
+        glUseProgram(0)
+
+    def release(self):
+        for program, _ in self._programs.values():
+            glDeleteProgram(program)
+        self._programs = {}
+        if self.texture is not None:
+            glDeleteTextures([self.texture])
+            self.texture = None
@@ -0,0 +1,109 @@
+"""
+Overlay de desempenho - TP1/TP2
+Gráfico de barras dos últimos frames (tempo de frame em ms, uma barra por frame) no canto da
+janela, com linhas de referência em 16.7 ms (60 FPS) e 33.3 ms (30 FPS) e marcas de p50/p95/p99.
+Sem fonte bitmap no projeto (não usamos GLUT), o texto com p50/p95/p99 de cada timer vai para o
+título da janela, atualizado algumas vezes por segundo.
+"""
+import time
+import numpy as np
+import glfw
+from OpenGL.GL import *
+from src.profiler import PROFILER
+
+_GRAPH_MS = 50.0   # topo do gráfico
+_REFERENCE_MS = (1000.0 / 60.0, 1000.0 / 30.0)
+
+
+class StatsOverlay:
+    def __init__(self, title: str, width: int = 300, height: int = 80, title_interval: float = 0.5):
+        self.title = title
+        self.visible = False
+        self.width = width
+        self.height = height
+        self.title_interval = title_interval
+        self._last_title = 0.0
+
+    def toggle(self, window):
+        """Liga/desliga o overlay (e a instrumentação junto: desligada ela não custa nada)."""
+        self.visible = not self.visible
+        PROFILER.set_enabled(self.visible)
+        if not self.visible:
+            glfw.set_window_title(window, self.title)
+
+    def update_title(self, window):
+        now = time.perf_counter()
+        if now - self._last_title < self.title_interval:
+            return
+        self._last_title = now
+        lines = PROFILER.report()
+        if lines:
+            glfw.set_window_title(window, f"{self.title} | ms p50/p95/p99: " + " | ".join(lines))
+
+    def draw(self, window, viewport_width: int, viewport_height: int):
+        """Desenha o gráfico sobre o frame atual (antes do swap) sem alterar o estado do renderer."""
+        if not self.visible:
+            return
+        if window is not None:
+            self.update_title(window)
+        frame_ms = PROFILER.recent('frame')[-self.width:]
+        if not len(frame_ms):
+            return
+
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT | GL_LINE_BIT | GL_COLOR_BUFFER_BIT)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, viewport_width, 0, viewport_height, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LINE_SMOOTH)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glLineWidth(1.0)
+
+        x0, y0 = 10.0, 10.0
+        scale = self.height / _GRAPH_MS
+        glColor4f(0.0, 0.0, 0.0, 0.6)
+        glRectf(x0, y0, x0 + self.width, y0 + self.height)
+
+        # Uma linha vertical por frame: verde < 16.7 ms, amarelo < 33.3 ms, vermelho acima
+        n = len(frame_ms)
+        x = x0 + np.arange(n, dtype=np.float32) + 0.5
+        top = y0 + np.minimum(frame_ms, _GRAPH_MS).astype(np.float32) * scale
+        vertices = np.empty((2 * n, 2), dtype=np.float32)
+        vertices[0::2, 0] = vertices[1::2, 0] = x
+        vertices[0::2, 1] = y0
+        vertices[1::2, 1] = top
+        colors = np.empty((n, 3), dtype=np.float32)
+        colors[:] = (0.2, 0.9, 0.2)
+        colors[frame_ms >= _REFERENCE_MS[0]] = (0.95, 0.85, 0.2)
+        colors[frame_ms >= _REFERENCE_MS[1]] = (0.95, 0.25, 0.2)
+        colors = np.repeat(colors, 2, axis=0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(GL_LINES, 0, 2 * n)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        # Referências 60/30 FPS (cinza) e p50/p95/p99 do frame (branco, mais forte nos percentis altos)
+        marks = [(ms, (0.6, 0.6, 0.6, 0.6)) for ms in _REFERENCE_MS]
+        p50, p95, p99 = PROFILER.percentiles('frame')
+        marks += [(p50, (1.0, 1.0, 1.0, 0.4)), (p95, (1.0, 1.0, 1.0, 0.7)), (p99, (1.0, 1.0, 1.0, 1.0))]
+        glBegin(GL_LINES)
+        for ms, color in marks:
+            y = y0 + min(ms, _GRAPH_MS) * scale
+            glColor4f(*color)
+            glVertex2f(x0, y)
+            glVertex2f(x0 + self.width, y)
+        glEnd()
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
@@ -0,0 +1,124 @@
+"""
+Cache LRU de modelos por step (arquivo .vtk), com orçamento de memória, e prefetch
+em background (ThreadPoolExecutor) dos steps vizinhos. Com o vizinho já carregado,
+trocar de step vira uma consulta ao dicionário. request() é a versão sem bloqueio de get()
+(usada pelo StepLoader, src/step_loader.py).
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class StepCache:
+    def __init__(self, loader, max_bytes: int = DEFAULT_MAX_BYTES, max_workers: int = 2):
+        """
+        loader: função filepath -> modelo (ou None em caso de erro), ex. load_vtk_3d.
+        max_bytes: orçamento de memória; os modelos menos usados recentemente são descartados.
+        """
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()  # filepath -> (modelo, bytes)
+        self._pending = {}            # filepath -> Future do prefetch
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="step-prefetch")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, filepath: str):
+        """Retorna o modelo do arquivo; carrega (ou espera o prefetch em andamento) se não estiver no cache."""
+        with self._lock:
+            entry = self._models.get(filepath)
+            if entry is not None:
+                self._models.move_to_end(filepath)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            future = self._pending.get(filepath)
+
+        if future is not None:
+            # Prefetch já começou: espera por ele em vez de carregar duas vezes
+            return future.result()
+        model = self.loader(filepath)
+        self._store(filepath, model)
+        return model
+
+    def request(self, filepath: str) -> Future:
+        """
+        Future do modelo do arquivo, sem bloquear: já resolvido se estiver no cache, o do prefetch
+        em andamento, ou uma carga nova em background. Prefetches ainda na fila são cancelados
+        para o step pedido não esperar atrás deles (prefetch() os agenda de novo depois).
+        """
+        with self._lock:
+            entry = self._models.get(filepath)
+            if entry is not None:
+                self._models.move_to_end(filepath)
+                self.hits += 1
+                future = Future()
+                future.set_result(entry[0])
+                return future
+            self.misses += 1
+            for path, pending in list(self._pending.items()):
+                if path != filepath and pending.cancel():
+                    del self._pending[path]
+            future = self._pending.get(filepath)
+            if future is None:
+                future = self._pending[filepath] = self._executor.submit(self._load_background, filepath)
+            return future
+
+    def peek(self, filepath: str):
+        """Modelo já carregado do arquivo, ou None; não carrega nem conta hit/miss."""
+        with self._lock:
+            entry = self._models.get(filepath)
+        return entry[0] if entry is not None else None
+
+    def prefetch(self, filepaths):
+        """Agenda o carregamento em background dos arquivos que ainda não estão no cache."""
+        with self._lock:
+            for filepath in filepaths:
+                if filepath in self._models or filepath in self._pending:
+                    continue
+                self._pending[filepath] = self._executor.submit(self._load_background, filepath)
+
+    def _load_background(self, filepath: str):
+        try:
+            model = self.loader(filepath)
+            self._store(filepath, model)
+            return model
+        finally:
+            with self._lock:
+                self._pending.pop(filepath, None)
+
+    def _store(self, filepath: str, model):
+        if model is None:
+            return
+        size = model.nbytes()
+        with self._lock:
+            old = self._models.pop(filepath, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._models[filepath] = (model, size)
+            self._bytes += size
+            # Descarta os menos recentes, mas nunca o que acabou de entrar
+            while self._bytes > self.max_bytes and len(self._models) > 1:
+                _, (_, evicted_size) = self._models.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._models),
+                'pending': len(self._pending),
+                'bytes': self._bytes,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,146 @@
+"""
+Carregamento incremental de steps - TP2
+Arquivos consecutivos (step0448 → step0512) são estados da mesma árvore crescendo: os pontos
+do step anterior são prefixo dos novos e cada terminal novo divide um ramo existente
+(a→b vira a→m, m→b) e liga m ao terminal. Um ramo é identificado pelas extremidades (i0, i1):
+quem continua existindo mantém a geometria, e só os ramos acrescentados precisam de p0/p1/
+length/dir novos.
+
+O gerador CCO reescreve as lines em outra ordem a cada step e recalcula os raios a montante
+(ids = índice da line no arquivo e raios mudam em quase todo ramo), então ids, raios, depth e a
+ordem BFS são remontados de forma vetorizada; o delta evita recalcular a geometria e os bounds
+dos ramos que já existiam. O modelo anterior não é alterado (ele pode estar no StepCache):
+o resultado é um Model3D novo que compartilha o que não mudou.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+from src.model3d import Model3D
+from src.vtk_cache import load_polydata
+from src.vtk_loader_3d import load_vtk_3d, point_radius
+from src.profiler import PROFILER
+
+
+@dataclass
+class StepDelta:
+    old_points: int
+    new_points: int
+    previous_row: np.ndarray   # por line nova: linha da SegmentTable anterior com as mesmas extremidades, ou -1
+    removed: int               # ramos anteriores que deixaram de existir (divididos)
+    radius_changed: int        # pontos anteriores cujo radius_point mudou
+    radius_point: np.ndarray   # raio por ponto do novo step (calculado uma vez, reaproveitado em apply_step_delta)
+
+    @property
+    def added(self) -> int:
+        return int(np.count_nonzero(self.previous_row < 0))
+
+    def summary(self) -> str:
+        return (f"+{self.new_points - self.old_points} pontos, +{self.added}/-{self.removed} ramos, "
+                f"{self.radius_changed} raios alterados")
+
+
+def diff_step(previous: Model3D, data, radius_mode: str = 'mean') -> Optional[StepDelta]:
+    """
+    Compara o modelo carregado com os arrays (PolyData) do próximo step.
+    Retorna None se o arquivo não continua o anterior (pontos antigos alterados ou removidos).
+    """
+    n_old = len(previous.points)
+    n_new = len(data.points)
+    if n_new < n_old or not previous.is_valid_tree:
+        return None
+    if not np.array_equal(np.asarray(data.points[:n_old]), np.asarray(previous.points)):
+        return None
+
+    # Casamento por extremidades: chave i0·n + i1, busca binária nas chaves anteriores ordenadas
+    table = previous.segment_table
+    old_keys = table.i0.astype(np.int64) * n_new + table.i1
+    lines = np.asarray(data.lines, dtype=np.int64)
+    new_keys = lines[:, 0] * n_new + lines[:, 1]
+    by_key = np.argsort(old_keys)
+    sorted_keys = old_keys[by_key]
+    pos = np.minimum(np.searchsorted(sorted_keys, new_keys), max(len(sorted_keys) - 1, 0))
+    found = (sorted_keys[pos] == new_keys) if len(sorted_keys) else np.zeros(len(new_keys), dtype=bool)
+    previous_row = np.where(found, by_key[pos] if len(by_key) else 0, -1).astype(np.int64)
+
+    with PROFILER.timer('radius_point'):
+        radius = point_radius(data.lines, data.cell_scalars, n_new, radius_mode)
+    radius_changed = int(np.count_nonzero(radius[:n_old] != previous.radius_point[:n_old]))
+    removed = len(table) - int(np.count_nonzero(found))
+    return StepDelta(n_old, n_new, previous_row, removed, radius_changed, radius)
+
+
+def apply_step_delta(previous: Model3D, data, delta: StepDelta) -> Model3D:
+    """
+    Monta o Model3D do novo step a partir do anterior + delta (mesmo resultado de load_vtk_3d).
+    O raio por ponto vem do delta, calculado em diff_step com o radius_mode da carga.
+    """
+    model = Model3D()
+    model.points = data.points
+    model.segments = data.lines
+    model.radius_point = delta.radius_point
+
+    # Bounds: os anteriores combinados só com os pontos acrescentados
+    appended = np.asarray(data.points[delta.old_points:])
+    if previous.bounds is not None and len(appended):
+        lo = np.minimum(np.array(previous.bounds[0::2]), appended.min(axis=0))
+        hi = np.maximum(np.array(previous.bounds[1::2]), appended.max(axis=0))
+        model.bounds = (lo[0], hi[0], lo[1], hi[1], lo[2], hi[2])
+        model.target = (lo + hi) / 2.0
+    elif previous.bounds is not None:
+        model.bounds = previous.bounds
+        model.target = previous.target
+    else:
+        model.compute_bounds()
+
+    with PROFILER.timer('tree_build'):
+        model.build_segment_list(previous.segment_table, delta.previous_row)
+    return model
+
+
+def load_vtk_3d_delta(filepath: str, previous: Model3D, use_cache: bool = True, radius_mode: str = 'mean',
+                      progress=None):
+    """
+    Carrega o step seguinte a previous pelo delta. Retorna (modelo, delta); se o arquivo não
+    continua previous, cai para load_vtk_3d e retorna (modelo, None).
+    """
+    try:
+        with PROFILER.timer('parse'):
+            data = load_polydata(filepath, use_cache, progress)
+    except Exception as e:
+        print(f"Error parsing VTK: {e}")
+        return None, None
+    try:
+        delta = diff_step(previous, data, radius_mode)
+        if delta is not None:
+            return apply_step_delta(previous, data, delta), delta
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return None, None
+    return load_vtk_3d(filepath, use_cache, radius_mode, progress), None
+
+
+def verify_step_delta(model: Model3D, filepath: str, radius_mode: str = 'mean') -> List[str]:
+    """
+    Confere um modelo montado por delta contra o carregamento completo do mesmo arquivo.
+    Retorna os campos que diferem (lista vazia = idênticos).
+    """
+    full = load_vtk_3d(filepath, use_cache=False, radius_mode=radius_mode)
+    if full is None:
+        return ["<falha ao recarregar>"]
+    mismatches = []
+    arrays = ('points', 'segments', 'radius_point', 'parent', 'child_offsets', 'child_index',
+              'child_segment', 'bfs_order', 'segment_depth')
+    for name in arrays:
+        if not np.array_equal(np.asarray(getattr(model, name)), np.asarray(getattr(full, name))):
+            mismatches.append(name)
+    for name in ('ids', 'i0', 'i1', 'p0', 'p1', 'r0', 'r1', 'length', 'dir', 'depth', 'flags', 'row_of_id'):
+        if not np.array_equal(getattr(model.segment_table, name), getattr(full.segment_table, name)):
+            mismatches.append(f"segment_table.{name}")
+    for name in ('root', 'max_depth', 'is_valid_tree'):
+        if getattr(model, name) != getattr(full, name):
+            mismatches.append(name)
+    if not np.array_equal(np.asarray(model.bounds, dtype=np.float64), np.asarray(full.bounds, dtype=np.float64)):
+        mismatches.append('bounds')
+    if not np.array_equal(np.asarray(model.target), np.asarray(full.target)):
+        mismatches.append('target')
+    return mismatches
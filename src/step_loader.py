@@ -0,0 +1,136 @@
+"""
+Carga assíncrona de steps - TP1/TP2
+O laço do GLFW só pede o step (request) e consulta o andamento uma vez por frame (poll); nada ali
+bloqueia, então poll_events roda todo frame e a entrada continua respondendo durante a carga:
+- leitura do VTK e montagem da árvore: threads do StepCache (StepCache.request);
+- parte de CPU do renderer (batch, octree do culling, resumo do LOD): uma thread própria
+  (renderer.prepare), em ordem, para um pedido antigo nunca sobrescrever um novo;
+- envio para a GPU: thread GL, em fatias de no máximo upload_budget segundos por frame
+  (renderer.stage), para VBOs reserva trocados pelos atuais só no fim.
+Até o novo step ficar pronto o modelo anterior continua na tela, com uma barra de progresso no topo.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from OpenGL.GL import *
+
+DEFAULT_UPLOAD_BUDGET = 0.004   # s de envio à GPU por frame (~1/4 de um frame a 60 FPS)
+
+
+class StepLoader:
+    def __init__(self, step_cache, renderer, upload_budget: float = DEFAULT_UPLOAD_BUDGET):
+        """
+        step_cache: StepCache cujo loader monta o modelo do arquivo.
+        renderer: Renderer/Renderer3D (prepare(modelo) fora da thread GL, stage(modelo, budget) nela).
+        """
+        self.step_cache = step_cache
+        self.renderer = renderer
+        self.upload_budget = upload_budget
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="step-prepare")
+        self._job = None        # dict do pedido em andamento (arquivo, futures, modelo, visible_count)
+        self._fraction = None   # fração do arquivo pedido já lida (escrita pela thread de carga)
+
+    @property
+    def loading(self) -> bool:
+        return self._job is not None
+
+    @property
+    def filepath(self):
+        return self._job['filepath'] if self._job is not None else None
+
+    @property
+    def visible_count(self):
+        """visible_count que o modelo pedido recebe ao entrar (p.ex. do scrub)."""
+        return self._job['visible_count'] if self._job is not None else None
+
+    def request(self, filepath: str, visible_count=None):
+        """Pede o step do arquivo, substituindo o pedido anterior (que continua e fica no cache)."""
+        job = self._job
+        if job is not None and job['filepath'] == filepath:
+            job['visible_count'] = visible_count
+            return
+        self._fraction = None
+        self._job = {'filepath': filepath, 'future': self.step_cache.request(filepath), 'prepare': None,
+                     'model': None, 'visible_count': visible_count, 'start': time.perf_counter()}
+
+    def progress(self, filepath: str):
+        """progress(bytes lidos, total) para o loader do StepCache: só o arquivo pedido é acompanhado."""
+        def progress(done, total):
+            job = self._job
+            if job is not None and job['filepath'] == filepath:
+                self._fraction = done / max(total, 1)
+        return progress
+
+    def poll(self):
+        """
+        Avança o pedido sem bloquear (thread GL, uma vez por frame). Retorna (arquivo, modelo,
+        visible_count, segundos desde o pedido) quando o step está pronto para desenhar, com o
+        modelo None se a carga falhou; senão None.
+        """
+        job = self._job
+        if job is None or not job['future'].done():
+            return None
+        if job['model'] is None:
+            try:
+                model = job['future'].result()
+            except Exception as e:
+                print(f"Erro ao carregar {job['filepath']}: {e}")
+                model = None
+            if model is None:
+                return self._finish(job)
+            job['model'] = model
+            job['prepare'] = self._executor.submit(self.renderer.prepare, model)
+            return None
+        if not job['prepare'].done():
+            return None
+        if job['prepare'].exception() is not None:
+            # Sem o que foi adiantado, render() monta e envia tudo de uma vez, como antes
+            print(f"Preparação do modelo falhou: {job['prepare'].exception()}")
+        elif not self.renderer.stage(job['model'], self.upload_budget):
+            return None
+        return self._finish(job)
+
+    def _finish(self, job) -> tuple:
+        self._job = None
+        self._fraction = None
+        return job['filepath'], job['model'], job['visible_count'], time.perf_counter() - job['start']
+
+    def draw(self, viewport_width: int, viewport_height: int, height: int = 4):
+        """
+        Barra de progresso no topo da janela enquanto há pedido: proporcional ao arquivo lido ou,
+        sem esse dado (timeline, cache .npz, 2D), um trecho que corre de um lado a outro.
+        Desenhada sobre o frame atual (antes do swap) sem alterar o estado do renderer.
+        """
+        if self._job is None:
+            return
+        fraction = self._fraction
+        if self._job['model'] is not None:
+            fraction = 1.0
+        if fraction is None:
+            t = (time.perf_counter() - self._job['start']) % 1.5 / 1.5
+            x0, x1 = max(0.0, t * 1.25 - 0.25) * viewport_width, min(1.0, t * 1.25) * viewport_width
+        else:
+            x0, x1 = 0.0, fraction * viewport_width
+
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, viewport_width, 0, viewport_height, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_BLEND)
+        glColor3f(0.15, 0.15, 0.2)
+        glRectf(0, viewport_height - height, viewport_width, viewport_height)
+        glColor3f(0.3, 0.7, 1.0)
+        glRectf(x0, viewport_height - height, x1, viewport_height)
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+
+    def shutdown(self):
+        self._job = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+"""
+Nível de detalhe por subárvore - TP2
+Para cada ramo (linha da SegmentTable) resume a subárvore que começa nele (o ramo e todos os
+descendentes): nº de ramos, AABB das pontas, centroide ponderado pelo comprimento e a maior
+linha BFS. Um passe pós-ordem de baixo para cima pelos níveis da BFS (filhos antes dos pais;
+os irmãos de cada nível são contíguos, então cada nível é um reduceat por pai) e um passe de
+cima para baixo que numera a árvore em pré-ordem (cada subárvore vira o trecho
+[pre, pre + size)). Calculado uma vez e guardado com o modelo (Model3D.subtree_summary).
+
+Representante de uma subárvore colapsada: um ramo de p0 até p0 + 2·(centroide − p0), com os
+atributos (cor, espessura) do ramo que a inicia — para um ramo sozinho é ele mesmo. select()
+colapsa as subárvores cuja caixa projeta menos que o orçamento de erro em pixels.
+"""
+import numpy as np
+from src.profiler import PROFILER
+
+
+class SubtreeSummary:
+    def __init__(self, model):
+        table = model.segment_table
+        self.table = table
+        n = len(table)
+        self.n = n
+        p0 = table.p0.astype(np.float64)
+        p1 = table.p1.astype(np.float64)
+        length = table.length.astype(np.float64)
+
+        # Ramo pai de cada linha (-1 nos ramos que saem da raiz)
+        n_nodes = int(max(table.i0.max(), table.i1.max())) + 1 if n else 0
+        row_of_node = np.full(n_nodes, -1, dtype=np.int64)
+        row_of_node[table.i1] = np.arange(n)
+        self.parent_row = row_of_node[table.i0] if n else np.zeros(0, dtype=np.int64)
+        # Linhas BFS estão em ordem de depth: cada nível é um trecho contíguo
+        self.level_start = np.searchsorted(table.depth, np.arange(model.max_depth + 2)) if n else np.zeros(1, np.int64)
+
+        self.size = np.ones(n, dtype=np.int64)
+        self.bmin = np.minimum(p0, p1)
+        self.bmax = np.maximum(p0, p1)
+        weighted = (p0 + p1) * 0.5 * length[:, None]
+        length_sum = length.copy()
+        self.max_row = np.arange(n, dtype=np.int64)
+        for lo, hi in self._levels(reverse=True):
+            parents, first = self._groups(lo, hi)
+            if parents is None:
+                continue
+            self.size[parents] += np.add.reduceat(self.size[lo:hi], first)
+            self.bmin[parents] = np.minimum(self.bmin[parents], np.minimum.reduceat(self.bmin[lo:hi], first, axis=0))
+            self.bmax[parents] = np.maximum(self.bmax[parents], np.maximum.reduceat(self.bmax[lo:hi], first, axis=0))
+            weighted[parents] += np.add.reduceat(weighted[lo:hi], first, axis=0)
+            length_sum[parents] += np.add.reduceat(length_sum[lo:hi], first)
+            self.max_row[parents] = np.maximum(self.max_row[parents], np.maximum.reduceat(self.max_row[lo:hi], first))
+
+        centroid = np.where(length_sum[:, None] > 0.0, weighted / np.maximum(length_sum, 1e-30)[:, None],
+                            (self.bmin + self.bmax) * 0.5)
+        self.rep_p1 = (p0 + 2.0 * (centroid - p0)).astype(np.float32)
+        self.center = (self.bmin + self.bmax) * 0.5
+        self.half = np.linalg.norm(self.bmax - self.bmin, axis=1) * 0.5
+
+        # Pré-ordem: o ramo antes dos descendentes, irmãos na ordem da BFS
+        self.pre = np.zeros(n, dtype=np.int64)
+        for lo, hi in self._levels(reverse=False):
+            sizes = self.size[lo:hi]
+            before = np.cumsum(sizes) - sizes
+            parent = self.parent_row[lo:hi]
+            first = np.flatnonzero(np.diff(parent, prepend=-2))
+            group_first = np.repeat(first, np.diff(np.append(first, hi - lo)))
+            base = np.where(parent >= 0, self.pre[np.maximum(parent, 0)] + 1, 0)
+            self.pre[lo:hi] = base + before - before[group_first]
+
+    def _levels(self, reverse: bool):
+        bounds = list(zip(self.level_start[:-1].tolist(), self.level_start[1:].tolist()))
+        return [(lo, hi) for lo, hi in (bounds[::-1] if reverse else bounds) if hi > lo]
+
+    def _groups(self, lo: int, hi: int):
+        """Pais (linhas) dos ramos lo..hi e início de cada grupo de irmãos; (None, None) no nível da raiz."""
+        parent = self.parent_row[lo:hi]
+        if parent[0] < 0:
+            return None, None
+        first = np.flatnonzero(np.diff(parent, prepend=-1))
+        return parent[first], first
+
+    def nbytes(self) -> int:
+        arrays = (self.parent_row, self.size, self.bmin, self.bmax, self.max_row, self.rep_p1,
+                  self.center, self.half, self.pre)
+        return sum(a.nbytes for a in arrays)
+
+    def select(self, eye, focal_pixels: float, pixel_error: float, visible_count=None) -> tuple:
+        """
+        Subárvores a colapsar para a câmera em `eye`: as de mais de um ramo cuja caixa projeta
+        menos que pixel_error pixels (e já inteiramente visíveis na animação), sem ancestral colapsado.
+        Retorna (máscara das linhas desenhadas como ramo, linhas desenhadas como representante),
+        ou (None, None) se nada colapsa.
+        """
+        n = self.n
+        with PROFILER.timer('lod_select'):
+            dist = np.linalg.norm(self.center - np.asarray(eye, dtype=np.float64), axis=1) - self.half
+            with np.errstate(divide='ignore'):
+                diameter = np.where(dist > 0.0, 2.0 * self.half * focal_pixels / dist, np.inf)
+            small = (diameter < pixel_error) & (self.size > 1)
+            if visible_count is not None:
+                small &= self.max_row < visible_count
+            if not small.any():
+                return None, None
+            # Descendentes de uma subárvore colapsada: trecho (pre, pre + size) da pré-ordem
+            start = self.pre[small]
+            cover = np.cumsum(np.bincount(start + 1, minlength=n + 1)
+                              - np.bincount(start + self.size[small], minlength=n + 1))[:n] > 0
+            hidden = cover[self.pre]
+            reps = np.flatnonzero(small & ~hidden)
+            drawn = ~small & ~hidden
+            if visible_count is not None:
+                drawn[visible_count:] = False
+        if PROFILER.enabled:
+            PROFILER.count('subtrees_collapsed', len(reps))
+            PROFILER.count('segments_collapsed', int(self.size[reps].sum()))
+        return drawn, reps
@@ -0,0 +1,208 @@
+"""
+Índice da linha do tempo de crescimento - TP1/TP2
+Processa todos os steps de um diretório Nterm_* uma vez (em paralelo, um processo por arquivo)
+e guarda a sequência inteira numa estrutura só, salva em disco ao lado dos .vtk:
+
+- points: pontos do último step; os steps anteriores usam um prefixo (a árvore só acrescenta pontos)
+- edges: cada ramo distinto (i0, i1) que aparece em algum step, com first_step/last_step
+  (índice do step em que surge e o último em que ainda existe, antes de ser dividido)
+- por step, em CSR (line_offsets): o ramo de cada line na ordem do arquivo (line_edges) e o
+  raio de cada line (radii, float32)
+
+Um step vira PolyData só com fatias/gathers em memória, sem ler arquivo. O índice também
+numera os frames da animação de todos os steps em sequência (step k, visible_count 1..N_k),
+para a navegação contínua pela linha do tempo.
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from src.dataset_utils import list_step_files
+from src.vtk_parser import PolyData
+from src.vtk_cache import load_polydata
+
+TIMELINE_FILENAME = "timeline_index.npz"
+TIMELINE_VERSION = 1
+
+
+def _read_step(filepath: str):
+    """Arrays de um step (roda nos processos do pool; sem memmap para voltar por pickle)."""
+    data = load_polydata(filepath, use_cache=True)
+    return (np.array(data.points, dtype=np.float32), np.array(data.lines, dtype=np.int32),
+            np.array(data.cell_scalars, dtype=np.float32))
+
+
+def _source_stamp(filepaths) -> np.ndarray:
+    """(mtime_ns, tamanho) de cada arquivo: o índice salvo só vale para os mesmos arquivos."""
+    stamp = np.zeros((len(filepaths), 2), dtype=np.int64)
+    for k, filepath in enumerate(filepaths):
+        st = os.stat(filepath)
+        stamp[k] = (st.st_mtime_ns, st.st_size)
+    return stamp
+
+
+class Timeline:
+    def __init__(self, steps, names, stamp, points, edges, first_step, last_step,
+                 line_offsets, line_edges, radii, point_counts):
+        self.steps = np.asarray(steps, dtype=np.int32)          # número do step de cada índice
+        self.names = list(names)                                 # nome do arquivo de cada step
+        self.stamp = np.asarray(stamp, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.float32)
+        self.edges = np.asarray(edges, dtype=np.int32)
+        self.first_step = np.asarray(first_step, dtype=np.int32)
+        self.last_step = np.asarray(last_step, dtype=np.int32)
+        self.line_offsets = np.asarray(line_offsets, dtype=np.int64)
+        self.line_edges = np.asarray(line_edges, dtype=np.int32)
+        self.radii = np.asarray(radii, dtype=np.float32)
+        self.point_counts = np.asarray(point_counts, dtype=np.int64)
+        self._index_of_name = {name: k for k, name in enumerate(self.names)}
+        # Frames da animação: o step k ocupa frame_offsets[k] .. frame_offsets[k+1]-1
+        self.frame_offsets = self.line_offsets
+
+    def __len__(self):
+        return len(self.steps)
+
+    def nbytes(self) -> int:
+        arrays = (self.points, self.edges, self.first_step, self.last_step, self.line_offsets,
+                  self.line_edges, self.radii, self.point_counts)
+        return sum(a.nbytes for a in arrays)
+
+    def step_index(self, step: int) -> int:
+        """Índice do step (número do arquivo), ou -1 se não estiver no índice."""
+        k = int(np.searchsorted(self.steps, step))
+        return k if k < len(self.steps) and self.steps[k] == step else -1
+
+    def segment_count(self, k: int) -> int:
+        return int(self.line_offsets[k + 1] - self.line_offsets[k])
+
+    def polydata(self, k: int) -> PolyData:
+        """Conteúdo do step k como se lido do arquivo (mesma ordem de lines e mesmos raios)."""
+        a, b = self.line_offsets[k], self.line_offsets[k + 1]
+        return PolyData(points=self.points[:self.point_counts[k]],
+                        lines=self.edges[self.line_edges[a:b]],
+                        cell_scalars=self.radii[a:b])
+
+    def segments_new_in(self, k: int) -> np.ndarray:
+        """Ramos (linhas de edges) que surgem no step k."""
+        return np.nonzero(self.first_step == k)[0]
+
+    def frame_count(self) -> int:
+        return int(self.frame_offsets[-1])
+
+    def frame_of(self, k: int, visible_count: int) -> int:
+        """Frame global de (step k, visible_count)."""
+        return int(self.frame_offsets[k]) + max(visible_count, 1) - 1
+
+    def locate(self, frame: int) -> tuple:
+        """(índice do step, visible_count) do frame global (limitado ao intervalo válido)."""
+        frame = max(0, min(int(frame), self.frame_count() - 1))
+        k = int(np.searchsorted(self.frame_offsets[1:], frame, side='right'))
+        return k, frame - int(self.frame_offsets[k]) + 1
+
+    def loader(self, model_builder, fallback):
+        """
+        Loader para o StepCache: filepath -> modelo montado do índice (model_builder(PolyData)).
+        Arquivos fora do índice usam fallback(filepath).
+        """
+        def load(filepath):
+            k = self._index_of_name.get(os.path.basename(filepath))
+            if k is None:
+                return fallback(filepath)
+            return model_builder(self.polydata(k))
+        return load
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, version=np.int32(TIMELINE_VERSION), steps=self.steps, names=np.array(self.names),
+                 stamp=self.stamp, points=self.points, edges=self.edges, first_step=self.first_step,
+                 last_step=self.last_step, line_offsets=self.line_offsets, line_edges=self.line_edges,
+                 radii=self.radii, point_counts=self.point_counts)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as f:
+            if int(f['version']) != TIMELINE_VERSION:
+                return None
+            return cls(f['steps'], f['names'].tolist(), f['stamp'], f['points'], f['edges'], f['first_step'],
+                       f['last_step'], f['line_offsets'], f['line_edges'], f['radii'], f['point_counts'])
+
+
+def build_timeline(data_dir: str, workers: int = None) -> Timeline:
+    """
+    Lê todos os steps de data_dir em paralelo e monta o índice.
+    Levanta ValueError se os arquivos não forem estados sucessivos da mesma árvore.
+    """
+    entries = list_step_files(data_dir)
+    if not entries:
+        raise ValueError(f"Nenhum arquivo VTK encontrado em {data_dir}")
+    filepaths = [path for _, path in entries]
+    if workers == 1 or len(filepaths) == 1:
+        results = [_read_step(path) for path in filepaths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_step, filepaths))
+
+    points = results[-1][0]
+    n_points = len(points)
+    for k, (step_points, _, _) in enumerate(results):
+        if len(step_points) > n_points or not np.array_equal(step_points, points[:len(step_points)]):
+            raise ValueError(f"{os.path.basename(filepaths[k])} não é um estado anterior da árvore do último step")
+
+    lines = [r[1] for r in results]
+    counts = np.array([len(l) for l in lines], dtype=np.int64)
+    line_offsets = np.concatenate([[0], np.cumsum(counts)])
+    all_lines = np.concatenate(lines).astype(np.int64)
+    keys = all_lines[:, 0] * n_points + all_lines[:, 1]
+    unique_keys, line_edges = np.unique(keys, return_inverse=True)
+    step_of_line = np.repeat(np.arange(len(lines), dtype=np.int32), counts)
+    first_step = np.full(len(unique_keys), len(lines), dtype=np.int32)
+    last_step = np.full(len(unique_keys), -1, dtype=np.int32)
+    np.minimum.at(first_step, line_edges, step_of_line)
+    np.maximum.at(last_step, line_edges, step_of_line)
+    edges = np.column_stack([unique_keys // n_points, unique_keys % n_points]).astype(np.int32)
+
+    return Timeline(
+        steps=[step for step, _ in entries], names=[os.path.basename(p) for p in filepaths],
+        stamp=_source_stamp(filepaths), points=points, edges=edges, first_step=first_step,
+        last_step=last_step, line_offsets=line_offsets, line_edges=line_edges.astype(np.int32),
+        radii=np.concatenate([r[2] for r in results]),
+        point_counts=[len(r[0]) for r in results],
+    )
+
+
+def load_timeline(data_dir: str, rebuild: bool = False, workers: int = None):
+    """
+    Índice do diretório: lê o timeline_index.npz salvo se ainda corresponder aos arquivos;
+    senão (ou com rebuild) reconstrói e salva. Retorna None se o diretório não formar uma sequência.
+    """
+    path = os.path.join(data_dir, TIMELINE_FILENAME)
+    filepaths = [p for _, p in list_step_files(data_dir)]
+    if not rebuild and os.path.exists(path):
+        try:
+            timeline = Timeline.load(path)
+            if (timeline is not None and timeline.names == [os.path.basename(p) for p in filepaths]
+                    and np.array_equal(timeline.stamp, _source_stamp(filepaths))):
+                return timeline
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Índice da timeline inválido ({e}); reconstruindo")
+    try:
+        timeline = build_timeline(data_dir, workers)
+    except ValueError as e:
+        print(f"Timeline indisponível: {e}")
+        return None
+    try:
+        timeline.save(path)
+    except OSError as e:
+        print(f"Não foi possível salvar {path}: {e}")
+    return timeline
+
+
+def load_timeline_background(data_dir: str, rebuild: bool = False, workers: int = None) -> Future:
+    """
+    load_timeline numa thread à parte, para não segurar a abertura da janela: o App continua
+    carregando por arquivo (ou delta) e troca para o índice quando o Future terminar.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="timeline")
+    future = executor.submit(load_timeline, data_dir, rebuild, workers)
+    executor.shutdown(wait=False)
+    return future
@@ -0,0 +1,236 @@
+"""
+Tubos 3D instanciados - TP2
+Cada ramo vira uma instância de um cilindro unitário (malha única por nível de detalhe),
+posicionado no vertex shader a partir das pontas e dos raios r0/r1 do ramo (tronco de cone).
+A espessura deixa de depender de glLineWidth, que muitos drivers limitam a ~10 px.
+
+Nível de detalhe pelo diâmetro projetado na tela (raio × distância focal / distância ao olho):
+16, 8 ou 4 lados, e abaixo de lod_pixels[-1] o ramo volta a ser uma linha de 1 px (desenhada
+pelo Renderer3D com o batch de linhas). A escolha é vetorizada e fica em cache até o olho
+andar mais que lod_threshold × diagonal; as instâncias vão para o VBO agrupadas por nível e,
+dentro de cada nível, em ordem BFS, então visible_count (animação) é um searchsorted por nível.
+
+Escala: raio do arquivo × radius_scale × _LINE_MATCH × diagonal da árvore. Com radius_scale = 1
+o tubo tem na tela a mesma espessura da linha (raio × 80 px) no enquadramento de fit_view
+(distância 1,2 × diagonal, 600 px de altura, 45°): os raios dos dados não estão na unidade das
+coordenadas. Cor, iluminação e seleção usam as uniforms de src/segment_shader.py; na iluminação
+Smooth o fator vem da normal da superfície do tubo (Flat usa a direção do ramo, como as linhas).
+Sem tampas: nas junções os tubos se sobrepõem pelo nó comum.
+"""
+import ctypes
+import math
+import numpy as np
+from OpenGL.GL import *
+from src.segment_shader import SegmentShader, COLOR_GLSL
+from src.profiler import PROFILER
+
+_TUBE_VS = """#version 120
+attribute vec3 a_mesh;             // cilindro unitário: (cos, sin, t ao longo do eixo)
+attribute vec4 a_p0;               // ponta p0 + raio r0 (unidades do arquivo)
+attribute vec4 a_p1;               // ponta p1 + raio r1
+attribute vec4 a_segment;          // depth, raio médio, linha da SegmentTable, id
+uniform float u_radius_scale;      // raio do arquivo -> mundo
+uniform float u_fixed_radius;      // > 0: mesmo raio (mundo) para todos os ramos
+uniform int u_ids;                 // 1: cor = linha + 1 em RGB (picking por cor)
+varying vec4 v_color;
+varying float v_depth;
+""" + COLOR_GLSL + """
+void main() {
+    vec3 axis = a_p1.xyz - a_p0.xyz;
+    float len = length(axis);
+    vec3 w = len > 0.0 ? axis / len : vec3(0.0, 0.0, 1.0);
+    vec3 helper = abs(w.y) < 0.99 ? vec3(0.0, 1.0, 0.0) : vec3(1.0, 0.0, 0.0);
+    vec3 u = normalize(cross(helper, w));
+    vec3 v = cross(w, u);
+    vec3 n = a_mesh.x * u + a_mesh.y * v;
+    float r = u_fixed_radius > 0.0 ? u_fixed_radius : mix(a_p0.w, a_p1.w, a_mesh.z) * u_radius_scale;
+    vec4 pos = vec4(a_p0.xyz + axis * a_mesh.z + n * r, 1.0);
+    gl_Position = gl_ModelViewProjectionMatrix * pos;
+    v_depth = -(gl_ModelViewMatrix * pos).z;
+    if (u_ids == 1) {
+        float code = a_segment.z + 1.0;
+        v_color = vec4(mod(code, 256.0), mod(floor(code / 256.0), 256.0), floor(code / 65536.0), 255.0) / 255.0;
+        return;
+    }
+    float f = 1.0;
+    if (u_lighting == 1) {
+        f = 0.4 + 0.6 * max(0.0, dot(w, u_light_dir));
+    } else if (u_lighting == 2) {
+        f = 0.4 + 0.6 * max(0.0, dot(n, u_light_dir));
+    }
+    v_color = shade(colormap_rgb(a_segment.x, a_segment.y), f, a_segment.w);
+}
+"""
+
+# Localizações fixas: a malha no atributo 0 (sempre habilitado no perfil compat), instâncias em 1..3
+_ATTRIBUTES = {'a_mesh': 0, 'a_p0': 1, 'a_p1': 2, 'a_segment': 3}
+_INSTANCE_FLOATS = 12
+# Espessura igual à da linha (raio × 80 px) no enquadramento de fit_view: 40 × 1,2 / (300 / tan 22,5°)
+_LINE_MATCH = 40.0 * 1.2 / (300.0 / math.tan(math.radians(22.5)))
+
+
+def cylinder_mesh(sides: int) -> np.ndarray:
+    """Cilindro unitário aberto como GL_TRIANGLE_STRIP: 2 × (sides + 1) vértices (cos, sin, t)."""
+    theta = np.linspace(0.0, 2.0 * np.pi, sides + 1)
+    mesh = np.empty((2 * (sides + 1), 3), dtype=np.float32)
+    mesh[0::2, 0] = mesh[1::2, 0] = np.cos(theta)
+    mesh[0::2, 1] = mesh[1::2, 1] = np.sin(theta)
+    mesh[0::2, 2] = 0.0
+    mesh[1::2, 2] = 1.0
+    return mesh
+
+
+class TubeRenderer:
+    def __init__(self, colormap, light_dir, selected_rgb):
+        self.lod_sides = (16, 8, 4)
+        self.lod_pixels = (24.0, 6.0, 1.5)   # diâmetro projetado mínimo de cada nível; abaixo, linha
+        self.lod_threshold = 0.02
+        self.radius_scale = 1.0
+        self.shader = SegmentShader(colormap, light_dir, selected_rgb, vertex_source=_TUBE_VS,
+                                    attributes=_ATTRIBUTES, uniforms=('u_radius_scale', 'u_fixed_radius', 'u_ids'))
+        self.mesh_vbo = None
+        self.instance_vbo = None
+        self._mesh_ranges = []          # (primeiro vértice, nº de vértices) por nível
+        self._table = None
+        self._instances = None          # N×12 na ordem da SegmentTable
+        self._mid = None
+        self._r_max = None
+        self._diagonal = 1.0
+        self._lod_key = None
+        self.level_rows = []            # linhas da tabela (ordem BFS) de cada nível de tubo
+        self.line_rows = np.zeros(0, dtype=np.int64)
+        self.max_diameter = 0.0         # maior diâmetro projetado (px) entre os tubos
+
+    def world_scale(self) -> float:
+        return self.radius_scale * _LINE_MATCH * self._diagonal
+
+    def fixed_radius(self) -> float:
+        """Raio (mundo) do modo raio fixo: o mesmo 0,01 que as linhas usam (1 px no enquadramento padrão)."""
+        return 0.01 * self.world_scale()
+
+    def _prepare_table(self, model):
+        table = model.segment_table
+        if self._table is table:
+            return
+        n = len(table)
+        instances = np.empty((n, _INSTANCE_FLOATS), dtype=np.float32)
+        instances[:, 0:3] = table.p0
+        instances[:, 3] = table.r0
+        instances[:, 4:7] = table.p1
+        instances[:, 7] = table.r1
+        instances[:, 8] = table.depth
+        instances[:, 9] = (table.r0.astype(np.float64) + table.r1) / 2.0
+        instances[:, 10] = np.arange(n)
+        instances[:, 11] = table.ids
+        self._instances = instances
+        self._mid = (table.p0.astype(np.float64) + table.p1) * 0.5
+        self._r_max = np.maximum(table.r0, table.r1).astype(np.float64)
+        if model.bounds:
+            self._diagonal = float(np.linalg.norm(np.subtract(model.bounds[1::2], model.bounds[0::2]))) or 1.0
+        self._table = table
+        self._lod_key = None
+
+    def update(self, model, eye, focal_pixels: float, fixed_radius: bool):
+        """Reclassifica os ramos por nível de detalhe se o olho andou o bastante (ou algo mudou)."""
+        self._prepare_table(model)
+        eye = np.asarray(eye, dtype=np.float64)
+        key = (focal_pixels, fixed_radius, self.radius_scale, self.lod_pixels, self.lod_sides)
+        if self._lod_key is not None and self._lod_key[0] == key:
+            if np.linalg.norm(eye - self._lod_key[1]) <= self.lod_threshold * self._diagonal:
+                return
+        with PROFILER.timer('lod'):
+            dist = np.maximum(np.linalg.norm(self._mid - eye, axis=1), 1e-9)
+            radius = np.full(len(dist), self.fixed_radius()) if fixed_radius else self._r_max * self.world_scale()
+            diameter = 2.0 * radius * focal_pixels / dist
+            # Nível = nº de limiares acima do diâmetro: 0 (mais lados) ... len(lod_sides) (linha)
+            level = np.zeros(len(dist), dtype=np.int64)
+            for threshold in self.lod_pixels:
+                level += diameter < threshold
+            # Estável: dentro de cada nível as linhas ficam em ordem crescente (BFS)
+            order = np.argsort(level, kind='stable')
+            counts = np.bincount(level, minlength=len(self.lod_sides) + 1)
+            bounds = np.concatenate([[0], np.cumsum(counts)])
+            self.level_rows = [order[bounds[k]:bounds[k + 1]] for k in range(len(self.lod_sides))]
+            self.line_rows = order[bounds[-2]:]
+            tubes = order[:bounds[-2]]
+            self.max_diameter = float(diameter[tubes].max()) if len(tubes) else 0.0
+        with PROFILER.timer('upload'):
+            self._upload(self._instances[tubes])
+        self._lod_key = (key, eye)
+
+    def _upload(self, instances: np.ndarray):
+        if self.mesh_vbo is None:
+            meshes = [cylinder_mesh(sides) for sides in self.lod_sides]
+            first = np.concatenate([[0], np.cumsum([len(m) for m in meshes])[:-1]])
+            self._mesh_ranges = [(int(f), len(m)) for f, m in zip(first, meshes)]
+            self.mesh_vbo, self.instance_vbo = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+            glBufferData(GL_ARRAY_BUFFER, np.concatenate(meshes), GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, max(instances.nbytes, 4), instances if len(instances) else None,
+                     GL_STREAM_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def tube_count(self, visible_count=None) -> int:
+        return sum(self._visible(rows, visible_count) for rows in self.level_rows)
+
+    @staticmethod
+    def _visible(rows, visible_count):
+        return len(rows) if visible_count is None else int(np.searchsorted(rows, visible_count))
+
+    def visible_line_rows(self, visible_count=None) -> np.ndarray:
+        """Linhas da tabela que ficam como linha de 1 px (ordem BFS), respeitando visible_count."""
+        if visible_count is None:
+            return self.line_rows
+        return self.line_rows[:np.searchsorted(self.line_rows, visible_count)]
+
+    def begin(self, kind='color', fixed_radius=False, ids=False, **uniforms):
+        """Liga o programa de tubos ('color' ou 'oit') com as uniforms de cor e de raio."""
+        self.shader.begin(kind, **uniforms)
+        glUniform1f(self.shader.location(kind, 'u_radius_scale'), self.world_scale())
+        glUniform1f(self.shader.location(kind, 'u_fixed_radius'), self.fixed_radius() if fixed_radius else 0.0)
+        glUniform1i(self.shader.location(kind, 'u_ids'), 1 if ids else 0)
+
+    def draw(self, visible_count=None):
+        """Um glDrawArraysInstanced por nível, com o programa já ligado por begin()."""
+        stride = _INSTANCE_FLOATS * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for location in (1, 2, 3):
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+        calls = drawn = 0
+        try:
+            first = 0
+            for rows, (mesh_first, mesh_count) in zip(self.level_rows, self._mesh_ranges):
+                count = self._visible(rows, visible_count)
+                if count:
+                    for k, location in enumerate((1, 2, 3)):
+                        glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, stride,
+                                              ctypes.c_void_p(first * stride + 16 * k))
+                    glDrawArraysInstanced(GL_TRIANGLE_STRIP, mesh_first, mesh_count, count)
+                    calls += 1
+                    drawn += count
+                first += len(rows)
+            if PROFILER.enabled:
+                PROFILER.count('draw_calls', calls)
+                PROFILER.count('tubes_drawn', drawn)
+        finally:
+            for location in (1, 2, 3):
+                glVertexAttribDivisor(location, 0)
+                glDisableVertexAttribArray(location)
+            glDisableVertexAttribArray(0)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def end(self):
+        self.shader.end()
+
+    def release(self):
+        if self.mesh_vbo is not None:
+            glDeleteBuffers(2, [self.mesh_vbo, self.instance_vbo])
+            self.mesh_vbo = self.instance_vbo = None
+        self.shader.release()
+        self._table = None
+        self._lod_key = None
@@ -0,0 +1,119 @@
+"""
+Cache binário compacto ao lado de cada .vtk (arquivo.vtk.cache).
+Layout: cabeçalho fixo de 64 bytes + arrays float32/int32 contíguos, lidos com np.memmap:
+recarregar um step não faz parsing nenhum. O cache é invalidado pelo mtime e tamanho do .vtk.
+"""
+import os
+import struct
+import tempfile
+import numpy as np
+from src.vtk_parser import PolyData
+from src.vtk_stream import parse_vtk_stream
+
+CACHE_SUFFIX = ".cache"
+_MAGIC = b"VTKC"
+_VERSION = 1
+# magic, versão, mtime_ns e tamanho do .vtk, n_points, n_lines, n_scalars
+_HEADER = struct.Struct("<4sIqqqqq")
+_HEADER_SIZE = 64
+_ALIGN = 16
+
+
+def cache_path(filepath: str) -> str:
+    return filepath + CACHE_SUFFIX
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(n_points: int, n_lines: int, n_scalars: int) -> tuple:
+    """Offsets (points, lines, scalars) e tamanho total do arquivo de cache."""
+    off_points = _HEADER_SIZE
+    off_lines = _align(off_points + n_points * 3 * 4)
+    off_scalars = _align(off_lines + n_lines * 2 * 4)
+    total = off_scalars + n_scalars * 4
+    return off_points, off_lines, off_scalars, total
+
+
+def read_cache(filepath: str):
+    """Retorna PolyData mapeado do cache, ou None se ausente/desatualizado/corrompido."""
+    path = cache_path(filepath)
+    try:
+        st = os.stat(filepath)
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        cache_size = os.path.getsize(path)
+    except OSError:
+        return None
+    if len(header) < _HEADER.size:
+        return None
+
+    magic, version, mtime_ns, size, n_points, n_lines, n_scalars = _HEADER.unpack(header)
+    if magic != _MAGIC or version != _VERSION:
+        return None
+    if mtime_ns != st.st_mtime_ns or size != st.st_size:
+        return None
+    off_points, off_lines, off_scalars, total = _layout(n_points, n_lines, n_scalars)
+    if cache_size != total:
+        return None
+
+    # mode='c': cópia-na-escrita, quem alterar os arrays não corrompe o cache
+    def _map(dtype, offset, shape):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape)
+
+    return PolyData(
+        points=_map(np.float32, off_points, (n_points, 3)),
+        lines=_map(np.int32, off_lines, (n_lines, 2)),
+        cell_scalars=_map(np.float32, off_scalars, (n_scalars,)),
+    )
+
+
+def write_cache(filepath: str, data: PolyData) -> bool:
+    """Grava o cache de forma atômica (arquivo temporário + os.replace). Retorna False se não conseguir."""
+    path = cache_path(filepath)
+    tmp = None
+    points = np.ascontiguousarray(data.points, dtype=np.float32)
+    lines = np.ascontiguousarray(data.lines, dtype=np.int32)
+    scalars = np.ascontiguousarray(data.cell_scalars, dtype=np.float32)
+    off_points, off_lines, off_scalars, total = _layout(len(points), len(lines), len(scalars))
+    try:
+        st = os.stat(filepath)
+        # Nome único por chamada (não só por processo): threads do StepCache ou verify_step_delta
+        # gravando o mesmo cache não truncam o temporário uma da outra antes do os.replace
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(path) or ".")
+        os.chmod(tmp, 0o644)   # mkstemp cria com 0600
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, st.st_mtime_ns, st.st_size,
+                                 len(points), len(lines), len(scalars)).ljust(_HEADER_SIZE, b'\0'))
+            for offset, arr in ((off_points, points), (off_lines, lines), (off_scalars, scalars)):
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(arr.tobytes())
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        # Diretório somente leitura ou cache ainda mapeado (Windows): segue sem cache
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return False
+
+
+def load_polydata(filepath: str, use_cache: bool = True, progress=None) -> PolyData:
+    """
+    Lê do cache se válido; senão faz o parsing do .vtk em streaming e grava o cache.
+    progress(bytes lidos, total) acompanha o parsing (o cache é mapeado, não tem o que reportar).
+    """
+    if use_cache:
+        data = read_cache(filepath)
+        if data is not None:
+            return data
+    data = parse_vtk_stream(filepath, progress=progress)
+    if use_cache:
+        write_cache(filepath, data)
+    return data
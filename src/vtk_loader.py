@@ -1,64 +1,31 @@
 import os
 from src.model import Model2D
+from src.vtk_cache import load_polydata
+from src.profiler import PROFILER
 
-def load_vtk(filepath):
+def load_vtk(filepath, use_cache=True, progress=None):
     """
-    Parses a simple legacy ASCII VTK file for the arterial tree project.
+    Parses a simple legacy VTK file (ASCII or BINARY) for the arterial tree project.
     Expects POLYDATA with POINTS, LINES, and CELL_DATA (SCALARS).
+    The file is read in fixed-size chunks by the streaming parser (src/vtk_stream.py), which
+    calls progress(bytes read, total) after each chunk; with use_cache, the parsed arrays are
+    written to a .vtk.cache file next to the .vtk and memory-mapped from it on later loads
+    (no parsing, so no progress calls).
     """
-    model = Model2D()
-    
-    with open(filepath, 'r') as f:
-        lines = [l.strip() for l in f.readlines()]
-        
-    iterator = iter(lines)
-    
     try:
-        while True:
-            line = next(iterator)
-            
-            if line.upper().startswith("POINTS"):
-                parts = line.split()
-                num_points = int(parts[1])
-                # dtype = parts[2] # usually float
-                
-                for _ in range(num_points):
-                    p_line = next(iterator).split()
-                    x, y, z = float(p_line[0]), float(p_line[1]), float(p_line[2])
-                    model.vertices.append((x, y, z))
-                    
-            elif line.upper().startswith("LINES"):
-                parts = line.split()
-                num_lines = int(parts[1])
-                # total_ints = int(parts[2])
-                
-                for _ in range(num_lines):
-                    l_line = next(iterator).split()
-                    # format: num_points p1 p2 ... (usually 2 p1 p2 for segments)
-                    if l_line[0] == '2':
-                        p1 = int(l_line[1])
-                        p2 = int(l_line[2])
-                        model.segments.append((p1, p2))
-                        
-            elif line.upper().startswith("CELL_DATA"):
-                # Usually followed by SCALARS
-                pass
-                
-            elif line.upper().startswith("SCALARS"):
-                # e.g. SCALARS raio float
-                # followed by LOOKUP_TABLE default
-                next(iterator) # skip LOOKUP_TABLE line
-                
-                # Should match number of segments (cells)
-                for _ in range(len(model.segments)):
-                    val = float(next(iterator))
-                    model.radii.append(val)
-                    
-    except StopIteration:
-        pass
+        with PROFILER.timer('parse'):
+            data = load_polydata(filepath, use_cache, progress)
     except Exception as e:
         print(f"Error parsing VTK: {e}")
         return None
+    return model_from_polydata(data)
+
+def model_from_polydata(data):
+    """Builds a Model2D from already-decoded arrays (file, cache or timeline index)."""
+    model = Model2D()
+    model.vertices = data.points      # (N, 3) float32
+    model.segments = data.lines       # (M, 2) int32
+    model.radii = data.cell_scalars   # (M,) float32
 
     model.compute_bounds()
     return model
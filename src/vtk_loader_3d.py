@@ -3,84 +3,86 @@ Loader VTK para modelo 3D - TP2
 Extrai do VTK (apenas estrutura topológica e geométrica):
 - points: posições 3D (x,y,z)
 - lines/cells: conectividade pai→filho
-- radius: por segmento (CELL_DATA) → radius_point por vértice (média)
-Constrói parent_of, children_of, detecta raiz, valida árvore.
+- radius: por segmento (CELL_DATA) → radius_point por vértice (média por padrão; ver RADIUS_MODES)
+Constrói a topologia (parent, filhos em CSR, ordem BFS), detecta raiz, valida árvore.
 """
 import os
 import numpy as np
 from src.model3d import Model3D
+from src.vtk_cache import load_polydata
+from src.profiler import PROFILER
 
 
-def load_vtk_3d(filepath: str) -> Model3D:
+# Regras para o raio de cada ponto a partir dos raios dos segmentos que o tocam:
+# - mean:   média dos segmentos que tocam o ponto (padrão, comportamento original)
+# - max:    maior raio entre eles
+# - parent: raio do segmento que chega ao ponto (pai → ponto); a raiz usa a média
+# - murray: raio que satisfaz a lei de Murray com os filhos, r³ = Σ r_filho³; pontas usam o segmento pai
+RADIUS_MODES = ('mean', 'max', 'parent', 'murray')
+
+
+def point_radius(lines: np.ndarray, segment_radii: np.ndarray, n_points: int, mode: str = 'mean') -> np.ndarray:
+    """
+    radius_point (float64, mínimo 0.001) a partir das lines (i0 pai → i1 filho) e dos raios por
+    segmento. Pontos sem segmento ficam com 0.01. Sem CELL_DATA completo, só os primeiros
+    len(segment_radii) segmentos contam.
+    """
+    if mode not in RADIUS_MODES:
+        raise ValueError(f"radius_mode inválido: {mode!r} (use {', '.join(RADIUS_MODES)})")
+    m = min(len(lines), len(segment_radii))
+    lines = np.asarray(lines, dtype=np.int64).reshape(-1, 2)[:m]
+    r = np.asarray(segment_radii, dtype=np.float64)[:m]
+    ends = lines.reshape(-1)
+    count = np.bincount(ends, minlength=n_points)
+    mean = np.where(count > 0, np.bincount(ends, weights=np.repeat(r, 2), minlength=n_points)
+                    / np.maximum(count, 1), 0.01)
+    if mode == 'mean':
+        radius = mean
+    elif mode == 'max':
+        radius = np.full(n_points, -np.inf)
+        np.maximum.at(radius, ends, np.repeat(r, 2))
+        radius = np.where(count > 0, radius, 0.01)
+    else:
+        incoming = np.bincount(lines[:, 1], minlength=n_points) > 0
+        radius = mean.copy()
+        radius[lines[:, 1]] = r
+        if mode == 'murray':
+            children = np.bincount(lines[:, 0], minlength=n_points) > 0
+            cubes = np.bincount(lines[:, 0], weights=r ** 3, minlength=n_points)
+            radius = np.where(children, np.cbrt(cubes), np.where(incoming, radius, mean))
+    return np.maximum(radius, 0.001)
+
+
+def load_vtk_3d(filepath: str, use_cache: bool = True, radius_mode: str = 'mean', progress=None) -> Model3D:
     """
-    Parse VTK ASCII POLYDATA para árvore arterial 3D.
+    Parse VTK POLYDATA (ASCII ou BINARY) para árvore arterial 3D, lido em blocos (src/vtk_stream.py).
+    Com use_cache, os arrays vêm mapeados (np.memmap) do .vtk.cache ao lado do arquivo.
+    radius_mode: regra do raio por ponto (RADIUS_MODES).
+    progress: função (bytes lidos, total) chamada durante o parsing, ou None.
     Retorna Model3D com points, segments, radius_point e segment_list.
     """
-    model = Model3D()
-
-
-    with open(filepath, 'r') as f:
-        lines = [l.strip() for l in f.readlines()]
-
-    iterator = iter(lines)
-    segment_radii = []
-
     try:
-        while True:
-            line = next(iterator)
-
-            if line.upper().startswith("POINTS"):
-                parts = line.split()
-                num_points = int(parts[1])
-                pts = []
-                for _ in range(num_points):
-                    p_line = next(iterator).split()
-                    x, y, z = float(p_line[0]), float(p_line[1]), float(p_line[2])
-                    pts.append([x, y, z])
-                model.points = np.array(pts, dtype=np.float64)
-
-            elif line.upper().startswith("LINES"):
-                parts = line.split()
-                num_lines = int(parts[1])
-                for _ in range(num_lines):
-                    l_line = next(iterator).split()
-                    if l_line[0] == '2':
-                        p1 = int(l_line[1])
-                        p2 = int(l_line[2])
-                        model.segments.append((p1, p2))
-
-            elif line.upper().startswith("CELL_DATA"):
-                pass
-
-            elif line.upper().startswith("SCALARS"):
-                next(iterator)
-                for _ in range(len(model.segments)):
-                    val = float(next(iterator))
-                    segment_radii.append(val)
-
-    except StopIteration:
-        pass
+        with PROFILER.timer('parse'):
+            data = load_polydata(filepath, use_cache, progress)
     except Exception as e:
         print(f"Error parsing VTK: {e}")
         return None
+    return model_from_polydata(data, radius_mode)
 
-    # Compute radius_point: média dos raios dos segmentos que tocam cada ponto
-    n = len(model.points)
-    radius_sum = np.zeros(n)
-    radius_count = np.zeros(n)
 
-    for (i0, i1), r in zip(model.segments, segment_radii):
-        radius_sum[i0] += r
-        radius_count[i0] += 1
-        radius_sum[i1] += r
-        radius_count[i1] += 1
+def model_from_polydata(data, radius_mode: str = 'mean') -> Model3D:
+    """Monta o Model3D a partir dos arrays já decodificados (arquivo, cache ou índice da timeline)."""
+    model = Model3D()
+    model.points = data.points
+    model.segments = data.lines
 
-    model.radius_point = np.where(radius_count > 0, radius_sum / radius_count, 0.01)
-    model.radius_point = np.maximum(model.radius_point, 0.001)
+    with PROFILER.timer('radius_point'):
+        model.radius_point = point_radius(data.lines, data.cell_scalars, len(data.points), radius_mode)
 
     model.compute_bounds()
     try:
-        model.build_segment_list()
+        with PROFILER.timer('tree_build'):
+            model.build_segment_list()
     except ValueError as e:
         print(f"Erro: {e}")
         return None
@@ -0,0 +1,182 @@
+"""
+Parser VTK legado (POLYDATA) compartilhado por load_vtk (TP1) e load_vtk_3d (TP2).
+Em vez de ler linha a linha, localiza os offsets das seções (POINTS, LINES,
+CELL_DATA/SCALARS) e decodifica cada bloco de uma vez (np.fromstring no ASCII,
+np.frombuffer big-endian no BINARY), gerando arrays contíguos float32/int32.
+"""
+import re
+import numpy as np
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PolyData:
+    """Conteúdo bruto de um POLYDATA: pontos (N×3), segmentos (M×2) e escalares por célula."""
+    points: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=np.float32))
+    lines: np.ndarray = field(default_factory=lambda: np.zeros((0, 2), dtype=np.int32))
+    cell_scalars: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+
+
+# Cabeçalhos de seção: sempre começam uma linha, os blocos de dados só têm números.
+# O prefixo literal '\n' (em vez de ^ com MULTILINE) deixa a busca bem mais rápida.
+_SECTION_RE = re.compile(
+    rb'\n[ \t]*(POINTS|LINES|VERTICES|POLYGONS|TRIANGLE_STRIPS|CELL_DATA|POINT_DATA'
+    rb'|SCALARS|LOOKUP_TABLE|FIELD|NORMALS|VECTORS|TEXTURE_COORDINATES)\b([^\r\n]*)',
+    re.IGNORECASE
+)
+
+
+# Tipos do VTK legado -> dtype big-endian (arquivos BINARY são sempre big-endian)
+_BINARY_TYPES = {
+    'float': '>f4', 'double': '>f8',
+    'int': '>i4', 'unsigned_int': '>u4',
+    'long': '>i8', 'unsigned_long': '>u8', 'vtktypeint64': '>i8',
+    'short': '>i2', 'unsigned_short': '>u2',
+    'char': 'i1', 'unsigned_char': 'u1',
+}
+
+
+def _decode_ascii(buf: bytes, start: int, end: int, dtype, count: int) -> np.ndarray:
+    """Decodifica `count` números do bloco buf[start:end] de uma só vez."""
+    values = np.fromstring(buf[start:end], dtype=dtype, sep=' ')
+    if values.size < count:
+        raise ValueError(f"bloco com {values.size} valores, esperado {count}")
+    return np.ascontiguousarray(values[:count])
+
+
+def _cells_to_lines(cells: np.ndarray, num_cells: int) -> tuple:
+    """
+    Converte a lista de células VTK (n p1 ... pn) em pares (p1, p2).
+    Só células de 2 pontos viram segmentos (igual ao parser antigo).
+    Retorna (lines M×2, máscara das células mantidas).
+    """
+    if cells.size == 3 * num_cells:
+        table = cells.reshape(num_cells, 3)
+        if np.all(table[:, 0] == 2):
+            return np.ascontiguousarray(table[:, 1:]), np.ones(num_cells, dtype=bool)
+
+    # Caso geral (polilinhas misturadas): percorre os tamanhos das células
+    keep = np.zeros(num_cells, dtype=bool)
+    pairs = []
+    pos = 0
+    for c in range(num_cells):
+        n = int(cells[pos])
+        if n == 2:
+            keep[c] = True
+            pairs.append(cells[pos + 1:pos + 3])
+        pos += n + 1
+    lines = np.array(pairs, dtype=np.int32).reshape(-1, 2)
+    return lines, keep
+
+
+def _read_preamble(buf: bytes) -> tuple:
+    """
+    Lê as 3 primeiras linhas (versão, título livre, ASCII|BINARY).
+    Retorna (posição do '\n' que fecha a linha de formato, binary).
+    """
+    pos = -1
+    starts = []
+    for _ in range(3):
+        starts.append(pos + 1)
+        pos = buf.find(b'\n', pos + 1)
+        if pos < 0:
+            raise ValueError("cabeçalho VTK incompleto")
+    fmt = buf[starts[2]:pos].strip().upper()
+    if fmt not in (b'ASCII', b'BINARY'):
+        raise ValueError(f"formato VTK desconhecido: {fmt!r}")
+    return pos, fmt == b'BINARY'
+
+
+def _read_block(buf: bytes, pos: int, binary: bool, vtk_type: bytes, count: int, dtype) -> tuple:
+    """
+    Lê o bloco de dados que começa na linha seguinte a `pos`.
+    Binário: big-endian, tamanho exato; ASCII: vai até o próximo cabeçalho de seção.
+    Retorna (valores no dtype nativo, posição logo após o bloco).
+    """
+    start = buf.find(b'\n', pos) + 1
+    if start == 0:
+        raise ValueError("bloco de dados ausente")
+    if binary:
+        type_name = vtk_type.decode('ascii', 'replace').lower()
+        if type_name not in _BINARY_TYPES:
+            raise ValueError(f"tipo binário VTK não suportado: {type_name}")
+        src = np.dtype(_BINARY_TYPES[type_name])
+        end = start + src.itemsize * count
+        if end > len(buf):
+            raise ValueError("bloco binário truncado")
+        values = np.frombuffer(buf, dtype=src, count=count, offset=start).astype(dtype)
+        return values, end
+    m = _SECTION_RE.search(buf, start - 1)
+    end = m.start() if m else len(buf)
+    return _decode_ascii(buf, start, end, dtype, count), end
+
+
+def parse_vtk_polydata(filepath: str) -> PolyData:
+    """
+    Lê um arquivo VTK legado POLYDATA, ASCII ou BINARY (big-endian).
+    Lança ValueError se o arquivo estiver truncado ou malformado.
+    """
+    with open(filepath, 'rb') as f:
+        buf = f.read()
+
+    # Título livre pode conter qualquer texto: a busca começa depois da linha de formato
+    pos, binary = _read_preamble(buf)
+
+    data = PolyData()
+    cell_mask = None
+    num_cell_data = None
+    num_point_data = 0
+    in_cell_data = False
+
+    m = _SECTION_RE.search(buf, pos)
+    while m is not None:
+        keyword = m.group(1).upper()
+        args = m.group(2).split()
+        pos = m.end()
+
+        if keyword == b'POINTS':
+            n = int(args[0])
+            values, pos = _read_block(buf, pos, binary, args[1], 3 * n, np.float32)
+            data.points = values.reshape(n, 3)
+
+        elif keyword == b'LINES':
+            num_cells, total = int(args[0]), int(args[1])
+            cells, pos = _read_block(buf, pos, binary, b'int', total, np.int32)
+            data.lines, cell_mask = _cells_to_lines(cells, num_cells)
+
+        elif keyword in (b'VERTICES', b'POLYGONS', b'TRIANGLE_STRIPS'):
+            _, pos = _read_block(buf, pos, binary, b'int', int(args[1]), np.int32)
+
+        elif keyword == b'CELL_DATA':
+            in_cell_data = True
+            num_cell_data = int(args[0])
+
+        elif keyword == b'POINT_DATA':
+            in_cell_data = False
+            num_point_data = int(args[0])
+
+        elif keyword == b'SCALARS':
+            # LOOKUP_TABLE é opcional: se vier, os dados começam depois dele
+            lut = _SECTION_RE.match(buf, buf.find(b'\n', pos))
+            if lut is not None and lut.group(1).upper() == b'LOOKUP_TABLE':
+                pos = lut.end()
+            ncomp = int(args[2]) if len(args) > 2 else 1
+            if in_cell_data:
+                count = (num_cell_data if num_cell_data is not None else len(data.lines)) * ncomp
+            else:
+                count = num_point_data * ncomp
+            values, pos = _read_block(buf, pos, binary, args[1], count, np.float32)
+            # Só o primeiro escalar de célula (raio) é usado
+            if in_cell_data and data.cell_scalars.size == 0:
+                scalars = values[::ncomp]
+                if cell_mask is not None and cell_mask.size == scalars.size and not cell_mask.all():
+                    scalars = scalars[cell_mask]
+                data.cell_scalars = np.ascontiguousarray(scalars)
+
+        elif binary and keyword != b'LOOKUP_TABLE':
+            # Seção binária de tamanho desconhecido (FIELD, NORMALS...): não dá para pular com segurança
+            break
+
+        m = _SECTION_RE.search(buf, pos)
+
+    return data
@@ -0,0 +1,278 @@
+"""
+Leitura em streaming de VTK legado (POLYDATA) - TP2
+Em vez de carregar o arquivo inteiro num buffer, consome blocos de bytes de tamanho fixo
+(gerador _chunks). Os cabeçalhos de seção (POINTS n, LINES m total, SCALARS) dão os tamanhos:
+os arrays finais são alocados antes e cada bloco é decodificado direto na fatia seguinte deles
+(np.fromstring no ASCII, np.frombuffer big-endian no BINARY). O pico de memória fica perto do
+tamanho dos arrays mais um bloco, não do tamanho do arquivo.
+
+progress(bytes lidos, tamanho do arquivo) é chamado a cada bloco lido.
+Mesmo resultado de vtk_parser.parse_vtk_polydata, que continua como leitura em memória.
+"""
+import os
+import numpy as np
+from src.vtk_parser import PolyData, _SECTION_RE, _BINARY_TYPES, _cells_to_lines, _read_preamble
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _chunks(f, chunk_size: int, total: int, progress):
+    """Gerador de blocos de até chunk_size bytes, avisando o progresso a cada um."""
+    done = 0
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        done += len(chunk)
+        if progress is not None:
+            progress(done, total)
+        yield chunk
+
+
+class _Stream:
+    """
+    Cursor sobre os blocos: buf guarda só o que ainda não foi consumido a partir de pos.
+    Como no parser em memória, pos fica no '\\n' que antecede o próximo cabeçalho.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.buf = b''
+        self.pos = 0
+        self.eof = False
+
+    def more(self) -> bool:
+        """Anexa o próximo bloco (descartando o já consumido). False no fim do arquivo."""
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def preamble(self) -> bool:
+        """Versão, título e ASCII|BINARY; retorna binary."""
+        while self.buf.count(b'\n') < 3 and self.more():
+            pass
+        self.pos, binary = _read_preamble(self.buf)
+        return binary
+
+    def next_section(self):
+        """Próximo cabeçalho (palavra-chave, argumentos), pulando o que não for cabeçalho; None no fim."""
+        while True:
+            m = _SECTION_RE.search(self.buf, self.pos)
+            # O cabeçalho só vale com a linha inteira no buffer
+            if m is not None and (m.end() < len(self.buf) or self.eof):
+                self.pos = m.end()
+                return m.group(1).upper(), m.group(2).split()
+            if m is None:
+                newline = self.buf.rfind(b'\n', self.pos)
+                if newline > self.pos:
+                    self.pos = newline
+            if not self.more():
+                if m is None:
+                    return None
+
+    def skip_lookup_table(self):
+        """LOOKUP_TABLE é opcional depois de SCALARS: se vier, os dados começam depois dele."""
+        while True:
+            line_end = self.buf.find(b'\n', self.pos)
+            if line_end >= 0:
+                m = _SECTION_RE.match(self.buf, line_end)
+                if m is not None and (m.end() < len(self.buf) or self.eof):
+                    if m.group(1).upper() == b'LOOKUP_TABLE':
+                        self.pos = m.end()
+                    return
+                if m is None and (len(self.buf) - line_end > 64 or self.eof):
+                    return
+            if not self.more():
+                return
+
+    def _data_start(self) -> int:
+        """Início do bloco de dados: a linha seguinte ao cabeçalho."""
+        while True:
+            line_end = self.buf.find(b'\n', self.pos)
+            if line_end >= 0:
+                return line_end + 1
+            if not self.more():
+                raise ValueError("bloco de dados ausente")
+
+    def ascii_values(self, dtype, count: int):
+        """
+        Gerador dos números do bloco ASCII (até o próximo cabeçalho), um array por bloco lido.
+        Cada pedaço termina num '\\n' (ou espaço, em linhas longas) para nunca cortar um número.
+        """
+        self.pos = self._data_start() - 1
+        filled = 0
+        while True:
+            m = _SECTION_RE.search(self.buf, self.pos)
+            last = m is not None or self.eof
+            if m is not None:
+                end = m.start()
+            elif self.eof:
+                end = len(self.buf)
+            else:
+                end = self.buf.rfind(b'\n', self.pos + 1)
+                if end < 0:
+                    end = max(self.buf.rfind(b' ', self.pos + 1), self.buf.rfind(b'\t', self.pos + 1))
+            if end > self.pos:
+                text = self.buf[self.pos:end]
+                # Só espaços: np.fromstring devolveria [-1] em vez de vazio
+                if not text.isspace():
+                    values = np.fromstring(text, dtype=dtype, sep=' ')
+                    take = min(values.size, count - filled)
+                    if take > 0:
+                        filled += take
+                        yield values[:take]
+                self.pos = end
+            if last:
+                break
+            self.more()
+        if filled < count:
+            raise ValueError(f"bloco com {filled} valores, esperado {count}")
+
+    def binary_values(self, vtk_type: bytes, count: int):
+        """Gerador dos `count` valores big-endian do bloco binário, um array por bloco lido."""
+        type_name = vtk_type.decode('ascii', 'replace').lower()
+        if type_name not in _BINARY_TYPES:
+            raise ValueError(f"tipo binário VTK não suportado: {type_name}")
+        src = np.dtype(_BINARY_TYPES[type_name])
+        self.pos = self._data_start()
+        filled = 0
+        while filled < count:
+            k = min((len(self.buf) - self.pos) // src.itemsize, count - filled)
+            if k > 0:
+                yield np.frombuffer(self.buf, dtype=src, count=k, offset=self.pos)
+                self.pos += k * src.itemsize
+                filled += k
+            elif not self.more():
+                raise ValueError("bloco binário truncado")
+
+    def values(self, binary: bool, vtk_type: bytes, count: int, dtype):
+        if binary:
+            return self.binary_values(vtk_type, count)
+        return self.ascii_values(dtype, count)
+
+
+def _fill(out: np.ndarray, pieces) -> np.ndarray:
+    """Copia os pedaços em sequência no array pré-alocado (1-D)."""
+    filled = 0
+    for piece in pieces:
+        out[filled:filled + len(piece)] = piece
+        filled += len(piece)
+    return out
+
+
+def _stream_lines(pieces, num_cells: int, total: int) -> tuple:
+    """
+    Células "2 p1 p2" vão direto para lines (M×2) pré-alocado. Se aparecer outra célula
+    (polilinha), remonta a lista de células e cai no caminho geral de _cells_to_lines.
+    Retorna (lines, máscara das células mantidas).
+    """
+    lines = np.empty((num_cells, 2), dtype=np.int32)
+    done = 0
+    carry = np.zeros(0, dtype=np.int32)
+    cells = None
+    filled = 0
+    for piece in pieces:
+        if cells is None:
+            values = np.concatenate((carry, piece)) if carry.size else piece
+            k = len(values) // 3
+            table = values[:3 * k].reshape(k, 3)
+            if done + k <= num_cells and np.all(table[:, 0] == 2):
+                lines[done:done + k] = table[:, 1:]
+                done += k
+                carry = values[3 * k:]
+                continue
+            piece = values
+            cells, filled = _general_cells(lines, done, total)
+        cells[filled:filled + len(piece)] = piece
+        filled += len(piece)
+    if cells is None and (done < num_cells or carry.size):
+        cells, filled = _general_cells(lines, done, total)
+        cells[filled:filled + len(carry)] = carry
+    if cells is None:
+        return lines, np.ones(num_cells, dtype=bool)
+    return _cells_to_lines(cells, num_cells)
+
+
+def _general_cells(lines: np.ndarray, done: int, total: int) -> tuple:
+    """Lista de células completa com as `done` primeiras (todas de 2 pontos) já preenchidas."""
+    cells = np.empty(total, dtype=np.int32)
+    prefix = cells[:3 * done].reshape(done, 3)
+    prefix[:, 0] = 2
+    prefix[:, 1:] = lines[:done]
+    return cells, 3 * done
+
+
+def parse_vtk_stream(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None) -> PolyData:
+    """
+    Lê um arquivo VTK legado POLYDATA, ASCII ou BINARY (big-endian), em blocos de chunk_size bytes.
+    progress: função (bytes lidos, tamanho total) chamada a cada bloco, ou None.
+    Lança ValueError se o arquivo estiver truncado ou malformado.
+    """
+    total = os.path.getsize(filepath)
+    # read(n) aloca n bytes antes de ler: arquivos pequenos não precisam de um bloco inteiro
+    chunk_size = max(1, min(chunk_size, total))
+    with open(filepath, 'rb') as f:
+        stream = _Stream(_chunks(f, chunk_size, total, progress))
+        binary = stream.preamble()
+
+        data = PolyData()
+        cell_mask = None
+        num_cell_data = None
+        num_point_data = 0
+        in_cell_data = False
+
+        section = stream.next_section()
+        while section is not None:
+            keyword, args = section
+
+            if keyword == b'POINTS':
+                n = int(args[0])
+                out = np.empty(3 * n, dtype=np.float32)
+                data.points = _fill(out, stream.values(binary, args[1], 3 * n, np.float32)).reshape(n, 3)
+
+            elif keyword == b'LINES':
+                num_cells, count = int(args[0]), int(args[1])
+                data.lines, cell_mask = _stream_lines(stream.values(binary, b'int', count, np.int32),
+                                                      num_cells, count)
+
+            elif keyword in (b'VERTICES', b'POLYGONS', b'TRIANGLE_STRIPS'):
+                for _ in stream.values(binary, b'int', int(args[1]), np.int32):
+                    pass
+
+            elif keyword == b'CELL_DATA':
+                in_cell_data = True
+                num_cell_data = int(args[0])
+
+            elif keyword == b'POINT_DATA':
+                in_cell_data = False
+                num_point_data = int(args[0])
+
+            elif keyword == b'SCALARS':
+                stream.skip_lookup_table()
+                ncomp = int(args[2]) if len(args) > 2 else 1
+                if in_cell_data:
+                    count = (num_cell_data if num_cell_data is not None else len(data.lines)) * ncomp
+                else:
+                    count = num_point_data * ncomp
+                pieces = stream.values(binary, args[1], count, np.float32)
+                # Só o primeiro escalar de célula (raio) é usado; os demais são consumidos e descartados
+                if in_cell_data and data.cell_scalars.size == 0:
+                    scalars = _fill(np.empty(count, dtype=np.float32), pieces)[::ncomp]
+                    if cell_mask is not None and cell_mask.size == scalars.size and not cell_mask.all():
+                        scalars = scalars[cell_mask]
+                    data.cell_scalars = np.ascontiguousarray(scalars)
+                else:
+                    for _ in pieces:
+                        pass
+
+            elif binary and keyword != b'LOOKUP_TABLE':
+                # Seção binária de tamanho desconhecido (FIELD, NORMALS...): não dá para pular com segurança
+                break
+
+            section = stream.next_section()
+
+    return data